@@ -2,9 +2,7 @@
 
 import sys
 import argparse
-import json
 import math
-import random
 
 sys.path.append('../src/Player')
 sys.path.append('../src/Game')
@@ -12,6 +10,7 @@ sys.path.append('../src/Common')
 
 from character import *
 from level import *
+from levelLoader import *
 from game import *
 from gameManager import *
 from localPlayer import *
@@ -33,79 +32,6 @@ def test_args():
         print("\nThe user has indicated they want to observe the game.")
 
 
-def init_tiles(room, layout):
-    """
-    Initializes the tiles for the room.
-
-    Args:
-        room (Room): The room to initialize tiles for.
-        layout ([JSON]): The layout for the room.
-    """
-    for i in range(room.length):
-        for j in range(room.width):
-            tile_type = layout[i][j]
-            if tile_type == 0:
-                new_tile = Tile(i, j, True, False, False, False)
-                new_tile.in_room = True
-                room.tiles[i][j] = new_tile
-            elif tile_type == 1:
-                new_tile = Tile(i, j, False, False, False, False)
-                new_tile.in_room = True
-                room.tiles[i][j] = new_tile
-            else:
-                new_tile = Tile(i, j, False, True, False, False)
-                new_tile.in_room = True
-                room.tiles[i][j] = new_tile
-
-
-def add_rooms(level, rooms):
-    """
-    Adds the JSON input of rooms to the instantiated level.
-
-    Args:
-        level ([type]): The instantiated level.
-        rooms ([JSON]): The JSON input of rooms.
-    """
-    for room in rooms:
-        origin = room["origin"]
-        bounds = room["bounds"]
-        layout = room["layout"]
-        new_room = Room(bounds["rows"], bounds["columns"])
-        init_tiles(new_room, layout)
-        level.add_room(origin[0], origin[1], new_room)
-
-
-def add_hallways(level, hallways):
-    """
-    Adds hallways to the level.
-
-    Args:
-        level (Level): The level to add hallways to.
-        hallways ([JSON]): The JSON input of hallways.
-    """
-    for hallway in hallways:
-        from_ = hallway["from"]
-        to = hallway["to"]
-        waypoints = hallway["waypoints"]
-        waypoints_t = []
-        for w in waypoints:
-            waypoints_t.append((w[0], w[1]))
-        room1 = None
-        room2 = None
-        for room in level.rooms:
-            for t in room.tiles:
-                for a in t:
-                    if a.x_pos == from_[0] and a.y_pos == from_[1]:
-                        room1 = room
-
-        for room in level.rooms:
-            for t in room.tiles:
-                for a in t:
-                    if a.x_pos == to[0] and a.y_pos == to[1]:
-                        room2 = room
-        level.add_hallway(from_[0], from_[1], to[0], to[1], waypoints_t, room1, room2)
-
-
 def create_zombies(number):
     """
     Create the given number of zombies.
@@ -155,19 +81,9 @@ def get_random_starting_position(level):
         level (Level): The level to find a random starting position for.
 
     Returns:
-        (int, int): The starting position
+        (int, int): The starting position, or None if there is no free tile
     """
-    length = level.length
-    width = level.width
-
-    for i in range(length):
-        for j in range(width):
-            rand_x_pos = random.randint(0, length - 1)
-            rand_y_pos = random.randint(0, width - 1)
-            dst_tile = level.tiles[rand_x_pos][rand_y_pos]
-            if isinstance(dst_tile, Tile) and dst_tile.in_room and not dst_tile.border:
-                if not dst_tile.level_exit and not dst_tile.key and not dst_tile.characters:
-                    return (rand_x_pos, rand_y_pos)
+    return level.get_random_starting_position()
 
 
 if __name__ == '__main__':
@@ -193,65 +109,8 @@ if __name__ == '__main__':
     starting_level = args.start
     observer_view = True if args.observe else False
 
-    num_levels = 0
-    json_levels = []
-
-    # Now pulling information from JSON levels file
-    # print("We are reading from this file: " + str(levels_file))
-    with open (levels_file, mode='r') as input_file:
-        curr_json_level = ""
-        counter = 0
-        for line in input_file.readlines():
-            # print(line)
-            if counter == 0:
-                num_levels = int(line.strip())
-            else:
-                if line == "\n" and counter != 1:
-                    json_levels.append(curr_json_level.strip('\n'))
-                    curr_json_level = ""
-                else:
-                    curr_json_level += line
-            counter += 1
-
-        # Append the last JSON level to the json_levels list
-        json_levels.append(curr_json_level.strip('\n'))
-
-    # Convert str json levels into json objects
-    parsed_levels = []
-    for json_level in json_levels:
-        parsed_levels.append(json.loads(json_level))
-
-    # Create our rooms, hallways, and level to add to the game
-    levels = []
-    for index, json_level in enumerate(parsed_levels):
-        if index < starting_level - 1:
-            continue
-        else:
-            rooms = json_level["rooms"]
-            hallways = json_level["hallways"]
-            objects = json_level["objects"]
-            key_pos = None
-            exit_pos = None
-
-            testing_level = Level(20, 20)
-
-            # Adding rooms to our level
-            add_rooms(testing_level, rooms)
-
-            # Adding hallways to our level
-            add_hallways(testing_level, hallways)
-
-            # Set the key and exit for the level
-            for obj in objects:
-                if obj["type"] == "exit":
-                    exit_pos = obj["position"]
-                    testing_level.set_level_exit(exit_pos[0], exit_pos[1])
-                elif obj["type"] == "key":
-                    key_pos = obj["position"]
-                    testing_level.set_key(key_pos[0], key_pos[1])
-
-            levels.append(testing_level)
-
+    # Create our rooms, hallways, and level to add to the game from the JSON levels file
+    levels = [build_level(json_level) for json_level in read_levels_file(levels_file)[starting_level - 1:]]
 
     # Create the game and the game manager
     demo_game = Game([], [], levels)
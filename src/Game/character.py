@@ -1,6 +1,5 @@
 #!/usr/bin/env python3
 
-import random
 from enum import Enum
 
 class Type(Enum):
@@ -107,7 +106,7 @@ class Adversary:
                     return self.game_manager.accept_movement(closest_move, self)
 
             # There are no players in the vicinity, let's pick a random valid move
-            rand_index = random.randint(0, len(valid_moves) - 1)
+            rand_index = self.game_manager.game.random.randint(0, len(valid_moves) - 1)
             move = valid_moves[rand_index]
             return self.game_manager.accept_movement(move, self)
 
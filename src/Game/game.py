@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import random
 from enum import Enum
 from level import *
 from character import *
@@ -13,15 +14,23 @@ class State(Enum):
     IN_PROGRESS = 2
 
 class Game:
-    def __init__(self, players, adversaries, levels):
+    def __init__(self, players, adversaries, levels, seed=None):
         """
         Initializes the Game.
         Args:
             players ([Player]): The list of Players in the Game
             adversaries ([Adversary]): The list of Adversaries in the Game
             levels ([Level]): The list of Levels in the Game
+            seed (int): The seed for all of the Game's randomness, picked at random if not given.
+                Playing the same levels with the same seed and moves replays the same Game.
 
         """
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
+        self.random = random.Random(seed)
+        for level in levels:
+            level.random = self.random
         self.players = players
         self.adversaries = adversaries
         self.levels = levels
@@ -29,7 +38,8 @@ class Game:
         self.state = State.OVER
         self.current_level = self.levels[0]
         self.end_game_message = {"type": "end-game",
-                                 "scores": []}
+                                 "scores": [],
+                                 "seed": seed}
 
     def get_game_scores(self):
         """
@@ -94,7 +104,7 @@ class Game:
         if self.levels[len(self.levels) - 1] == self.current_level:
             for player in self.players:
                 player.active = False
-        elif len(self.current_level.players_exited) == len(self.players):
+        elif self.current_level.level_over or len(self.current_level.players_exited) == len(self.players):
             self.current_level = self.levels[self.levels.index(self.current_level) + 1]
             for player in self.players:
                 player.active = True
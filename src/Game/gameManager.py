@@ -151,32 +151,26 @@ class GameManager:
         Changes the player's turn to the next player.
         """
         curr_level = self.game.current_level
-        if curr_level.level_over:
+        players_exited = curr_level.players_exited
+        players_in = []
+
+        # Find out who is left in the level
+        for player in self.game.players:
+            if player not in players_exited:
+                players_in.append(player)
+
+        if curr_level.level_over or not players_in:
             self.player_turn = 1
-        else:
-            players_exited = curr_level.players_exited
-            players_in = []
-
-            # Find out who is left in the level
-            for player in self.game.players:
-                if player not in players_exited:
-                    players_in.append(player)
-            
-            # Last player turn
-            last_player_turn = players_in[len(players_in) - 1].turn_id
-
-            # Change turn based on who is left in the level
-            if self.player_turn == last_player_turn:
-                self.player_turn = players_in[0].turn_id
-                self.change_game_turn()
-            else:
-                if self.player_turn > last_player_turn:
-                    self.player_turn = players_in[0].turn_id
-                    self.change_game_turn()
-                else:
-                    for p in players_in:
-                        if p.turn_id > self.player_turn:
-                            self.player_turn = p.turn_id
+            return
+
+        # Change turn to the next player left in the level, or end the players' turn after the last one
+        for p in players_in:
+            if p.turn_id > self.player_turn:
+                self.player_turn = p.turn_id
+                return
+
+        self.player_turn = players_in[0].turn_id
+        self.change_game_turn()
 
     def change_adversary_turn(self):
         """
@@ -230,38 +224,18 @@ class GameManager:
         Returns:
             [(int, int)]: The list of valid moves.
         """
+        level = self.game.current_level
         valid_moves = []
-        curr_pos = (player.x_pos, player.y_pos)
-
-        # Checking no movement
-        if self.rulechecker.is_valid_movement(player, curr_pos):
-            valid_moves.append(curr_pos)
-
-        # Checking up
-        if self.rulechecker.is_valid_movement(player, (curr_pos[0], curr_pos[1] - 1)):
-            valid_moves.append((curr_pos[0], curr_pos[1] - 1))
-        if self.rulechecker.is_valid_movement(player, (curr_pos[0], curr_pos[1] - 2)):
-            valid_moves.append((curr_pos[0], curr_pos[1] - 2))
-
-        # Checking down
-        if self.rulechecker.is_valid_movement(player, (curr_pos[0], curr_pos[1] + 1)):
-            valid_moves.append((curr_pos[0], curr_pos[1] + 1))
-        if self.rulechecker.is_valid_movement(player, (curr_pos[0], curr_pos[1] + 2)):
-            valid_moves.append((curr_pos[0], curr_pos[1] + 2))
-
-        # Checking left
-        if self.rulechecker.is_valid_movement(player, (curr_pos[0] - 1, curr_pos[1])):
-            valid_moves.append((curr_pos[0] - 1, curr_pos[1]))
-        if self.rulechecker.is_valid_movement(player, (curr_pos[0] - 2, curr_pos[1])):
-            valid_moves.append((curr_pos[0] - 2, curr_pos[1]))
-
-        # Checking right
-        if self.rulechecker.is_valid_movement(player, (curr_pos[0] + 1, curr_pos[1])):
-            valid_moves.append((curr_pos[0] + 1, curr_pos[1]))
-        if self.rulechecker.is_valid_movement(player, (curr_pos[0] + 2, curr_pos[1])):
-            valid_moves.append((curr_pos[0] + 2, curr_pos[1]))
-
-        return list(set(valid_moves))
+        if not player.active:
+            return valid_moves
+
+        # Players cannot move onto other players
+        for index in level.get_moves(player):
+            other = level.player_at.get(index)
+            if other is None or other.id == player.id:
+                valid_moves.append(divmod(index, level.width))
+
+        return valid_moves
 
     def send_player_view(self, player):
         """
@@ -287,27 +261,15 @@ class GameManager:
         Returns:
             [(int, int)]: The list of valid moves.
         """
+        level = self.game.current_level
         valid_moves = []
-        curr_pos = (adversary.x_pos, adversary.y_pos)
-
-        # Checking no movement
-        if self.rulechecker.is_valid_movement(adversary, curr_pos):
-            valid_moves.append(curr_pos)
-
-        # Checking up
-        if self.rulechecker.is_valid_movement(adversary, (curr_pos[0], curr_pos[1] - 1)):
-            valid_moves.append((curr_pos[0], curr_pos[1] - 1))
-
-        # Checking down
-        if self.rulechecker.is_valid_movement(adversary, (curr_pos[0], curr_pos[1] + 1)):
-            valid_moves.append((curr_pos[0], curr_pos[1] + 1))
-
-        # Checking left
-        if self.rulechecker.is_valid_movement(adversary, (curr_pos[0] - 1, curr_pos[1])):
-            valid_moves.append((curr_pos[0] - 1, curr_pos[1]))
+        if not adversary.active:
+            return valid_moves
 
-        # Checking right
-        if self.rulechecker.is_valid_movement(adversary, (curr_pos[0] + 1, curr_pos[1])):
-            valid_moves.append((curr_pos[0] + 1, curr_pos[1]))
+        # Adversaries cannot move onto other adversaries
+        for index in level.get_moves(adversary):
+            other = level.adversary_at.get(index)
+            if other is None or other.id == adversary.id:
+                valid_moves.append(divmod(index, level.width))
 
-        return valid_moves
\ No newline at end of file
+        return valid_moves
@@ -1,9 +1,27 @@
 #!/usr/bin/env python3
 
-import copy
 import random
+from array import array
 from character import *
 
+# Bit flags describing a single cell of a Level. A cell with no CELL_TILE bit is void.
+CELL_TILE = 1
+CELL_BORDER = 2
+CELL_EXIT = 4
+CELL_KEY = 8
+CELL_LEVEL_EXIT = 16
+CELL_IN_ROOM = 32
+CELL_IN_HALLWAY = 64
+
+# Lookup tables from cell flags to walkability (1 or 0), applied to a whole level with bytes.translate
+PLAYER_WALKABLE = bytes(1 if f & CELL_TILE and not f & CELL_BORDER else 0 for f in range(256))
+ZOMBIE_WALKABLE = bytes(1 if f & CELL_TILE and not f & (CELL_BORDER | CELL_IN_HALLWAY) else 0 for f in range(256))
+GHOST_WALKABLE = bytes(1 if f & CELL_TILE else 0 for f in range(256))
+
+# The (x, y) offsets a single move can cover, in the order moves are offered
+PLAYER_STEPS = ((0, 0), (0, -1), (0, -2), (0, 1), (0, 2), (-1, 0), (-2, 0), (1, 0), (2, 0))
+ADVERSARY_STEPS = ((0, 0), (0, -1), (0, 1), (-1, 0), (1, 0))
+
 class Tile:
     def __init__(self, x_pos, y_pos, border, exit, level_exit, key):
         """
@@ -27,6 +45,247 @@ class Tile:
         self.in_hallway = False
         self.in_room = False
 
+class TileView(Tile):
+    def __init__(self, level, index):
+        """
+        A thin view of a single cell in a Level. The Level stores its tiles as flat arrays,
+        so reading or writing an attribute here goes straight through to those arrays.
+
+        Args:
+            level (Level): The level that owns the cell
+            index (int): The cell index, x_pos * level.width + y_pos
+        """
+        self.level = level
+        self.index = index
+
+    def get_flag(self, flag):
+        """
+        Reads one of the CELL_* flags for this tile.
+
+        Args:
+            flag (int): The flag to read
+
+        Returns:
+            bool: Whether the flag is set
+        """
+        return bool(self.level.cells[self.index] & flag)
+
+    def set_flag(self, flag, value):
+        """
+        Sets or clears one of the CELL_* flags for this tile.
+
+        Args:
+            flag (int): The flag to write
+            value (bool): Whether the flag should be set
+        """
+        if value:
+            self.level.cells[self.index] |= flag
+        else:
+            self.level.cells[self.index] &= ~flag
+        self.level.layout_changed()
+
+    @property
+    def border(self):
+        return self.get_flag(CELL_BORDER)
+
+    @border.setter
+    def border(self, value):
+        self.set_flag(CELL_BORDER, value)
+
+    @property
+    def exit(self):
+        return self.get_flag(CELL_EXIT)
+
+    @exit.setter
+    def exit(self, value):
+        self.set_flag(CELL_EXIT, value)
+
+    @property
+    def key(self):
+        return self.get_flag(CELL_KEY)
+
+    @key.setter
+    def key(self, value):
+        self.set_flag(CELL_KEY, value)
+
+    @property
+    def level_exit(self):
+        return self.get_flag(CELL_LEVEL_EXIT)
+
+    @level_exit.setter
+    def level_exit(self, value):
+        self.set_flag(CELL_LEVEL_EXIT, value)
+
+    @property
+    def in_room(self):
+        return self.get_flag(CELL_IN_ROOM)
+
+    @in_room.setter
+    def in_room(self, value):
+        self.set_flag(CELL_IN_ROOM, value)
+
+    @property
+    def in_hallway(self):
+        return self.get_flag(CELL_IN_HALLWAY)
+
+    @in_hallway.setter
+    def in_hallway(self, value):
+        self.set_flag(CELL_IN_HALLWAY, value)
+
+    @property
+    def x_pos(self):
+        return self.level.get_position(self.index)[0]
+
+    @property
+    def y_pos(self):
+        return self.level.get_position(self.index)[1]
+
+    @property
+    def characters(self):
+        return self.level.get_characters(self.index)
+
+    def __eq__(self, other):
+        return isinstance(other, TileView) and self.level is other.level and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.level), self.index))
+
+class TileGrid:
+    def __init__(self, level):
+        """
+        Row-major access to a Level's cells in the shape of the old list-of-lists of tiles:
+        grid[x][y] is a TileView for a tile, or 0 for a void cell.
+
+        Args:
+            level (Level): The level to view
+        """
+        self.level = level
+
+    def __len__(self):
+        return self.level.length
+
+    def __getitem__(self, x_pos):
+        if x_pos < 0:
+            x_pos += self.level.length
+        if x_pos < 0 or x_pos >= self.level.length:
+            raise IndexError("level row index out of range")
+        return TileRow(self.level, x_pos)
+
+    def __iter__(self):
+        for i in range(self.level.length):
+            yield TileRow(self.level, i)
+
+class TileRow:
+    def __init__(self, level, x_pos):
+        """
+        A single row of a TileGrid.
+
+        Args:
+            level (Level): The level to view
+            x_pos (int): The x-coordinate of the row
+        """
+        self.level = level
+        self.x_pos = x_pos
+
+    def __len__(self):
+        return self.level.width
+
+    def __getitem__(self, y_pos):
+        if y_pos < 0:
+            y_pos += self.level.width
+        if y_pos < 0 or y_pos >= self.level.width:
+            raise IndexError("level column index out of range")
+        index = self.x_pos * self.level.width + y_pos
+        if self.level.cells[index] & CELL_TILE:
+            return TileView(self.level, index)
+        return 0
+
+    def __iter__(self):
+        for j in range(self.level.width):
+            yield self[j]
+
+class RoomCells:
+    def __init__(self, length, width, origin_x, origin_y):
+        """
+        A room's own copy of its cells as CELL_* flags, kept once the room has been added to a
+        level. It can be viewed through a TileGrid like a level, and stays independent of the
+        levels the room was added to, so a room can be added to more than one level. Its tiles
+        are indexed from the room's corner but report their coordinates in the level.
+
+        Args:
+            length (int): The length of the room
+            width (int): The width of the room
+            origin_x (int): The x-coordinate of the room in the level
+            origin_y (int): The y-coordinate of the room in the level
+        """
+        self.length = length
+        self.width = width
+        self.origin_x = origin_x
+        self.origin_y = origin_y
+        self.cells = bytearray(length * width)
+
+    def get_position(self, index):
+        """
+        Gets the level coordinates of one of the room's cells.
+
+        Args:
+            index (int): The cell index, i * width + j from the room's corner
+
+        Returns:
+            (int, int): The x and y coordinates in the level
+        """
+        x_pos, y_pos = divmod(index, self.width)
+        return (self.origin_x + x_pos, self.origin_y + y_pos)
+
+    def layout_changed(self):
+        """
+        Called when one of the room's cells is written. A room keeps no walkability masks or move
+        graphs, so there is nothing to rebuild.
+        """
+        pass
+
+    def get_characters(self, index):
+        """
+        Get the characters on one of the room's cells. Characters are only tracked by levels.
+
+        Args:
+            index (int): The cell index
+
+        Returns:
+            [Character]: Always empty
+        """
+        return []
+
+class CellChanges:
+    def __init__(self, level):
+        """
+        A staged set of edits to a Level's cells. Only the cells that are written are recorded,
+        so staging a hallway costs the number of cells it touches rather than the size of the level.
+        Nothing reaches the level until commit is called, and dropping the changes rolls them back.
+
+        Args:
+            level (Level): The level being edited
+        """
+        self.level = level
+        self.changes = {}
+
+    def __getitem__(self, index):
+        if index in self.changes:
+            return self.changes[index]
+        return self.level.cells[index]
+
+    def __setitem__(self, index, flags):
+        self.changes[index] = flags
+
+    def commit(self):
+        """
+        Writes the staged cells into the level.
+        """
+        cells = self.level.cells
+        for index, flags in self.changes.items():
+            cells[index] = flags
+        self.changes = {}
+
 class Room:
     def __init__(self, length, width):
         """
@@ -109,7 +368,24 @@ class Level:
         self.width = width
         self.rooms = []
         self.hallways = []
-        self.tiles = [[0 for x in range(width)] for y in range(length)]
+        self.cells = bytearray(length * width)
+        # Who is standing where: cell index -> Player, cell index -> Adversary, and Character -> cell index
+        self.player_at = {}
+        self.adversary_at = {}
+        self.positions = {}
+        # Room id (index into self.rooms plus one) of every cell, 0 outside of rooms
+        self.room_ids = array('H', bytes(2 * length * width))
+        # Walkable room cells without an adversary, used for ghost teleports and starting positions.
+        # Built on first use; open_slots maps each cell index to its position in open_cells.
+        self.open_cells = None
+        self.open_slots = {}
+        # Walkability mask and move graph per kind of actor, built on first use
+        self.walkable = None
+        self.move_graphs = {}
+        # Random number generator for teleports and starting positions, replaced by the Game's own
+        self.random = random.Random()
+        # Cells whose actors or objects changed since take_changed_cells was last called
+        self.changed_cells = set()
         self.key = None
         self.level_exit = None
         self.exit_unlocked = False
@@ -123,6 +399,174 @@ class Level:
                                    "exits": [],
                                    "ejects": []}
 
+    @property
+    def tiles(self):
+        """
+        The level's tiles as a grid of TileViews, where void cells are 0.
+        Prefer get_cell and the cell index helpers in hot paths.
+
+        Returns:
+            (TileGrid): The tile grid for this level
+        """
+        return TileGrid(self)
+
+    def get_index(self, x_pos, y_pos):
+        """
+        Get the flat cell index for a coordinate.
+
+        Args:
+            x_pos (int): The x-coordinate
+            y_pos (int): The y-coordinate
+
+        Returns:
+            (int): The cell index, or None if the coordinate is out of bounds
+        """
+        if 0 <= x_pos < self.length and 0 <= y_pos < self.width:
+            return x_pos * self.width + y_pos
+        return None
+
+    def get_position(self, index):
+        """
+        Gets the coordinates of a cell.
+
+        Args:
+            index (int): The cell index
+
+        Returns:
+            (int, int): The x and y coordinates
+        """
+        return divmod(index, self.width)
+
+    def get_cell(self, x_pos, y_pos):
+        """
+        Get the CELL_* flags for a coordinate. Out of bounds coordinates are void.
+
+        Args:
+            x_pos (int): The x-coordinate
+            y_pos (int): The y-coordinate
+
+        Returns:
+            (int): The cell flags
+        """
+        if 0 <= x_pos < self.length and 0 <= y_pos < self.width:
+            return self.cells[x_pos * self.width + y_pos]
+        return 0
+
+    def get_tile(self, x_pos, y_pos):
+        """
+        Get a TileView for a coordinate.
+
+        Args:
+            x_pos (int): The x-coordinate
+            y_pos (int): The y-coordinate
+
+        Returns:
+            (TileView): The tile, or None if the cell is void or out of bounds
+        """
+        index = self.get_index(x_pos, y_pos)
+        if index is None or not self.cells[index] & CELL_TILE:
+            return None
+        return TileView(self, index)
+
+    def layout_changed(self):
+        """
+        Drop everything precomputed from the level's layout, to be rebuilt on next use.
+        """
+        self.open_cells = None
+        self.walkable = None
+        self.move_graphs = {}
+
+    def get_walkable(self, character):
+        """
+        Get the walkability mask for a character. Players walk on any tile but walls, zombies
+        also stay out of hallways, and ghosts can move onto any tile.
+
+        Args:
+            character (Character): The character to get the mask for
+
+        Returns:
+            (bytes): One byte per cell, 1 where the character may stand
+        """
+        if self.walkable is None:
+            self.walkable = {"player": self.cells.translate(PLAYER_WALKABLE),
+                             Type.ZOMBIE: self.cells.translate(ZOMBIE_WALKABLE),
+                             Type.GHOST: self.cells.translate(GHOST_WALKABLE),
+                             None: bytes(len(self.cells))}
+        if isinstance(character, Adversary):
+            return self.walkable[character.type]
+        return self.walkable["player"]
+
+    def get_move_graph(self, character):
+        """
+        Get the static move graph for a character's kind, ignoring other actors. The graph is
+        stored compactly: the cells reachable in one move from cell i are
+        targets[offsets[i]:offsets[i + 1]].
+
+        Args:
+            character (Character): The character to get the graph for
+
+        Returns:
+            (array, array): The offsets and targets arrays
+        """
+        kind = character.type if isinstance(character, Adversary) else "player"
+        if kind not in self.move_graphs:
+            steps = ADVERSARY_STEPS if isinstance(character, Adversary) else PLAYER_STEPS
+            walkable = self.get_walkable(character)
+            offsets = array('I', [0])
+            targets = array('I')
+            for index in range(len(self.cells)):
+                x_pos, y_pos = divmod(index, self.width)
+                for step in steps:
+                    target = self.get_index(x_pos + step[0], y_pos + step[1])
+                    if target is not None and walkable[target]:
+                        targets.append(target)
+                offsets.append(len(targets))
+            self.move_graphs[kind] = (offsets, targets)
+        return self.move_graphs[kind]
+
+    def get_moves(self, character):
+        """
+        Get the cells a character could reach in one move if no other actor were in the way.
+
+        Args:
+            character (Character): The character to get the moves for
+
+        Returns:
+            (array): The reachable cell indices
+        """
+        if character.x_pos is None or character.y_pos is None:
+            return array('I')
+        index = self.get_index(character.x_pos, character.y_pos)
+        if index is None:
+            return array('I')
+        offsets, targets = self.get_move_graph(character)
+        return targets[offsets[index]:offsets[index + 1]]
+
+    def encode_tile(self, tile):
+        """
+        Encode a Tile's attributes as CELL_* flags.
+
+        Args:
+            tile (Tile): The tile to encode
+
+        Returns:
+            (int): The cell flags
+        """
+        flags = CELL_TILE
+        if tile.border:
+            flags |= CELL_BORDER
+        if tile.exit:
+            flags |= CELL_EXIT
+        if tile.key:
+            flags |= CELL_KEY
+        if tile.level_exit:
+            flags |= CELL_LEVEL_EXIT
+        if tile.in_room:
+            flags |= CELL_IN_ROOM
+        if tile.in_hallway:
+            flags |= CELL_IN_HALLWAY
+        return flags
+
     def add_room(self, x_pos, y_pos, room):
         """
         Adds a room to the level if it does not overlap with any other rooms/hallways.
@@ -143,14 +587,21 @@ class Level:
         if room.length < 3 or room.width < 3:
             return False
         
-        new_tiles = copy.deepcopy(self.tiles)
+        # Checking that the room does not overlap anything already in the level
+        for i in range(room.length):
+            row = (x_pos + i) * self.width + y_pos
+            if any(self.cells[row:row + room.width]):
+                return False
+
+        room_id = len(self.rooms) + 1
+        room_cells = RoomCells(room.length, room.width, x_pos, y_pos)
         for i in range(room.length):
             for j in range(room.width):
-                if isinstance(new_tiles[x_pos + i][y_pos + j], Tile):
-                    return False
-                new_tiles[x_pos + i][y_pos + j] = room.tiles[i][j]
-                room.tiles[i][j].x_pos = x_pos + i
-                room.tiles[i][j].y_pos = y_pos + j
+                index = (x_pos + i) * self.width + y_pos + j
+                self.cells[index] = room_cells.cells[i * room.width + j] = self.encode_tile(room.tiles[i][j])
+                self.room_ids[index] = room_id
+        # Keep the room's tiles as compact flags, rather than a Tile object per cell
+        room.tiles = TileGrid(room_cells)
 
         if x_pos < self.start[0] and y_pos < self.start[1]:
             self.start = (x_pos + 1, y_pos + 1)
@@ -158,14 +609,30 @@ class Level:
         if x_pos + room.length > self.adversary_start[0] and y_pos + room.width > self.adversary_start[1]:
             self.adversary_start = (x_pos + room.length - 2, y_pos + room.width - 2)
 
-        self.tiles = copy.deepcopy(new_tiles)
         room.origin_x = x_pos
         room.origin_y = y_pos
         self.rooms.append(room)
+        self.layout_changed()
         
 
         return True
 
+    def room_at(self, x_pos, y_pos):
+        """
+        Get the room that contains a coordinate.
+
+        Args:
+            x_pos (int): The x-coordinate
+            y_pos (int): The y-coordinate
+
+        Returns:
+            (Room): The room, or None if the coordinate is not inside a room
+        """
+        index = self.get_index(x_pos, y_pos)
+        if index is None or not self.room_ids[index]:
+            return None
+        return self.rooms[self.room_ids[index] - 1]
+
     def add_hallway(self, entrance_x, entrance_y, end_x, end_y, waypoints, room1, room2):
         """
         Add a hallway that connects two rooms.
@@ -182,61 +649,61 @@ class Level:
         Returns:
             bool: Whether the hallway was added
         """
-        new_tiles = copy.deepcopy(self.tiles)
+        new_cells = CellChanges(self)
         # Checking for out of bounds entrances and exits
-        if entrance_x > self.length or entrance_y > self.width:
+        entrance = self.get_index(entrance_x, entrance_y)
+        end = self.get_index(end_x, end_y)
+        if entrance is None or end is None:
             return False
         # Checking whether or not the entrance and exit is a tile
-        if not isinstance(new_tiles[entrance_x][entrance_y], Tile) or not isinstance(new_tiles[end_x][end_y], Tile):
+        if not new_cells[entrance] & CELL_TILE or not new_cells[end] & CELL_TILE:
             return False
         
         # Changing entrance/end tiles to no longer be border tiles and to be exit tiles
-        new_tiles[entrance_x][entrance_y].border = False
-        new_tiles[entrance_x][entrance_y].exit = True
-        new_tiles[end_x][end_y].border = False
-        new_tiles[end_x][end_y].exit = True
+        new_cells[entrance] = (new_cells[entrance] & ~CELL_BORDER) | CELL_EXIT
+        new_cells[end] = (new_cells[end] & ~CELL_BORDER) | CELL_EXIT
 
         curr_x = entrance_x
         curr_y = entrance_y
-        hallway = Hallway([], waypoints, room1, room2)
+        hallway_cells = []
         for w in waypoints:
-            try:
-                move = self.travel(new_tiles, curr_x, curr_y, w[0], w[1])
-                for t in move[1]:
-                    hallway.tiles.append(t)
-                new_tiles = move[0]
-                curr_x = w[0]
-                curr_y = w[1]
-            except:
+            move = self.travel(new_cells, curr_x, curr_y, w[0], w[1])
+            if not move:
                 return False
-            if isinstance(new_tiles[w[0]][w[1]], Tile):
+            hallway_cells.extend(move[1])
+            curr_x = w[0]
+            curr_y = w[1]
+            waypoint = self.get_index(w[0], w[1])
+            if waypoint is None or new_cells[waypoint] & CELL_TILE:
                 return False
-            else:
-                new_tile = Tile(w[0], w[1], False, False, False, False)
-                new_tile.in_hallway = True
-                new_tiles[w[0]][w[1]] = new_tile
-                hallway.tiles.append(new_tile)
+            new_cells[waypoint] = CELL_TILE | CELL_IN_HALLWAY
+            hallway_cells.append(waypoint)
         
-        try:
-            move = self.travel(new_tiles, curr_x, curr_y, end_x, end_y)
-            for t in move[1]:
-                hallway.tiles.append(t)
-            self.tiles = move[0]
-        except:
+        move = self.travel(new_cells, curr_x, curr_y, end_x, end_y)
+        if not move:
             return False
+        hallway_cells.extend(move[1])
+
+        new_cells.commit()
+        self.layout_changed()
+        hallway = Hallway([TileView(self, index) for index in hallway_cells], waypoints, room1, room2)
         self.hallways.append(hallway)
         return True
 
-    def travel(self, new_tiles, entrance_x, entrance_y, end_x, end_y):
+    def travel(self, new_cells, entrance_x, entrance_y, end_x, end_y):
         """
         Creates hallway between rooms and/or waypoints.
 
         Args:
-            new_tiles ([[Tile]]): Current level state
+            new_cells (CellChanges): Staged edits to write the hallway into
             entrance_x (int): The x-coordinate of the starting point
             entrance_y (int): The y-coordinate of the starting point
             end_x (int): The x-coordinate of the end point
             end_y (int): The y-coordinate of the end point
+
+        Returns:
+            (CellChanges, [int]): The staged edits and the indices of the new hallway cells,
+            or False if the hallway cannot be built
         """
         x_distance = end_x - entrance_x
         x_direction = "up" if x_distance > 0 else "down"
@@ -255,33 +722,31 @@ class Level:
         curr_x = entrance_x
         curr_y = entrance_y
 
-        hallway_tiles = []
+        hallway_cells = []
 
         for i in range(abs(y_distance) - 1):
             if y_direction == "left":
                 curr_y -= 1
             if y_direction == "right":
                 curr_y += 1
-            if isinstance(new_tiles[curr_x][curr_y], Tile):
+            index = self.get_index(curr_x, curr_y)
+            if index is None or new_cells[index] & CELL_TILE:
                 return False
-            hallway_tile = Tile(curr_x, curr_y, False, False, False, False)
-            hallway_tile.in_hallway = True
-            hallway_tiles.append(hallway_tile)
-            new_tiles[curr_x][curr_y] = hallway_tile
+            new_cells[index] = CELL_TILE | CELL_IN_HALLWAY
+            hallway_cells.append(index)
 
         for i in range(abs(x_distance) - 1):
             if x_direction == "down":
                 curr_x -= 1
             if x_direction == "up":
                 curr_x += 1
-            if isinstance(new_tiles[curr_x][curr_y], Tile):
+            index = self.get_index(curr_x, curr_y)
+            if index is None or new_cells[index] & CELL_TILE:
                 return False
-            hallway_tile = Tile(curr_x, curr_y, False, False, False, False)
-            hallway_tile.in_hallway = True
-            hallway_tiles.append(hallway_tile)
-            new_tiles[curr_x][curr_y] = hallway_tile
+            new_cells[index] = CELL_TILE | CELL_IN_HALLWAY
+            hallway_cells.append(index)
         
-        return (new_tiles, hallway_tiles)
+        return (new_cells, hallway_cells)
 
     def set_key(self, x_pos, y_pos):
         """
@@ -291,15 +756,15 @@ class Level:
             x_pos (int): The x-coordinate of the key
             y_pos (int): They y-coordinate of the key
         """
-        # Checking that the coordinates are in bounds
-        if x_pos > self.length - 1 or y_pos > self.width - 1:
-            return False
-        elif isinstance(self.tiles[x_pos][y_pos], Tile) and not self.tiles[x_pos][y_pos].in_hallway:
-            if self.tiles[x_pos][y_pos].border or self.tiles[x_pos][y_pos].exit:
+        cell = self.get_cell(x_pos, y_pos)
+        # Checking that the coordinates are in bounds and not in a hallway
+        if cell & CELL_TILE and not cell & CELL_IN_HALLWAY:
+            if cell & (CELL_BORDER | CELL_EXIT):
                 return False
             else:
-                self.tiles[x_pos][y_pos].key = True
-                self.key = self.tiles[x_pos][y_pos]
+                index = self.get_index(x_pos, y_pos)
+                self.cells[index] |= CELL_KEY
+                self.key = TileView(self, index)
                 return True
         else:
             return False
@@ -312,24 +777,185 @@ class Level:
             x_pos (int): The x-coordinate of the level exit
             y_pos (int): The y-coordinate of the level exit
         """
-        # Checking that the coordinates are in bounds
-        if x_pos > self.length - 1 or y_pos > self.width - 1:
-            return False
-        elif isinstance(self.tiles[x_pos][y_pos], Tile) and not self.tiles[x_pos][y_pos].in_hallway:
-            if self.tiles[x_pos][y_pos].border:
+        cell = self.get_cell(x_pos, y_pos)
+        # Checking that the coordinates are in bounds and not in a hallway
+        if cell & CELL_TILE and not cell & CELL_IN_HALLWAY:
+            if cell & CELL_BORDER:
                 return False
-            elif self.tiles[x_pos][y_pos].exit:
+            elif cell & CELL_EXIT:
                 return False
             else:
-                self.tiles[x_pos][y_pos].level_exit = True
-                self.level_exit = self.tiles[x_pos][y_pos] 
+                index = self.get_index(x_pos, y_pos)
+                self.cells[index] |= CELL_LEVEL_EXIT
+                self.level_exit = TileView(self, index)
                 return True
         else:
             return False
 
+    def get_open_cells(self):
+        """
+        Get the pool of walkable room cells that no adversary is standing on, building it if
+        the level's layout changed since it was last used.
+
+        Returns:
+            ([int]): The cell indices in the pool
+        """
+        if self.open_cells is None:
+            self.open_cells = []
+            self.open_slots = {}
+            for index, cell in enumerate(self.cells):
+                if cell & CELL_IN_ROOM and not cell & CELL_BORDER and index not in self.adversary_at:
+                    self.open_slots[index] = len(self.open_cells)
+                    self.open_cells.append(index)
+        return self.open_cells
+
+    def open_cell(self, index):
+        """
+        Return a cell to the open pool if it is a walkable room cell.
+
+        Args:
+            index (int): The cell index
+        """
+        cell = self.cells[index]
+        if self.open_cells is not None and index not in self.open_slots:
+            if cell & CELL_IN_ROOM and not cell & CELL_BORDER:
+                self.open_slots[index] = len(self.open_cells)
+                self.open_cells.append(index)
+
+    def close_cell(self, index):
+        """
+        Take a cell out of the open pool.
+
+        Args:
+            index (int): The cell index
+        """
+        if self.open_cells is not None and index in self.open_slots:
+            # Swap the last cell into the removed slot so removal is constant time
+            slot = self.open_slots.pop(index)
+            last = self.open_cells.pop()
+            if last != index:
+                self.open_cells[slot] = last
+                self.open_slots[last] = slot
+
+    def random_open_cell(self):
+        """
+        Pick a random cell from the open pool.
+
+        Returns:
+            (int): The cell index, or None if every room cell is taken
+        """
+        open_cells = self.get_open_cells()
+        if not open_cells:
+            return None
+        return open_cells[self.random.randrange(len(open_cells))]
+
+    def get_random_starting_position(self):
+        """
+        Pick a random starting position for a traversable tile in a room.
+        The tile cannot be occupied by another actor or object.
+
+        Returns:
+            (int, int): The starting position, or None if there is no free tile
+        """
+        open_cells = self.get_open_cells()
+        # Only a handful of open cells hold a player or an object, so sampling almost always succeeds
+        for i in range(len(open_cells)):
+            index = open_cells[self.random.randrange(len(open_cells))]
+            if self.is_free_start(index):
+                return divmod(index, self.width)
+
+        free_cells = [index for index in open_cells if self.is_free_start(index)]
+        if free_cells:
+            return divmod(self.random.choice(free_cells), self.width)
+        return None
+
+    def is_free_start(self, index):
+        """
+        Whether a cell is free to start an actor on, i.e. it holds no actor, key or level exit.
+
+        Args:
+            index (int): The cell index
+
+        Returns:
+            (bool): Whether the cell is free
+        """
+        if index in self.player_at or index in self.adversary_at:
+            return False
+        return not self.cells[index] & (CELL_KEY | CELL_LEVEL_EXIT)
+
+    def take_changed_cells(self):
+        """
+        Gets the cells whose actors or objects changed since the last call, and starts tracking
+        changes afresh.
+
+        Returns:
+            set(int): The indices of the changed cells.
+        """
+        changed_cells = self.changed_cells
+        self.changed_cells = set()
+        return changed_cells
+
+    def get_characters(self, index):
+        """
+        Get the characters standing on a cell, players first.
+
+        Args:
+            index (int): The cell index
+
+        Returns:
+            ([Character]): The characters on the cell
+        """
+        characters = []
+        if index in self.player_at:
+            characters.append(self.player_at[index])
+        if index in self.adversary_at:
+            characters.append(self.adversary_at[index])
+        return characters
+
+    def add_occupant(self, character, index):
+        """
+        Move a character onto a cell, taking it off its previous cell.
+
+        Args:
+            character (Character): The character to move
+            index (int): The destination cell index
+        """
+        if self.positions.get(character) == index:
+            return
+        self.remove_occupant(character)
+        self.changed_cells.add(index)
+        if isinstance(character, Adversary):
+            self.adversary_at[index] = character
+            self.close_cell(index)
+        else:
+            self.player_at[index] = character
+        self.positions[character] = index
+        character.x_pos, character.y_pos = divmod(index, self.width)
+
+    def remove_occupant(self, character):
+        """
+        Take a character off the cell it is standing on in this level, if any.
+        The character keeps its last coordinates.
+
+        Args:
+            character (Character): The character to remove
+        """
+        index = self.positions.pop(character, None)
+        if index is None:
+            return
+        self.changed_cells.add(index)
+        if isinstance(character, Adversary):
+            if self.adversary_at.get(index) is character:
+                del self.adversary_at[index]
+                self.open_cell(index)
+        elif self.player_at.get(index) is character:
+            del self.player_at[index]
+
     def place_adversary(self, character, x_pos, y_pos):
         """
         Place the Adversary at the x and y pos of the Level.
+        An adversary moving onto a border tile is a Ghost going through a wall, and is
+        transported to a random walkable room tile instead.
 
         Args:
             x_pos (int): The x-coordinate
@@ -338,45 +964,26 @@ class Level:
         Return:
             (bool): If the placement was successful
         """
-        try:
-            curr = self.tiles[x_pos][y_pos]
-            if isinstance(curr, Tile):
-                if not curr.border:
-                    # Not border tile, we are a Zombie
-                    for c in curr.characters:
-                        if isinstance(c, Player) and c not in self.players_exited:
-                            self.eliminate_interaction(c)
-                        if isinstance(c, Adversary) and c.id != character.id:
-                            return False
-                    if character.x_pos and character.y_pos and self.tiles[character.x_pos][character.y_pos].characters:
-                        self.tiles[character.x_pos][character.y_pos].characters.remove(character)
-                    character.x_pos = x_pos
-                    character.y_pos = y_pos
-                    curr.characters.append(character)
-                else:
-                    # Border tile, we are a Ghost
-                    # Picking a random tile within a random room
-                    for i in range(self.length):
-                        for j in range(self.width):
-                            rand_x_pos = random.randint(0, self.length - 1)
-                            rand_y_pos = random.randint(0, self.width - 1)
-                            dst_tile = self.tiles[rand_x_pos][rand_y_pos]
-                            if isinstance(dst_tile, Tile) and dst_tile.in_room and not dst_tile.border:
-                                for c in dst_tile.characters:
-                                    if isinstance(c, Player):
-                                        self.eliminate_interaction(c)
-                                    if isinstance(c, Adversary) and c.id != character.id:
-                                        return False
-                                if character.x_pos and character.y_pos and self.tiles[character.x_pos][character.y_pos].characters:
-                                    self.tiles[character.x_pos][character.y_pos].characters.remove(character)
-                                character.x_pos = x_pos
-                                character.y_pos = y_pos
-                                dst_tile.characters.append(character)
-                return True
-            else:
+        index = self.get_index(x_pos, y_pos)
+        if index is None or not self.cells[index] & CELL_TILE:
+            return False
+
+        if self.cells[index] & CELL_BORDER:
+            # Border tile, we are a Ghost
+            # Picking a random tile within a random room
+            index = self.random_open_cell()
+            if index is None:
                 return False
-        except IndexError as e:
+
+        adversary = self.adversary_at.get(index)
+        if adversary and adversary.id != character.id:
             return False
+        player = self.player_at.get(index)
+        if player and player not in self.players_exited:
+            self.eliminate_interaction(player)
+
+        self.add_occupant(character, index)
+        return True
 
     def place_player(self, character, x_pos, y_pos):
         """
@@ -391,33 +998,25 @@ class Level:
         """
         self.interaction_log = ""
 
-        try:
-            curr = self.tiles[x_pos][y_pos]
-            if isinstance(curr, Tile) and not curr.border:
-                for c in curr.characters:
-                    if isinstance(c, Adversary):
-                        self.eliminate_interaction(character)
-                        return False
-                    if isinstance(c, Player) and c.id != character.id:
-                        return False
-                if curr.key:
-                    self.key_interaction(character)
-                    curr.key = False
-                if curr.level_exit:
-                    self.exit_interaction(character)               
-                if character.x_pos and character.y_pos and self.tiles[character.x_pos][character.y_pos].characters:
-                    if character in self.tiles[character.x_pos][character.y_pos].characters:
-                        self.tiles[character.x_pos][character.y_pos].characters.remove(character)
-                character.x_pos = x_pos
-                character.y_pos = y_pos
-                curr.characters.append(character)
-                return True
-            else:
-                return False
-        except IndexError as e:
-            print(e)
+        index = self.get_index(x_pos, y_pos)
+        if index is None or not self.cells[index] & CELL_TILE or self.cells[index] & CELL_BORDER:
             return False
 
+        if index in self.adversary_at:
+            self.eliminate_interaction(character)
+            return False
+        player = self.player_at.get(index)
+        if player and player.id != character.id:
+            return False
+
+        if self.cells[index] & CELL_KEY:
+            self.key_interaction(character)
+            self.cells[index] &= ~CELL_KEY
+        if self.cells[index] & CELL_LEVEL_EXIT:
+            self.exit_interaction(character)
+        self.add_occupant(character, index)
+        return True
+
     def key_interaction(self, player):
         """ Key interaction when a Player walks on a tile with a key.
 
@@ -425,6 +1024,8 @@ class Level:
             player (Player): The player who found the key.
         """
         self.exit_unlocked = True
+        if self.key:
+            self.changed_cells.add(self.key.index)
         self.interaction_log = str(str(player.id) + " found the key")
         player.keys += 1
         self.end_level_message["key"] = player.id
@@ -445,10 +1046,7 @@ class Level:
             character.exited = True
             self.end_level_message["exits"].append(character.id)
 
-            # Remove player from tile
-            # self.tiles[character.x_pos][character.y_pos].characters = []
-            # character.x_pos = None
-            # character.y_pos = None
+            # The player stays on the exit tile, and adversaries no longer eliminate them
 
     def eliminate_interaction(self, character):
         """
@@ -471,11 +1069,8 @@ class Level:
         Args:
             character (Character): The Character to be removed
         """
-        x_coord = character.x_pos
-        y_coord = character.y_pos
-        curr = self.tiles[x_coord][y_coord]
         character.active = False
-        curr.characters = []
+        self.remove_occupant(character)
 
     def get_start(self):
         """ 
@@ -495,6 +1090,42 @@ class Level:
         """
         return (self.adversary_start[0], self.adversary_start[1])
 
+    def render_cell(self, index):
+        """ Get the ASCII representation of a single cell.
+
+        Args:
+            index (int): The cell index
+
+        Returns:
+            (str): The character for the cell
+        """
+        player = self.player_at.get(index)
+        if player:
+            if player.turn_id:
+                return str(player.turn_id)
+            return 'P'
+        adversary = self.adversary_at.get(index)
+        if adversary:
+            if adversary.type == Type.ZOMBIE:
+                return 'Z'
+            elif adversary.type == Type.GHOST:
+                return 'G'
+            return ''
+
+        cell = self.cells[index]
+        if not cell & CELL_TILE:
+            # Not a tile, so we can just print some representation
+            return 'X'
+        elif cell & CELL_LEVEL_EXIT:
+            return 'o'
+        elif cell & CELL_EXIT:
+            return '/'
+        elif cell & CELL_BORDER:
+            return 'X'
+        elif cell & CELL_KEY:
+            return '+'
+        return '.'
+
     def print_level(self):
         """ Get ASCII representation of the level
 
@@ -503,35 +1134,8 @@ class Level:
         """
         layout = []
         for i in range (self.length):
-            row = ''
-            for j in range (self.width):
-                try:
-                    this_tile = self.tiles[i][j]
-                    if this_tile.characters:
-                        if isinstance(this_tile.characters[0], Player):
-                            if this_tile.characters[0].turn_id:
-                                row += str(this_tile.characters[0].turn_id)
-                            else:
-                                row += 'P'
-                        elif isinstance(this_tile.characters[0], Adversary):
-                            if this_tile.characters[0].type == Type.ZOMBIE:
-                                row += 'Z'
-                            elif this_tile.characters[0].type == Type.GHOST:
-                                row += 'G'
-                    elif this_tile.level_exit:
-                        row += 'o'
-                    elif this_tile.exit:
-                        row += '/'
-                    elif this_tile.border:
-                        row += 'X'
-                    elif this_tile.key:
-                        row += '+'
-                    else:
-                        row += '.'
-                except AttributeError as e:
-                    # Not a tile, so we can just print some representation
-                    row += "X"
-            layout.append(row)
+            row = i * self.width
+            layout.append(''.join([self.render_cell(index) for index in range(row, row + self.width)]))
 
         return layout
 
@@ -547,51 +1151,13 @@ class Level:
         # Get position information and boundaries of view
         x_pos = player.x_pos
         y_pos = player.y_pos
-        x_bounds = (x_pos - 2, x_pos + 2)
-        y_bounds = (y_pos - 2, y_pos + 2)
-
-        # Check for invalid bounds, and redetermine the bounds
-        if (x_bounds[0] < 0):
-            x_bounds = (0, x_bounds[1])
-        if (y_bounds[0] < 0):
-            y_bounds = (0, y_bounds[1])
-        
-        if (x_bounds[1] > self.length - 1):
-            x_bounds = (x_bounds[0], self.length - 1)
-        if (y_bounds[1] > self.width - 1):
-            y_bounds = (y_bounds[0], self.width - 1)
+        x_bounds = (max(x_pos - 2, 0), min(x_pos + 2, self.length - 1))
+        y_bounds = (max(y_pos - 2, 0), min(y_pos + 2, self.width - 1))
 
         layout = []
         for i in range (x_bounds[0], x_bounds[1] + 1):
-            row = ''
-            for j in range (y_bounds[0], y_bounds[1] + 1):
-                try:
-                    this_tile = self.tiles[i][j]
-                    if this_tile.characters:
-                        if isinstance(this_tile.characters[0], Player):
-                            if this_tile.characters[0].turn_id:
-                                row += str(this_tile.characters[0].turn_id)
-                            else:
-                                row += 'P'
-                        elif isinstance(this_tile.characters[0], Adversary):
-                            if this_tile.characters[0].type == Type.ZOMBIE:
-                                row += 'Z'
-                            elif this_tile.characters[0].type == Type.GHOST:
-                                row += 'G'
-                    elif this_tile.level_exit:
-                        row += 'o'
-                    elif this_tile.exit:
-                        row += '/'
-                    elif this_tile.border:
-                        row += 'X'
-                    elif this_tile.key:
-                        row += '+'
-                    else:
-                        row += '.'
-                except AttributeError as e:
-                    # Not a tile, so we can just print some representation
-                    row += "X"
-            layout.append(row)
+            row = i * self.width
+            layout.append(''.join([self.render_cell(row + j) for j in range(y_bounds[0], y_bounds[1] + 1)]))
 
         return layout
 
@@ -611,51 +1177,41 @@ class Level:
         # Get position information and boundaries of view
         x_pos = player.x_pos
         y_pos = player.y_pos
-        x_bounds = (x_pos - 2, x_pos + 2)
-        y_bounds = (y_pos - 2, y_pos + 2)
 
         tile_layout = []
         actor_position_list = []
         object_list = []
-        actor_type = None
-        actor_name = None
-        actor_posn = None
         
-        for i in range (x_bounds[0], x_bounds[1] + 1):
+        for i in range (x_pos - 2, x_pos + 3):
             row = []
-            for j in range (y_bounds[0], y_bounds[1] + 1):
-                try:
-                    this_tile = self.tiles[i][j]
-                    if this_tile.characters:
-                        if isinstance(this_tile.characters[0], Player) and player.id != this_tile.characters[0].id:
-                            actor_type = "player"
-                            actor_name = this_tile.characters[0].id
-                            actor_posn = (this_tile.x_pos, this_tile.y_pos)
-                            actor_position_list.append({"type": actor_type, "name": actor_name, "position": actor_posn})
-                        elif player.id != this_tile.characters[0].id:
-                            actor_type = ""
-                            if player.type == Type.ZOMBIE:
-                                actor_type = "zombie"
-                            elif player.type == Type.GHOST:
-                                actor_type = "ghost"
-                            actor_name = this_tile.characters[0].id
-                            actor_posn = (this_tile.x_pos, this_tile.y_pos)
-                            actor_position_list.append({"type": actor_type, "name": actor_name, "position": actor_posn})
-                    if this_tile.exit:
-                        row.append(2)
-                    elif this_tile.border:
-                        row.append(0)
-                    elif this_tile.key and not self.exit_unlocked:
-                        object_list.append({"type": "key", "position": [this_tile.x_pos, this_tile.y_pos]})
-                        row.append(1)
-                    elif this_tile.level_exit:
-                        object_list.append({"type": "exit", "position": [this_tile.x_pos, this_tile.y_pos]})
-                        row.append(1)
-                    else:
-                        row.append(1)
-                except AttributeError as e:
+            for j in range (y_pos - 2, y_pos + 3):
+                index = self.get_index(i, j)
+                if index is None or not self.cells[index] & CELL_TILE:
                     # It's a void tile or out of bounds, so we append a 0.
                     row.append(0)
+                    continue
+
+                other_player = self.player_at.get(index)
+                if other_player and other_player.id != player.id:
+                    actor_position_list.append({"type": "player", "name": other_player.id, "position": (i, j)})
+                adversary = self.adversary_at.get(index)
+                if adversary and adversary.id != player.id:
+                    actor_type = "ghost" if adversary.type == Type.GHOST else "zombie"
+                    actor_position_list.append({"type": actor_type, "name": adversary.id, "position": (i, j)})
+
+                cell = self.cells[index]
+                if cell & CELL_EXIT:
+                    row.append(2)
+                elif cell & CELL_BORDER:
+                    row.append(0)
+                elif cell & CELL_KEY and not self.exit_unlocked:
+                    object_list.append({"type": "key", "position": [i, j]})
+                    row.append(1)
+                elif cell & CELL_LEVEL_EXIT:
+                    object_list.append({"type": "exit", "position": [i, j]})
+                    row.append(1)
+                else:
+                    row.append(1)
             tile_layout.append(row)
 
-        return (tile_layout, actor_position_list, object_list)
\ No newline at end of file
+        return (tile_layout, actor_position_list, object_list)
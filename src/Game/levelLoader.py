@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+import json
+from level import *
+
+
+def init_tiles(room, layout):
+    """
+    Initializes the tiles for the room.
+
+    Args:
+        room (Room): The room to initialize tiles for.
+        layout ([JSON]): The layout for the room.
+    """
+    for i in range(room.length):
+        for j in range(room.width):
+            tile_type = layout[i][j]
+            if tile_type == 0:
+                new_tile = Tile(i, j, True, False, False, False)
+                new_tile.in_room = True
+                room.tiles[i][j] = new_tile
+            elif tile_type == 1:
+                new_tile = Tile(i, j, False, False, False, False)
+                new_tile.in_room = True
+                room.tiles[i][j] = new_tile
+            else:
+                new_tile = Tile(i, j, False, True, False, False)
+                new_tile.in_room = True
+                room.tiles[i][j] = new_tile
+
+
+def add_rooms(level, rooms):
+    """
+    Adds the JSON input of rooms to the instantiated level.
+
+    Args:
+        level (Level): The instantiated level.
+        rooms ([JSON]): The JSON input of rooms.
+    """
+    for room in rooms:
+        origin = room["origin"]
+        bounds = room["bounds"]
+        layout = room["layout"]
+        new_room = Room(bounds["rows"], bounds["columns"])
+        init_tiles(new_room, layout)
+        level.add_room(origin[0], origin[1], new_room)
+
+
+def add_hallways(level, hallways):
+    """
+    Adds hallways to the level.
+
+    Args:
+        level (Level): The level to add hallways to.
+        hallways ([JSON]): The JSON input of hallways.
+    """
+    for hallway in hallways:
+        from_ = hallway["from"]
+        to = hallway["to"]
+        waypoints = hallway["waypoints"]
+        waypoints_t = []
+        for w in waypoints:
+            waypoints_t.append((w[0], w[1]))
+        room1 = level.room_at(from_[0], from_[1])
+        room2 = level.room_at(to[0], to[1])
+        level.add_hallway(from_[0], from_[1], to[0], to[1], waypoints_t, room1, room2)
+
+
+def build_level(json_level):
+    """
+    Creates a Level from its JSON specification, with its rooms, hallways, key and exit.
+
+    Args:
+        json_level (JSON): The level specification.
+
+    Returns:
+        Level: The new level.
+    """
+    level = Level(20, 20)
+
+    # Adding rooms and hallways to our level
+    add_rooms(level, json_level["rooms"])
+    add_hallways(level, json_level["hallways"])
+
+    # Set the key and exit for the level
+    for obj in json_level["objects"]:
+        if obj["type"] == "exit":
+            exit_pos = obj["position"]
+            level.set_level_exit(exit_pos[0], exit_pos[1])
+        elif obj["type"] == "key":
+            key_pos = obj["position"]
+            level.set_key(key_pos[0], key_pos[1])
+
+    return level
+
+
+def read_levels_file(levels_file):
+    """
+    Reads the JSON level specifications from a levels file. The file starts with the number of
+    levels on its own line, followed by the JSON levels separated by blank lines.
+
+    Args:
+        levels_file (str): The path to the levels file.
+
+    Returns:
+        [JSON]: The level specifications, in order.
+    """
+    json_levels = []
+
+    with open (levels_file, mode='r') as input_file:
+        curr_json_level = ""
+        for counter, line in enumerate(input_file.readlines()):
+            # The first line holds the number of levels, which the levels that follow already give
+            if counter == 0:
+                continue
+            if line == "\n" and counter != 1:
+                json_levels.append(curr_json_level.strip('\n'))
+                curr_json_level = ""
+            else:
+                curr_json_level += line
+
+        # Append the last JSON level to the json_levels list
+        json_levels.append(curr_json_level.strip('\n'))
+
+    # Convert str json levels into json objects
+    parsed_levels = []
+    for json_level in json_levels:
+        parsed_levels.append(json.loads(json_level))
+
+    return parsed_levels
@@ -30,23 +30,22 @@ class RuleChecker:
             return False
 
         # Checking player status and players are on walkable tiles
+        level = self.game.current_level
         for player in self.game.players:
             if player.active:
                 players_active = True
-            player_pos = (player.x_pos, player.y_pos)
-            try:
-                if self.game.current_level.tiles[player_pos[0]][player_pos[1]].border:
-                    return False
-            except:
+            if player.x_pos is None or player.y_pos is None:
+                return False
+            cell = level.get_cell(player.x_pos, player.y_pos)
+            if not cell & CELL_TILE or cell & CELL_BORDER:
                 return False
         
         # Checking adversaries are on walkable tiles
         for adversary in self.game.adversaries:
-            adversary_pos = (adversary.x_pos, adversary.y_pos)
-            try:
-                if self.game.current_level.tiles[adversary_pos[0]][adversary_pos[1]].border:
-                    return False
-            except:
+            if adversary.x_pos is None or adversary.y_pos is None:
+                return False
+            cell = level.get_cell(adversary.x_pos, adversary.y_pos)
+            if not cell & CELL_TILE or cell & CELL_BORDER:
                 return False
 
         # Checking that player status aligns with game state
@@ -78,10 +77,9 @@ class RuleChecker:
             return False
 
         # Checking that hallways and rooms do not overlap
-        for row in level.tiles:
-            for tile in row:
-                if isinstance(tile, Tile) and tile.in_room and tile.in_hallway:
-                    return False
+        for cell in level.cells:
+            if cell & CELL_IN_ROOM and cell & CELL_IN_HALLWAY:
+                return False
 
         return True
 
@@ -98,74 +96,27 @@ class RuleChecker:
         """
         curr = (character.x_pos, character.y_pos)
         abs_distance = (abs(destination[0] - curr[0]), abs(destination[1] - curr[1]))
+        level = self.game.current_level
 
-        # Check if the destination tile contains another actor:
-        # 1. Players cannot move onto other players
-        # 2. Adversaries cannot move onto other adversaries
-
-        # Check for an existing tile first
-        dst_tile = self.game.current_level.tiles[destination[0]][destination[1]]
-
-        if not isinstance(dst_tile, Tile):
+        # Check for an existing tile the character can stand on
+        index = level.get_index(destination[0], destination[1])
+        if index is None or not level.get_walkable(character)[index]:
             return False
 
         # Check if player is active
         if not character.active:
             return False
 
-        # Check if destination for the player or character is valid by Snarl rules
-        if isinstance(character, Player):
-            # Check if the destination tile contains another actor:
-            # 1. Players cannot move onto other players
-            if dst_tile.characters:
-                for c in dst_tile.characters:
-                    if isinstance(c, Player) and c.id != character.id:
-                        return False
-
-            if abs_distance[0] == 0 and abs_distance[1] == 0 and not dst_tile.border:
-                pass
-            elif abs_distance[0] + abs_distance[1] <= 2 and not dst_tile.border:
-                pass
-            else:
-                return False
-        elif isinstance(character, Adversary):
-            # Check if the destination tile contains another actor:
-            # 2. Adversaries cannot move onto other adversaries
-            if dst_tile.characters:
-                for c in dst_tile.characters:
-                    if isinstance(c, Adversary) and c.id != character.id:
-                        return False
-            if abs_distance[0] == 0 and abs_distance[1] == 0:
-                pass
-            elif abs_distance[0] + abs_distance[1] <= 1:
-                pass
-            else:
-                return False
-
-        # Check if the destination tile is traversable only for non ghosts
+        # Check if the destination tile contains another actor:
+        # 1. Players cannot move onto other players
+        # 2. Adversaries cannot move onto other adversaries
         if isinstance(character, Adversary):
-            if character.type == Type.GHOST:
-                return True
-            elif character.type == Type.ZOMBIE:
-                try:
-                    if isinstance(dst_tile, Tile):
-                        if not dst_tile.border:
-                            # For zombies, check for invalid moves into a hallway
-                            if self.game.current_level.tiles[destination[0]][destination[1]].in_hallway:
-                                return False
-                            else:
-                                return True
-                    # Not reached unless tile is a border tile
-                    return False
-                except:
-                    # Not a tile so return false
-                    return False
+            dst_adversary = level.adversary_at.get(index)
+            if dst_adversary and dst_adversary.id != character.id:
+                return False
+            return abs_distance[0] + abs_distance[1] <= 1
         else:
-            try:
-                destination_tile = self.game.current_level.tiles[destination[0]][destination[1]]
-                if isinstance(dst_tile, Tile):
-                    if not destination_tile.border:
-                        return True
+            dst_player = level.player_at.get(index)
+            if dst_player and dst_player.id != character.id:
                 return False
-            except:
-                return False
\ No newline at end of file
+            return abs_distance[0] + abs_distance[1] <= 2
@@ -1,147 +1,215 @@
 #!/usr/bin/env python3
 
-import socket
 import json
+import socket
+import asyncio
 import argparse
+from collections import deque
+from protocol import *
+from delta import *
+from bot import *
 
 
 class Client:
     def __init__(self):
         self.address = "127.0.0.1"
         self.port = 45678
-        self.conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # The server's Unix domain socket path, used instead of the address and port if given
+        self.unix_path = None
+        self.conn = None
         self.wait = 30
+        self.decoder = MessageDecoder()
+        # Messages received but not yet handled, as one read can carry several messages
+        self.messages = deque()
+        # The player's update and view, rebuilt from the deltas the server may send
+        self.view_state = ViewState()
+
+    def send(self, message):
+        """
+        Sends a message to the server.
+
+        Args:
+            message (JSON): The message, a JSON object or a string.
+        """
+        self.conn.sendall(encode_message(message))
+
+    def receive(self):
+        """
+        Receives the next message sent by the server, waiting for as long as it takes.
+
+        Returns:
+            JSON: The message.
+
+        Raises:
+            ConnectionError: If the server closed the connection.
+        """
+        while not self.messages:
+            try:
+                data = self.conn.recv(4096)
+            except socket.timeout:
+                continue
+            if not data:
+                raise ConnectionError("The server closed the connection")
+            self.messages.extend(self.decoder.feed(data))
+        return self.messages.popleft()
 
     def init_connection(self):
         # Setting up the connection to server
-        self.conn.connect((self.address, self.port))
+        if self.unix_path:
+            self.conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.conn.connect(self.unix_path)
+            print('Connected on ' + self.unix_path)
+        else:
+            self.conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.conn.connect((self.address, self.port))
+            print('Connected on ' + self.address + ':' + str(self.port))
         self.conn.settimeout(self.wait)
-        print('Connected on ' + self.address + ':' + str(self.port))
 
-        # Receiving initial requests from server here
-        init_done = False
-        while not init_done:
-            data = None
-            try:
-                data = self.conn.recv(4096)
-                decoded_data = json.loads(data.decode('utf-8'))
-                if decoded_data["type"] == "welcome":
-                    print("Welcome to the Snarl server! Waiting for players to connect...")
-            except Exception as e:
-                # Message was not a JSON, so it's probably the server requesting our name
-                # This can also be triggered if the server is not sending anything back
-                decoded_data = data.decode('utf-8')
-                print("We are requesting your player name.")
-                init_done = True
+        # Receiving initial requests from server here, until the server requests our name
+        message = self.receive()
+        while message != "name":
+            if isinstance(message, dict) and message.get("type") == "welcome":
+                print("Welcome to the Snarl server! Waiting for players to connect...")
+            message = self.receive()
+        print("We are requesting your player name.")
 
     def send_name(self):
         """
         Send the client's specified name to the server.
         """
         player_name = input("Enter your name below: \n")
-        self.conn.sendall(player_name.encode())
+        self.send(player_name)
 
         # Waiting for server to confirm player name - we'll see a start level message
-        start_level = False
-        while not start_level:
-            data = None
-            try:
-                data = self.conn.recv(4096)
-                decoded_data = json.loads(data.decode('utf-8'))
-                if decoded_data["type"] == "start-level":
-                    print("The level will start shortly.")
-                    start_level = True
-            except Exception as e:
-                # Message was not a JSON, so it's probably the server requesting our name
-                # The name we gave initially was probably not unique
-                # This can also be triggered if the server is not sending anything back
-                decoded_data = data.decode('utf-8')
+        message = self.receive()
+        while not (isinstance(message, dict) and message.get("type") == "start-level"):
+            if message == "name":
+                # The name we gave initially was not unique
                 print("Another player has taken that name, please register with a different one.")
-                start_level = True
-                self.send_name()
+                player_name = input("Enter your name below: \n")
+                self.send(player_name)
+            message = self.receive()
+        print("The level will start shortly.")
+
+    def request_move(self, valid_moves=None):
+        """
+        Asks for the player's next move and sends it to the server. Moves that are not valid are
+        asked for again without a round trip: they are checked against the valid moves if the
+        server sent them, and otherwise against the player's surroundings with the game's rules.
+
+        Args:
+            valid_moves ([(int, int)]): The player's valid moves, if the server sent them.
+        """
+        print("\nThe server is requesting your next move")
+        if valid_moves is not None:
+            print("Your valid moves are: " + ", ".join(str(move) for move in valid_moves))
+        while True:
+            player_move_x_coord = input("Enter the x_coordinate of your move below (integer format): \n")
+            player_move_y_coord = input("Enter the y_coordinate of your move below (integer format): \n")
+            try:
+                destination = (int(player_move_x_coord), int(player_move_y_coord))
+            except ValueError:
+                print("The coordinates must be integers.")
+                continue
+            if valid_moves is not None:
+                is_valid = destination in valid_moves
+            else:
+                is_valid = self.view_state.is_valid_move(destination)
+            if is_valid:
+                break
+            print("That move is not valid, please enter one of your valid moves.")
+        self.send({"type": "move", "to": list(destination)})
+
+    def print_player_update(self, player_update):
+        """
+        Prints a player update.
+
+        Args:
+            player_update (JSON): The player-update message.
+        """
+        print("\nPlayer update:")
+        if player_update["position"][0]:
+            print("Your position is: (" + str(player_update["position"][0]) + ", " + str(player_update["position"][1]) + ")")
+        if not player_update["position"][0]:
+            print("You have already left the level")
+        if player_update["message"] != "":
+            print(player_update["message"])
+
+    def print_view(self, view):
+        """
+        Prints a player view.
+
+        Args:
+            view ([str]): The rows of the view.
+        """
+        print("\n\nPlayer view:")
+        print("<===>")
+        for row in view:
+            print(row)
+        print("<===>\n\n")
 
     def enter_game(self):
         """
-        Game is starting so we enter the phase of player updates, playing rounds, 
+        Game is starting so we enter the phase of player updates, playing rounds,
         ending levels, and ending the game.
         """
-        data = b''
+        move_results = {"OK": "\nYour move was accepted.",
+                        "Key": "\nYou found the key.",
+                        "Exit": "\nYou found the exit.",
+                        "Eject": "\nYou have been ejected.",
+                        "Invalid": "\nYour move was invalid."}
 
         print("You are now entering the game.")
         while True:
-            try:
-                data += self.conn.recv(4096)
-                decoded_data = json.loads(data.decode('utf-8'))
-                if decoded_data["type"] == "player-update":
-                    print("\nPlayer update:")
-                    if decoded_data["position"][0]:
-                        print("Your position is: (" + str(decoded_data["position"][0]) + ", " + str(decoded_data["position"][1]) + ")")
-                    if not decoded_data["position"][0]:
-                        print("You have already left the level")
-                    if decoded_data["message"] != "":
-                        print(decoded_data["message"])
-                elif decoded_data["type"] == "view":
-                    print("\n\nPlayer view:")
-                    print("<===>")
-                    for row in decoded_data["view"]:
-                        print(row)
-                    print("<===>\n\n")
-                elif decoded_data["type"] == "end-level":
-                    print("\nThe level has ended. Here are the level statistics:")
-                    if decoded_data["key"]:
-                        print("Player who found the key: " + str(decoded_data["key"]))
-                    if not decoded_data["key"]:
-                        print("No player found the key")
-                    if decoded_data["exits"]:
-                        print("Players who exited the level: " + str(decoded_data["exits"]))
-                    if not decoded_data["exits"]:
-                        print("No players exited")
-                    if decoded_data["ejects"]:
-                        print("Players who were ejected from the level: " + str(decoded_data["ejects"]))
-                    if not decoded_data["ejects"]:
-                        print("No players ejected")
-                elif decoded_data["type"] == "end-game":
-                    print("\nThe game has ended. Here are the game statistics:")
-                    for player_score in decoded_data["scores"]:
-                        print("++++++++++++++++++++")
-                        print("Player: " + player_score["name"])
-                        print("Exits: " + str(player_score["exits"]))
-                        print("Ejects: " + str(player_score["ejects"]))
-                        print("Keys: " + str(player_score["keys"]))
-                        print("++++++++++++++++++++")
-                    print("\n Goodbye!")
-                    break
-                data = b'' # Reset data
-            except:
-                decoded_data = data.decode('utf-8')
-                # print("test: " + decoded_data)
-                # Check if the data was "move"
-                if decoded_data == "move":
-                    print("\nThe server is requesting your next move")
-                    player_move_x_coord = input("Enter the x_coordinate of your move below (integer format): \n")
-                    player_move_y_coord = input("Enter the y_coordinate of your move below (integer format): \n")
-                    player_move = {"type": "move", "to": [int(player_move_x_coord), int(player_move_y_coord)]}
-                    self.conn.sendall(json.dumps(player_move).encode())
-                    data = b''
-                elif decoded_data == "OK":
-                    print("\nYour move was accepted.")
-                    data = b''
-                elif decoded_data == "Key":
-                    print("\nYou found the key.")
-                    data = b''
-                elif decoded_data == "Exit":
-                    print("\nYou found the exit.")
-                    data = b''
-                elif decoded_data == "Eject":
-                    print("\nYou have been ejected.")
-                    data = b''
-                elif decoded_data == "Invalid":
-                    print("\nYour move was invalid.")
-                    data = b''
+            decoded_data = self.receive()
+            if decoded_data == "move":
+                self.request_move()
+            elif isinstance(decoded_data, dict) and decoded_data.get("type") == "move-request":
+                self.request_move(get_valid_moves(decoded_data))
+            elif isinstance(decoded_data, str) and decoded_data in move_results:
+                print(move_results[decoded_data])
+            elif not isinstance(decoded_data, dict):
+                print("Error: Client received: " + str(decoded_data))
+            elif decoded_data["type"] == "start-level":
+                print("The level will start shortly.")
+            elif decoded_data["type"] == "player-update":
+                self.view_state.apply(decoded_data)
+                self.print_player_update(decoded_data)
+            elif decoded_data["type"] == "view":
+                self.view_state.apply(decoded_data)
+                self.print_view(decoded_data["view"])
+            elif decoded_data["type"] == "player-delta":
+                if self.view_state.apply(decoded_data):
+                    self.print_player_update(self.view_state.update)
+                    self.print_view(self.view_state.view)
                 else:
-                    # Malformed JSON, going to call recv again
-                    print("Error: Client received: " + str(data.decode()))
-                    data = b''
+                    # We missed the keyframe the delta builds on, ask the server for a new one
+                    self.send({"type": "resync"})
+            elif decoded_data["type"] == "end-level":
+                print("\nThe level has ended. Here are the level statistics:")
+                if decoded_data["key"]:
+                    print("Player who found the key: " + str(decoded_data["key"]))
+                if not decoded_data["key"]:
+                    print("No player found the key")
+                if decoded_data["exits"]:
+                    print("Players who exited the level: " + str(decoded_data["exits"]))
+                if not decoded_data["exits"]:
+                    print("No players exited")
+                if decoded_data["ejects"]:
+                    print("Players who were ejected from the level: " + str(decoded_data["ejects"]))
+                if not decoded_data["ejects"]:
+                    print("No players ejected")
+            elif decoded_data["type"] == "end-game":
+                print("\nThe game has ended. Here are the game statistics:")
+                for player_score in decoded_data["scores"]:
+                    print("++++++++++++++++++++")
+                    print("Player: " + player_score["name"])
+                    print("Exits: " + str(player_score["exits"]))
+                    print("Ejects: " + str(player_score["ejects"]))
+                    print("Keys: " + str(player_score["keys"]))
+                    print("++++++++++++++++++++")
+                print("\n Goodbye!")
+                break
 
     def close_connection(self):
         """
@@ -160,6 +228,10 @@ class Client:
 
         parser.add_argument('--address', type=str, help="The IP address on which the server should listen for connections", default="127.0.0.1")
         parser.add_argument('--port', type=int, help="The port number the server will listen on", default=45678)
+        parser.add_argument('--unix', type=str, metavar='PATH', help="The Unix domain socket path of a server on the same host, used instead of the address and port.", default=None)
+        parser.add_argument('--bot', choices=sorted(POLICIES), help="Play automatically with the given policy instead of asking for moves.", default=None)
+        parser.add_argument('--bots', type=int, help="The number of bots to run at the same time in bot mode.", default=1)
+        parser.add_argument('--games', type=int, help="The number of games each bot plays in bot mode.", default=1)
 
         # Creating the args list
         args = parser.parse_args()
@@ -167,8 +239,15 @@ class Client:
 
         self.address = args.address
         self.port = args.port
+        self.unix_path = args.unix
+
+        if args.bot:
+            summary = asyncio.run(run_bots(args.bots, args.bot, self.address, self.port, args.games,
+                                           unix_path=self.unix_path))
+            print(json.dumps(summary, indent=2))
+            return
 
         self.init_connection()
         self.send_name()
 
-        self.enter_game()
\ No newline at end of file
+        self.enter_game()
@@ -1,11 +1,10 @@
 #!/usr/bin/env python3
 
+import os
 import sys
-import socket
-import json
-import time
 import math
-import random
+import time
+import asyncio
 import argparse
 
 sys.path.append('../Player')
@@ -14,236 +13,198 @@ sys.path.append('../Common')
 
 from character import *
 from level import *
+from levelLoader import *
 from game import *
 from gameManager import *
 from localPlayer import *
+from connection import *
+from delta import *
+from timerWheel import *
 
+# How many tiles players see in every direction, as in Level.get_player_view
+VIEW_RADIUS = 2
 
-class Remote:
-    def __init__(self):
+
+class Pacing:
+    def __init__(self, delay=2, round_delay=None):
         """
-        Initialize the remote server for a game of Snarl with default configurations. 
-        These fields can be modified to desired configurations.
+        How long a game waits before sending messages and before starting a round. Waiting gives
+        human players time to read their updates. With a delay of 0, messages are sent as soon as
+        they are ready, which suits bots.
+
+        Args:
+            delay (float): The seconds to wait before sending each message or batch of messages.
+            round_delay (float): The seconds to wait before each round, defaulting to the delay.
         """
-        self.levels_file = "snarl.levels"
-        self.num_clients = 4
-        self.wait = 60
-        self.observer_view = False
-        self.address = "127.0.0.1"
-        self.port = 45678
-        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.num_connections = 0
-        self.connections = []
-        self.clients = []
-        self.adversaries = []
-        self.levels = None
-        self.game = None
-        self.game_manager = None
+        self.delay = delay
+        self.round_delay = delay if round_delay is None else round_delay
+
+    async def before_message(self):
+        """
+        Waits before sending a message.
+        """
+        if self.delay > 0:
+            await asyncio.sleep(self.delay)
+
+    async def before_round(self):
+        """
+        Waits before starting a round. Even without a delay, this lets the other games on the
+        server take their turn.
+        """
+        await asyncio.sleep(max(self.round_delay, 0))
 
-    def init_tiles(self, room, layout):
+
+class Outbox:
+    FLUSH_POLICIES = ("move", "round", "time")
+
+    def __init__(self, policy="move", interval=0.1):
         """
-        Initializes the tiles for the room.
+        Buffers the messages for a game's clients, so that everything that happens within a tick
+        reaches each client in a single write. A newer player update or view replaces the one
+        still waiting to be sent, since each carries the player's whole state.
+        Messages are always flushed before a player is asked to move.
 
         Args:
-            room (Room): The room to initialize tiles for.
-            layout ([JSON]): The layout for the room.
-        """
-        for i in range(room.length):
-            for j in range(room.width):
-                tile_type = layout[i][j]
-                if tile_type == 0:
-                    new_tile = Tile(i, j, True, False, False, False)
-                    new_tile.in_room = True
-                    room.tiles[i][j] = new_tile
-                elif tile_type == 1:
-                    new_tile = Tile(i, j, False, False, False, False)
-                    new_tile.in_room = True
-                    room.tiles[i][j] = new_tile
-                else:
-                    new_tile = Tile(i, j, False, True, False, False)
-                    new_tile.in_room = True
-                    room.tiles[i][j] = new_tile
-
-    def add_rooms(self, level, rooms):
-        """
-        Adds the JSON input of rooms to the instantiated level.
+            policy (str): When buffered messages are flushed: after every "move" of a player or
+                adversary, once per "round", or when the "time" interval has passed.
+            interval (float): The seconds between flushes for the "time" policy.
+        """
+        if policy not in Outbox.FLUSH_POLICIES:
+            raise ValueError("Unknown flush policy: " + str(policy))
+        self.policy = policy
+        self.interval = interval
+        # Connection -> {key: message}, in the order the messages are to be sent
+        self.pending = {}
+        self.counter = 0
+        self.last_flush = time.monotonic()
+
+    def queue(self, conn, message, key=None):
+        """
+        Buffers a message for a connection.
 
         Args:
-            level ([type]): The instantiated level.
-            rooms ([JSON]): The JSON input of rooms.
+            conn (Connection): The connection to send to.
+            message (JSON): The message.
+            key (str): Messages with a key replace the buffered message with the same key.
         """
-        for room in rooms:
-            origin = room["origin"]
-            bounds = room["bounds"]
-            layout = room["layout"]
-            new_room = Room(bounds["rows"], bounds["columns"])
-            self.init_tiles(new_room, layout)
-            level.add_room(origin[0], origin[1], new_room)
+        messages = self.pending.setdefault(conn, {})
+        if key is None:
+            self.counter += 1
+            key = self.counter
+        else:
+            messages.pop(key, None)
+        messages[key] = message
 
-    def add_hallways(self, level, hallways):
+    def cancel(self, conn, key):
         """
-        Adds hallways to the level.
+        Drops the buffered message with the given key for a connection, if there is one.
 
         Args:
-            level (Level): The level to add hallways to.
-            hallways ([JSON]): The JSON input of hallways.
-        """
-        for hallway in hallways:
-            from_ = hallway["from"]
-            to = hallway["to"]
-            waypoints = hallway["waypoints"]
-            waypoints_t = []
-            for w in waypoints:
-                waypoints_t.append((w[0], w[1]))
-            room1 = None
-            room2 = None
-            for room in level.rooms:
-                for t in room.tiles:
-                    for a in t:
-                        if a.x_pos == from_[0] and a.y_pos == from_[1]:
-                            room1 = room
-
-            for room in level.rooms:
-                for t in room.tiles:
-                    for a in t:
-                        if a.x_pos == to[0] and a.y_pos == to[1]:
-                            room2 = room
-            level.add_hallway(from_[0], from_[1], to[0], to[1], waypoints_t, room1, room2)
+            conn (Connection): The connection.
+            key (str): The key of the message.
+        """
+        messages = self.pending.get(conn)
+        if messages is not None:
+            messages.pop(key, None)
+            if not messages:
+                del self.pending[conn]
 
-    def parse_levels_file(self):
+    def is_due(self):
         """
-        Parse the levels file to create levels for our Snarl game.
-        We will add the levels to our Game, which will then be added to our Game Manager.
-        """
-        levels_file = self.levels_file
-        num_levels = 0
-        json_levels = []
-
-        # Pulling data from snarl.levels file
-        with open (levels_file, mode='r') as input_file:
-            curr_json_level = ""
-            counter = 0
-            for line in input_file.readlines():
-                # print(line)
-                if counter == 0:
-                    num_levels = int(line.strip())
-                else:
-                    if line == "\n" and counter != 1:
-                        json_levels.append(curr_json_level.strip('\n'))
-                        curr_json_level = ""
-                    else:
-                        curr_json_level += line
-                counter += 1
-
-            # Append the last JSON level to the json_levels list
-            json_levels.append(curr_json_level.strip('\n'))
-
-            # Convert str json levels into json objects
-            parsed_levels = []
-            for json_level in json_levels:
-                parsed_levels.append(json.loads(json_level))
-
-            # Create our rooms, hallways, and level to add to the game
-            # We will start at level 0
-            starting_level = 0
-            levels = []
-            for index, json_level in enumerate(parsed_levels):
-                if index < starting_level - 1:
-                    continue
-                else:
-                    rooms = json_level["rooms"]
-                    hallways = json_level["hallways"]
-                    objects = json_level["objects"]
-                    key_pos = None
-                    exit_pos = None
-
-                    testing_level = Level(20, 20)
-
-                    # Adding rooms to our level
-                    self.add_rooms(testing_level, rooms)
-
-                    # Adding hallways to our level
-                    self.add_hallways(testing_level, hallways)
-
-                    # Set the key and exit for the level
-                    for obj in objects:
-                        if obj["type"] == "exit":
-                            exit_pos = obj["position"]
-                            testing_level.set_level_exit(exit_pos[0], exit_pos[1])
-                        elif obj["type"] == "key":
-                            key_pos = obj["position"]
-                            testing_level.set_key(key_pos[0], key_pos[1])
-
-                    levels.append(testing_level)
-
-        self.levels = levels
-
-    def init_server(self):
-        """
-        Initialize the TCP connection for clients to connect on.
-        """
-        # Listening on the server socket
-        self.server.bind((self.address, self.port))
-        self.server.settimeout(self.wait)
-        print('Server socket created on ' + self.address + ':' + str(self.port))
+        Whether the buffered updates should be flushed after a move.
 
-        # Listening for connections until all clients request or timeout
-        while self.num_connections < self.num_clients:
-            try:
-                self.server.listen()
-                conn, addr = self.server.accept()
-                print("Connected to " + addr[0] + ":" + str(addr[1]))
-                self.num_connections += 1
-                self.connections.append(conn)
-
-                # Send the server welcome message
-                welcome_message = {"type": "welcome", "info": "Olindond"}
-                conn.send(json.dumps(welcome_message).encode())
-
-            except:
-                self.close_server()
-                break
+        Returns:
+            bool: Whether to flush.
+        """
+        if self.policy == "move":
+            return True
+        if self.policy == "time":
+            return time.monotonic() - self.last_flush >= self.interval
+        return False
 
-        # Initializing the Game and the Game Manager
-        self.parse_levels_file()
-        self.game = Game([], [], self.levels)
-        self.game_manager = GameManager(self.game)
+    def is_empty(self):
+        """
+        Whether no messages are buffered.
 
-        time.sleep(1)
+        Returns:
+            bool: Whether the outbox is empty.
+        """
+        return not self.pending
 
-        # All client connections have occured, check to see if we have received the names
-        while len(self.game.players) != self.num_clients:
-            self.get_player_names(len(self.game.players))
-    
-    def get_player_names(self, num_players):
+    async def flush(self):
         """
-        Recieve player names from the client connections. Each name should be unique.
+        Sends every buffered message, with a single write per connection.
+        """
+        pending = self.pending
+        self.pending = {}
+        self.last_flush = time.monotonic()
+        for conn, messages in pending.items():
+            await conn.send_all(list(messages.values()))
 
-        Args:
-            num_players (int): The number of valid names already registered.
+
+class GameSession:
+    def __init__(self, levels, seed=None, observer_view=False, pacing=None, outbox=None,
+                 keyframe_interval=None, timer_wheel=None, turn_timeout=None, send_moves=None):
         """
-        try:
-            conn_to_listen_to = self.connections[num_players]
-            # Send the request for name
-            conn_to_listen_to.send("name".encode())
+        A single game of Snarl played by a group of client connections. Every game on a server
+        runs as its own session, so one server can host many games at the same time. Clients are
+        registered as players with add_player before the game is played.
 
-            encoded_name = conn_to_listen_to.recv(4096)
-            name = encoded_name.decode('utf-8')
-            print("Client sent for name: " + str(name))
+        Args:
+            levels ([Level]): Freshly built levels for the game.
+            seed (int): The seed for the game's randomness.
+            observer_view (bool): Whether to print the whole level after every update.
+            pacing (Pacing): How long to wait between messages, by default 2 seconds.
+            outbox (Outbox): The buffer for messages to clients, by default flushed after every move.
+            keyframe_interval (int): If given, players are sent deltas of their updates and views,
+                with a full keyframe at the start of each level and after this many deltas.
+            timer_wheel (TimerWheel): The wheel for turn deadlines, shared by every game.
+            turn_timeout (float): If given, the seconds a player has to make a move before their
+                turn is skipped.
+            send_moves (str): If given, move requests carry the player's valid moves, as a
+                "list" of positions or as a "mask" of the steps they can take.
+        """
+        self.observer_view = observer_view
+        self.pacing = pacing if pacing else Pacing()
+        self.outbox = outbox if outbox else Outbox()
+        self.keyframe_interval = keyframe_interval
+        self.timer_wheel = timer_wheel
+        self.turn_timeout = turn_timeout
+        self.turns_timed_out = 0
+        # Turn id -> move requests whose deadline elapsed before the player replied. Clients reply
+        # to every move request, so that many of the player's next replies are late and dropped
+        self.late_replies = {}
+        self.late_replies_dropped = 0
+        self.send_moves = send_moves
+        # Delta encoder of every registered player, in turn order, when sending deltas
+        self.view_encoders = []
+        # Turn ids of the players to update even if nothing changed in their view
+        self.stale_players = set()
+        self.last_interaction_log = None
+        self.updates_sent = 0
+        self.updates_skipped = 0
+        self.game = Game([], [], levels, seed)
+        self.game_manager = GameManager(self.game)
+        # Connection of every registered player, in turn order
+        self.player_connections = []
 
-            # Now we create the player avatar and append it to our list of players
-            player = Player(name)
-            accepted_player = self.game_manager.accept_player(player)
+    def add_player(self, conn, name):
+        """
+        Registers a client as a player of the game, if its name is not taken.
 
-            # Check if name is unique. If name is not unique, request another name.
-            if not accepted_player:
-                print("Player name was not accepted. Retrying...")
-                self.get_player_names(num_players)
+        Args:
+            conn (Connection): The client's connection.
+            name (str): The player name the client asked for.
 
-        except:
-            # No data received from the client connection, assume they disconnected
-            # Game will not start
-            self.close_server()
+        Returns:
+            bool: Whether the player was accepted.
+        """
+        if not self.game_manager.accept_player(Player(name)):
+            return False
+        self.player_connections.append(conn)
+        if self.keyframe_interval:
+            self.view_encoders.append(ViewEncoder(self.keyframe_interval))
+        return True
 
     def create_zombies(self, number):
         """
@@ -299,55 +260,68 @@ class Remote:
         for adversary in adversaries:
             self.game_manager.accept_adversary(adversary)
 
-    def get_random_starting_position(self, level):
+    def place_at_initial_positions(self):
         """
-        Pick a random starting position for a traversable tile in a room.
-        The tile cannot be occupied by another actor or object.
+        Place Players and Adversaries at their initial positions.
+        """
+        # Initially place the players and adversaries in random locations
+        # Must be on a traversable room tile, not on another player/adversary, and not on a key/exit
+        level = self.game.current_level
 
-        Args:
-            level (Level): The level to find a random starting position for.
+        for player in self.game.players:
+            player_starting_pos = level.get_random_starting_position()
+            if player_starting_pos:
+                level.place_player(player, player_starting_pos[0], player_starting_pos[1])
+
+        for adversary in self.game.adversaries:
+            adversary_starting_pos = level.get_random_starting_position()
+            if adversary_starting_pos:
+                level.place_adversary(adversary, adversary_starting_pos[0], adversary_starting_pos[1])
+
+    def is_level_done(self):
+        """
+        Whether the current level is over, either by a player exiting or by every player
+        having left the level.
 
         Returns:
-            (int, int): The starting position
+            bool: Whether the level is over.
         """
-        length = level.length
-        width = level.width
+        level = self.game.current_level
+        return level.level_over or len(level.players_exited) == len(self.game.players)
 
-        for i in range(length):
-            for j in range(width):
-                rand_x_pos = random.randint(0, length - 1)
-                rand_y_pos = random.randint(0, width - 1)
-                dst_tile = level.tiles[rand_x_pos][rand_y_pos]
-                if isinstance(dst_tile, Tile) and dst_tile.in_room and not dst_tile.border:
-                    if not dst_tile.level_exit and not dst_tile.key and not dst_tile.characters:
-                        return (rand_x_pos, rand_y_pos)
+    def remove_disconnected_player(self, player):
+        """
+        Takes a disconnected player out of the current level. They can no longer leave it
+        themselves, and the level only ends once every player has left it.
 
-    def place_at_initial_positions(self):
+        Args:
+            player (Player): The disconnected player.
         """
-        Place Players and Adversaries at their initial positions.
+        level = self.game.current_level
+        if player not in level.players_exited:
+            level.remove_character(player)
+            level.players_exited.append(player)
+
+    def is_abandoned(self):
         """
-        # Initially place the players and adversaries in random locations
-        # Must be on a traversable room tile, not on another player/adversary, and not on a key/exit
+        Whether every player has disconnected from the game.
 
-        for player in self.game.players:
-            player_starting_pos = self.get_random_starting_position(self.game.current_level)
-            if self.game.current_level.place_player(player, player_starting_pos[0], player_starting_pos[1]):
-                # print("Successfully placed player " + player.id)
-                pass
-            else:
-                pass
-                # print("Could not place player " + player.id)
+        Returns:
+            bool: Whether the game has no connected players left.
+        """
+        return all(conn.closed for conn in self.player_connections)
 
-        for adversary in self.game.adversaries:
-            adversary_starting_pos = self.get_random_starting_position(self.game.current_level)
-            if self.game.current_level.place_adversary(adversary, adversary_starting_pos[0], adversary_starting_pos[1]):
-                # print("Successfully placed adversary " + adversary.id)
-                pass
-            else:
-                # print("Could not place adversary " + adversary.id)
-                pass
+    async def flush(self):
+        """
+        Sends the buffered messages to the clients.
+        """
+        if not self.outbox.is_empty():
+            await self.pacing.before_message()
+            await self.outbox.flush()
+        for encoder in self.view_encoders:
+            encoder.commit()
 
-    def start_level(self):
+    async def start_level(self):
         """
         Start the level and send the level-start message.
         """
@@ -356,24 +330,64 @@ class Remote:
         current_level_num = self.game.levels.index(self.game.current_level)
         for player in self.game.players:
             name_list.append(player.id)
-        start_level = {"type": "start-level", "level": current_level_num, 
+        start_level = {"type": "start-level", "level": current_level_num,
                         "players": name_list}
-        time.sleep(2)
-        for conn in self.connections:
-            conn.send(json.dumps(start_level).encode())
-
+        for conn in self.player_connections:
+            self.outbox.queue(conn, start_level)
+        for encoder in self.view_encoders:
+            encoder.request_keyframe()
+        self.stale_players = set(player.turn_id for player in self.game.players)
+
+        self.game_manager.player_turn = self.game.players[0].turn_id
+        self.game_manager.adversary_turn = 1
         self.game_manager.start_game()
 
-    def send_player_updates(self):
+    def sees_change(self, player, changed_cells):
+        """
+        Whether any of the changed cells is within the player's view.
+
+        Args:
+            player (Player): The player.
+            changed_cells (set(int)): The indices of the changed cells.
+
+        Returns:
+            bool: Whether the player's view changed.
+        """
+        width = self.game.current_level.width
+        for index in changed_cells:
+            x_pos, y_pos = divmod(index, width)
+            if abs(x_pos - player.x_pos) <= VIEW_RADIUS and abs(y_pos - player.y_pos) <= VIEW_RADIUS:
+                return True
+        return False
+
+    async def send_player_updates(self):
         """
-        Send initial player updates to all players before starting the level.
+        Send player updates and player views to the players whose view or status changed, when
+        the outbox's flush policy says so. Every player is updated when the interaction log
+        changes, since it is part of every update.
         """
-        time.sleep(2)
+        level = self.game.current_level
+        changed_cells = level.take_changed_cells()
+        log_changed = level.interaction_log != self.last_interaction_log
+        self.last_interaction_log = level.interaction_log
+
         for index, player in enumerate(self.game.players):
-            # print("Sending player update and player view to player: " + str(index + 1))
-            tile_layout = self.game.current_level.get_tile_and_actor_lists(player)[0]
-            actor_position_list = self.game.current_level.get_tile_and_actor_lists(player)[1]
-            object_list = self.game.current_level.get_tile_and_actor_lists(player)[2]
+            conn = self.player_connections[index]
+            if conn.needs_keyframe:
+                # The client fell behind and its queued updates were dropped, send its whole state
+                conn.needs_keyframe = False
+                if self.view_encoders:
+                    self.view_encoders[index].request_keyframe()
+                self.stale_players.add(player.turn_id)
+
+            if not log_changed and player.turn_id not in self.stale_players and \
+                    not self.sees_change(player, changed_cells):
+                self.updates_skipped += 1
+                continue
+            self.updates_sent += 1
+
+            tile_layout, actor_position_list, object_list = \
+                self.game.current_level.get_tile_and_actor_lists(player)
             message = self.game.current_level.interaction_log
 
             player_update = {"type": "player-update",
@@ -383,186 +397,568 @@ class Remote:
                             "actors": actor_position_list,
                             "message": message}
 
-            # Sending the player update messages to clients
-            conn_to_send_to = self.connections[index]
-            conn_to_send_to.send(json.dumps(player_update).encode())
-
-            # Sending player view
+            # Buffering the player update and player view messages, replacing older ones
             player_view = self.game_manager.send_player_view(player)
             player_view_message = {"type": "view", "view": player_view}
-            conn_to_send_to.send(json.dumps(player_view_message).encode())
+            if self.view_encoders:
+                for key, message in self.view_encoders[index].encode(player_update, player_view_message):
+                    if message is None:
+                        self.outbox.cancel(conn, key)
+                    else:
+                        self.outbox.queue(conn, message, key)
+            else:
+                self.outbox.queue(conn, player_update, "player-update")
+                self.outbox.queue(conn, player_view_message, "view")
+
+        self.stale_players.clear()
+
+        if self.observer_view:
+            observer_view = self.game.current_level.print_level()
+            print("\n<===================>")
+            for row in observer_view:
+                print(row)
+            print("<===================>\n")
 
-            if self.observer_view:
-                observer_view = self.game.current_level.print_level()
-                print("\n<===================>")
-                for row in observer_view:
-                    print(row)
-                print("<===================>\n")
+        if self.outbox.is_due():
+            await self.flush()
 
-    def send_move_result(self, conn, result):
+    async def send_move_result(self, conn, result):
         """
-        Send the move result.
+        Send the move result, along with the updates following it.
 
         Args:
-            conn (socket): The connection of the player to send to.
+            conn (Connection): The connection of the player to send to.
 
             result (string): "OK", "Key", "Exit", "Eject", "Invalid"
         """
-        time.sleep(2)
-        conn.send(result.encode())
+        self.outbox.queue(conn, result)
+
+    def get_move_result(self, player, prev_keys, prev_exits, prev_ejects):
+        """
+        Gets the result of a player's accepted move from the change in their statistics.
+
+        Args:
+            player (Player): The player who moved.
+            prev_keys (int): The player's keys before the move.
+            prev_exits (int): The player's exits before the move.
+            prev_ejects (int): The player's ejects before the move.
+
+        Returns:
+            str: "Key", "Exit", "Eject" or "OK"
+        """
+        if player.keys > prev_keys:
+            print("Key was found by player " + str(player.turn_id))
+            return "Key"
+        elif player.exits > prev_exits:
+            print("Exit was found by player " + str(player.turn_id))
+            return "Exit"
+        elif player.ejects > prev_ejects:
+            print("Player " + str(player.turn_id) + " was expelled")
+            return "Eject"
+        else:
+            return "OK"
+
+    def get_move_request(self, player):
+        """
+        Creates the request for a player's move, carrying their valid moves if configured.
+
+        Args:
+            player (Player): The player whose turn it is.
+
+        Returns:
+            JSON: The token "move", or a move-request message with the valid moves.
+        """
+        if not self.send_moves:
+            return "move"
+        moves = self.game_manager.send_player_moves(player)
+        if self.send_moves == "mask":
+            position = [player.x_pos, player.y_pos]
+            return {"type": "move-request", "position": position, "mask": encode_move_mask(position, moves)}
+        return {"type": "move-request", "moves": [list(move) for move in moves]}
+
+    async def receive_before(self, conn, expired):
+        """
+        Receives a client's next message, unless a deadline elapses first.
+
+        Args:
+            conn (Connection): The client's connection.
+            expired (asyncio.Future): Done once the deadline has elapsed.
+
+        Returns:
+            JSON: The message, or None if the deadline elapsed or the client disconnected.
+        """
+        if not self.turn_timeout or not self.timer_wheel:
+            return await conn.receive()
+        if expired.done():
+            return None
+        receive = asyncio.ensure_future(conn.receive())
+        await asyncio.wait([receive, expired], return_when=asyncio.FIRST_COMPLETED)
+        if not receive.done():
+            receive.cancel()
+            return None
+        return receive.result()
+
+    async def receive_move(self, player, conn, expired):
+        """
+        Receives a player's next message, unless their turn's deadline elapses first. Replies to
+        earlier move requests that ran out of time are dropped, so a late move is never taken as
+        the reply to a later request.
+
+        Args:
+            player (Player): The player whose turn it is.
+            conn (Connection): The player's connection.
+            expired (asyncio.Future): Done once the turn's deadline has elapsed.
+
+        Returns:
+            JSON: The message, or None if the deadline elapsed or the player disconnected.
+        """
+        while True:
+            message = await self.receive_before(conn, expired)
+            if message is None or not self.late_replies.get(player.turn_id) or \
+                    (isinstance(message, dict) and message.get("type") == "resync"):
+                return message
+            print(player.id + " replied too late to an earlier move request, dropping their reply")
+            self.late_replies[player.turn_id] -= 1
+            self.late_replies_dropped += 1
+
+    async def play_player_turn(self, player, conn):
+        """
+        Requests moves from a player until one is accepted. The player's turn is skipped, staying
+        in place, after 3 unsuccessful moves, once the turn's deadline elapses, or if the player
+        has disconnected.
+
+        Args:
+            player (Player): The player whose turn it is.
+            conn (Connection): The player's connection.
+        """
+        prev_keys = player.keys
+        prev_exits = player.exits
+        prev_ejects = player.ejects
+
+        expired = asyncio.get_event_loop().create_future()
+        deadline = None
+        try:
+            unsuccessful_moves = 0
+            while unsuccessful_moves < 3 and not conn.closed:
+                # Send the move request, with every update the player has not seen yet
+                self.outbox.queue(conn, self.get_move_request(player))
+                await self.flush()
+                if deadline is None and self.turn_timeout and self.timer_wheel:
+                    deadline = self.timer_wheel.schedule(
+                        self.turn_timeout, lambda: expired.done() or expired.set_result(None))
+
+                # Wait for move from player
+                move = await self.receive_move(player, conn, expired)
+                while isinstance(move, dict) and move.get("type") == "resync" and self.view_encoders:
+                    # The client lost track of its view, send it a keyframe and keep waiting for its move
+                    self.view_encoders[player.turn_id - 1].request_keyframe()
+                    self.stale_players.add(player.turn_id)
+                    await self.send_player_updates()
+                    await self.flush()
+                    move = await self.receive_move(player, conn, expired)
+                if conn.closed:
+                    break
+                if move is None and expired.done():
+                    # A move that arrived as the deadline elapsed still counts. Otherwise the
+                    # player's reply to this request is still to come, and must not be played
+                    print(player.id + " did not move in time")
+                    self.turns_timed_out += 1
+                    self.late_replies[player.turn_id] = self.late_replies.get(player.turn_id, 0) + 1
+                    break
+
+                print(player.id + " is attempting to move...")
+                destination = get_move_destination(move)
+                if destination and self.game_manager.accept_movement(destination, player):
+                    print(str(player.id) + " entered a successful move")
+                    await self.send_move_result(conn, self.get_move_result(player, prev_keys, prev_exits, prev_ejects))
+                    await self.send_player_updates()
+                    return
+
+                print(str(player.id) + " did not enter a successful move, retrying")
+                unsuccessful_moves += 1
+                await self.send_move_result(conn, "Invalid")
+        finally:
+            if deadline:
+                deadline.cancel()
 
-    def play_round(self):
+        print("Player has had 3 unsuccessful moves, ran out of time or disconnected, we are skipping their turn")
+        if not self.game_manager.accept_movement((player.x_pos, player.y_pos), player):
+            self.game_manager.change_player_turn()
+        await self.send_move_result(conn, self.get_move_result(player, prev_keys, prev_exits, prev_ejects))
+        await self.send_player_updates()
+
+    async def play_round(self):
         """
-        Plays a single round for a level. Requests moves from each player and plays them.
+        Plays a single round for a level. Requests moves from each player and plays them, and then
+        moves every adversary.
         """
-        all_moved = False
+        level = self.game.current_level
 
-        time.sleep(2)
+        await self.pacing.before_round()
         print("Start of round begins")
 
-        while not all_moved:
-            if self.game.is_end_of_level() or self.game.is_end_of_game():
-                self.game.levels_completed -= 1
-                break
-            if self.game_manager.whose_turn == Turn.PLAYER:
-                successful_move = False
-
-                curr_player_turn = self.game_manager.player_turn
-                conn_to_send_to = self.connections[curr_player_turn - 1]
-                curr_player = self.game.players[curr_player_turn - 1]
-
-                move = b''
-                unsuccesful_moves = 0
-
-                while not successful_move:
-                    try:
-                        # Wait for move request - we'll only allow 3 tries per player
-                        # Skip their turn after 3 unsuccessful tries
-
-                        if unsuccesful_moves == 3:
-                            print("Player has had 3 unsuccessful moves, we are skipping their turn")
-
-                            curr_player_posn = (curr_player.x_pos, curr_player.y_pos)
-                            prev_keys = curr_player.keys
-                            prev_exits = curr_player.exits
-                            prev_ejects = curr_player.ejects
-
-                            self.game_manager.accept_movement(curr_player_posn, curr_player)
-
-                            # Sending result and player updates
-                            if curr_player.keys > prev_keys:
-                                self.send_move_result(conn_to_send_to, "Key")
-                                self.send_player_updates()
-                            elif curr_player.exits > prev_exits:
-                                self.send_move_result(conn_to_send_to, "Exit")
-                                self.send_player_updates()
-                            elif curr_player.ejects > prev_ejects:
-                                self.send_move_result(conn_to_send_to, "Eject")
-                                self.send_player_updates()
-                            else:
-                                self.send_move_result(conn_to_send_to, "OK")
-                                self.send_player_updates()
-
-                            break
-
-                        # Send the move request
-                        time.sleep(2)
-                        conn_to_send_to.send("move".encode())
-
-                        # Wait for move from player
-                        move += conn_to_send_to.recv(4096)
-                        decoded_move = json.loads(move.decode('utf-8'))
-
-                        if decoded_move["type"] == "move":
-                            posn_to_move_to = decoded_move["to"]
-                            # print("We received the requested move to " + str(posn_to_move_to[0]) + ", " + str(posn_to_move_to[1]))
-                            # Here we can start moving the player
-                            prev_keys = curr_player.keys
-                            prev_exits = curr_player.exits
-                            prev_ejects = curr_player.ejects
-                            print(curr_player.id + " is attempting to move...")
-                            if self.game_manager.accept_movement((posn_to_move_to[0], posn_to_move_to[1]), curr_player):
-                                print(str(curr_player.id) +  " entered a successful move")
-                                successful_move = True
-                                
-                                # Sending result and player updates
-                                if curr_player.keys > prev_keys:
-                                    print("Key was found by player " + str(curr_player_turn))
-                                    self.send_move_result(conn_to_send_to, "Key")
-                                    self.send_player_updates()
-                                elif curr_player.exits > prev_exits:
-                                    print("Exit was found by player " + str(curr_player_turn))
-                                    self.send_move_result(conn_to_send_to, "Exit")
-                                    self.send_player_updates()
-                                elif curr_player.ejects > prev_ejects:
-                                    print("Player " + str(curr_player_turn) + " was expelled")
-                                    self.send_move_result(conn_to_send_to, "Eject")
-                                    self.send_player_updates()
-                                else:
-                                    self.send_move_result(conn_to_send_to, "OK")
-                                    self.send_player_updates()
-
-                                move = b''
-                            else:
-                                print(str(curr_player.id) + " did not enter a successful move, retrying")
-                                unsuccesful_moves += 1
-                                move = b''
-                                self.send_move_result(conn_to_send_to, "Invalid")
-                    except Exception as e:
-                        # We should enter the while loop again
-                        print("Move was not a valid JSON or not all data received by socket")
-                        print("This was what was recieved: " + str(move))
-                        move = b''     
-                        print("This is the error: ")
-                        print(e)
-
-            elif self.game_manager.whose_turn == Turn.ADVERSARY:
-                for adversary in self.game.adversaries:
-                    successful_move = False
-                    while not successful_move:
-                        successful_move = adversary.take_turn()
-                    self.send_player_updates()
-                    
-                print("Adversaries have moved.")
-
-                # This should end the round
-                all_moved = True
-
-    def level_init(self):
+        while self.game_manager.whose_turn == Turn.PLAYER and not self.is_level_done():
+            curr_player_turn = self.game_manager.player_turn
+            curr_player = self.game.players[curr_player_turn - 1]
+            conn = self.player_connections[curr_player_turn - 1]
+            if curr_player in level.players_exited:
+                self.game_manager.change_player_turn()
+                continue
+            if conn.closed:
+                print(curr_player.id + " has disconnected and leaves the level")
+                self.remove_disconnected_player(curr_player)
+                self.game_manager.change_player_turn()
+                await self.send_player_updates()
+                continue
+            await self.play_player_turn(curr_player, conn)
+
+        if self.game_manager.whose_turn == Turn.ADVERSARY:
+            for adversary in self.game.adversaries:
+                if self.is_level_done():
+                    break
+                # Adversaries that were never placed, or cannot move, skip their turn
+                if adversary.x_pos is None or not (adversary.take_turn() or adversary.take_turn()):
+                    self.game_manager.change_adversary_turn()
+                await self.send_player_updates()
+
+            print("Adversaries have moved.")
+
+        if self.outbox.policy == "round":
+            await self.flush()
+
+    async def level_init(self):
         """
         Initialize the beginning of a level.
         """
         print("Level is initializing")
         self.setup_adversaries()
         self.place_at_initial_positions()
-        self.start_level()
+        await self.start_level()
         # This is the initial update
-        self.send_player_updates()
+        await self.send_player_updates()
 
-    def send_end_level(self):
+    async def send_end_level(self):
         """
         Send the end of level statistics.
         """
-        time.sleep(2)
-        for conn in self.connections:
-            end_level_message = self.game.current_level.end_level_message
-            conn.send(json.dumps(end_level_message).encode())
+        end_level_message = self.game.current_level.end_level_message
+        for conn in self.player_connections:
+            self.outbox.queue(conn, end_level_message)
+        await self.flush()
 
-    def send_end_game(self):
+    async def send_end_game(self):
         """
         Send the end of game statistics.
         """
-        time.sleep(2)
         self.game.get_game_scores()
-        for conn in self.connections:
-            end_game_message = self.game.end_game_message
-            conn.send(json.dumps(end_game_message).encode())
+        end_game_message = self.game.end_game_message
+        for conn in self.player_connections:
+            self.outbox.queue(conn, end_game_message)
+        await self.flush()
+
+    async def play(self):
+        """
+        Plays the game with the registered players until the end of the last level, and closes
+        the game's connections.
+        """
+        try:
+            if not self.game.players:
+                print("No players registered, the game will not start.")
+                return
+
+            while True:
+                await self.level_init()
+                while not self.is_level_done() and not self.is_abandoned():
+                    await self.play_round()
+                if self.is_abandoned():
+                    print("Every player has disconnected, the game is over.")
+                    return
+
+                # Send end of level statistics
+                self.game.is_end_of_level()
+                print("**********End of level reached**********")
+                print(str(self.game.levels_completed) + " levels completed")
+                await self.send_end_level()
+                if self.game.is_end_of_game():
+                    print("**********End of game reached**********")
+                    break
+                self.game.level_up()
+
+            # Send end of game statistics
+            await self.send_end_game()
+            self.game_manager.end_game()
+            print("The game has ended.")
+        finally:
+            self.print_queue_metrics()
+            for conn in self.player_connections:
+                conn.close()
+
+    def print_queue_metrics(self):
+        """
+        Prints how far behind each player's client fell during the game.
+        """
+        for player, conn in zip(self.game.players, self.player_connections):
+            print(str(player.id) + ": peak send queue depth " + str(conn.peak_queue_depth) +
+                  ", " + str(conn.overflows) + " overflows")
+
+
+class Remote:
+    def __init__(self):
+        """
+        Initialize the remote server for a game of Snarl with default configurations.
+        These fields can be modified to desired configurations.
+        """
+        self.levels_file = "snarl.levels"
+        self.num_clients = 4
+        self.wait = 60
+        self.name_wait = 60
+        self.observer_view = False
+        self.address = "127.0.0.1"
+        self.port = 45678
+        self.seed = None
+        self.num_games = 1
+        self.pacing = Pacing()
+        self.flush_policy = "move"
+        self.flush_interval = 0.1
+        self.keyframe_interval = None
+        self.max_queue = 256
+        self.overflow = "keyframe"
+        self.turn_timeout = 60
+        self.send_moves = None
+        # Deadlines of the turns of every game
+        self.timer_wheel = TimerWheel()
+        self.server = None
+        # The Unix domain socket path the server also listens on, for clients on the same host
+        self.unix_path = None
+        self.unix_server = None
+        self.json_levels = None
+        # Connections still choosing a player name
+        self.lobby = set()
+        self.lobby_timer = None
+        # Registrations of loopback clients still running
+        self.accepting = set()
+        # The next game to start, which clients join as soon as they register a name
+        self.next_session = None
+        self.sessions_created = 0
+        self.games_started = 0
+        self.sessions = set()
+        self.done = None
+
+    def parse_levels_file(self):
+        """
+        Parse the levels file into the JSON level specifications every game is built from.
+        """
+        self.json_levels = read_levels_file(self.levels_file)
+
+    def new_session(self):
+        """
+        Creates a game session with fresh levels for the next game.
+
+        Returns:
+            GameSession: The new game session.
+        """
+        levels = [build_level(json_level) for json_level in self.json_levels]
+        seed = None if self.seed is None else self.seed + self.sessions_created
+        self.sessions_created += 1
+        outbox = Outbox(self.flush_policy, self.flush_interval)
+        return GameSession(levels, seed, self.observer_view, self.pacing, outbox, self.keyframe_interval,
+                           self.timer_wheel, self.turn_timeout, self.send_moves)
+
+    def is_accepting(self):
+        """
+        Checks whether the server still accepts clients for another game.
+
+        Returns:
+            bool: Whether more games will be started.
+        """
+        return not self.num_games or self.games_started < self.num_games
+
+    def start_game(self):
+        """
+        Starts the next game with the players registered so far, running it as its own task.
+        """
+        session = self.next_session
+        self.games_started += 1
+
+        if self.is_accepting():
+            self.next_session = self.new_session()
+        else:
+            # No more games will be started, stop listening for clients
+            self.next_session = None
+            self.close_server()
+            for conn in self.lobby:
+                conn.close()
+
+        task = asyncio.ensure_future(session.play())
+        self.sessions.add(task)
+        task.add_done_callback(self.session_done)
+
+    def session_done(self, task):
+        """
+        Cleans up after a finished game and stops the server once every game has been played.
+
+        Args:
+            task (asyncio.Task): The finished game's task.
+        """
+        self.sessions.discard(task)
+        if not task.cancelled() and task.exception():
+            print("A game ended with an error: " + repr(task.exception()))
+        if self.num_games and self.games_started == self.num_games and not self.sessions:
+            self.done.set()
+
+    def cancel_lobby_timer(self):
+        """
+        Stops waiting for the next client to connect.
+        """
+        if self.lobby_timer:
+            self.lobby_timer.cancel()
+            self.lobby_timer = None
+
+    def reset_lobby_timer(self):
+        """
+        Starts waiting for the next client to connect, for at most the configured wait.
+        """
+        self.cancel_lobby_timer()
+        self.lobby_timer = asyncio.get_event_loop().call_later(self.wait, self.lobby_timeout)
+
+    def lobby_timeout(self):
+        """
+        No client connected in time: start a game with the players registered so far, or, if no
+        game was ever started and nobody is waiting, shut down the server.
+        """
+        self.lobby_timer = None
+        if self.next_session.player_connections:
+            self.start_game()
+        elif self.games_started == 0 and self.num_games and not self.lobby:
+            print("No clients connected, the game will not start.")
+            self.close_server()
+            self.done.set()
+            return
+        if self.is_accepting():
+            self.reset_lobby_timer()
+
+    async def register_player(self, conn):
+        """
+        Asks a client for a player name until it registers one that is unique in the next game,
+        and starts that game as soon as it has enough players. A client that does not send a
+        name within the name wait is disconnected.
+
+        Args:
+            conn (Connection): The client's connection.
+
+        Returns:
+            bool: Whether the client registered a player.
+        """
+        while not conn.closed and self.next_session:
+            # Send the request for name
+            await conn.send("name")
+
+            try:
+                name = await asyncio.wait_for(conn.receive(), self.name_wait)
+            except asyncio.TimeoutError:
+                print("Client " + conn.get_address() + " did not send a name in time.")
+                break
+            if conn.closed or not self.next_session:
+                break
+            print("Client sent for name: " + str(name))
+            if not isinstance(name, str) or not name:
+                print("Player name was not a string. Retrying...")
+                continue
+
+            if self.next_session.add_player(conn, name):
+                self.lobby.discard(conn)
+                if len(self.next_session.player_connections) == self.num_clients:
+                    self.start_game()
+                return True
+
+            # Name is not unique, request another name
+            print("Player name was not accepted. Retrying...")
+
+        conn.close()
+        return False
+
+    async def handle_connection(self, reader, writer):
+        """
+        Accepts a new client connection into the lobby and registers its player. Every client
+        registers concurrently, so a slow client does not hold up the others.
+
+        Args:
+            reader (asyncio.StreamReader): The client's stream to read from.
+            writer (asyncio.StreamWriter): The client's stream to write to.
+        """
+        await self.accept(Connection(reader, writer, self.max_queue, self.overflow))
+
+    async def accept(self, conn):
+        """
+        Welcomes a client into the lobby and registers its player, whatever its transport.
+
+        Args:
+            conn (Connection): The client's connection.
+        """
+        if not self.is_accepting():
+            conn.close()
+            return
+
+        print("Connected to " + conn.get_address())
+        self.lobby.add(conn)
+        self.reset_lobby_timer()
+
+        try:
+            # Send the server welcome message
+            welcome_message = {"type": "welcome", "info": "Olindond"}
+            await conn.send(welcome_message)
+            await self.register_player(conn)
+        finally:
+            self.lobby.discard(conn)
+
+    async def connect_loopback(self):
+        """
+        Connects a client running in the same process to the server, without a socket. The
+        client plays exactly as it would over TCP, at memory speed.
+
+        Returns:
+            LoopbackConnection: The client's end of the connection.
+        """
+        server_end, client_end = loopback_pair()
+        task = asyncio.ensure_future(self.accept(server_end))
+        # Keep a reference so the registration is not garbage collected while it runs
+        self.accepting.add(task)
+        task.add_done_callback(self.accepting.discard)
+        return client_end
+
+    async def serve(self):
+        """
+        Listens for clients and plays games until the configured number of games is over.
+        """
+        self.parse_levels_file()
+        self.done = asyncio.Event()
+        self.next_session = self.new_session()
+        self.server = await asyncio.start_server(self.handle_connection, self.address, self.port)
+        print('Server socket created on ' + self.address + ':' + str(self.port))
+        if self.unix_path:
+            self.unix_server = await asyncio.start_unix_server(self.handle_connection, self.unix_path)
+            print('Server socket created on ' + self.unix_path)
+
+        try:
+            self.reset_lobby_timer()
+            await self.done.wait()
+        finally:
+            self.close_server()
+            await self.server.wait_closed()
+            if self.unix_server:
+                await self.unix_server.wait_closed()
+                if os.path.exists(self.unix_path):
+                    os.remove(self.unix_path)
 
     def close_server(self):
         """
-        Tear down the server socket connection.
+        Stop listening for client connections.
         """
-        self.server.close()
+        self.cancel_lobby_timer()
+        if self.server:
+            self.server.close()
+        if self.unix_server:
+            self.unix_server.close()
 
     def start_server(self):
         """
@@ -576,9 +972,23 @@ class Remote:
                             default='snarl.levels')
         parser.add_argument('--clients', type=int, help="The number of clients (1-4).", default=4)
         parser.add_argument('--wait', type=int, help="The number of seconds to wait for the next client to connect.", default=60)
+        parser.add_argument('--name-wait', type=float, help="The number of seconds a client has to send its player name.", default=60)
         parser.add_argument('--observe', help="Switch to an observer view.", action='store_true')
         parser.add_argument('--address', type=str, help="The IP address on which the server should listen for connections", default="127.0.0.1")
         parser.add_argument('--port', type=int, help="The port number the server will listen on", default=45678)
+        parser.add_argument('--unix', type=str, metavar='PATH', help="A Unix domain socket path the server should also listen on, for clients on the same host.", default=None)
+        parser.add_argument('--seed', type=int, help="The seed for the game's randomness, to replay a game.", default=None)
+        parser.add_argument('--games', type=int, help="The number of games to host, 0 to keep hosting games.", default=1)
+        parser.add_argument('--delay', type=float, help="The seconds to wait before sending each message, 0 for none.", default=2)
+        parser.add_argument('--round-delay', type=float, help="The seconds to wait before each round, defaulting to the delay.", default=None)
+        parser.add_argument('--flush', choices=Outbox.FLUSH_POLICIES, help="When to send buffered updates: after every move, once per round, or after an interval.", default="move")
+        parser.add_argument('--flush-interval', type=float, help="The seconds between sends for the time flush policy.", default=0.1)
+        parser.add_argument('--delta', type=int, metavar='KEYFRAME_INTERVAL', nargs='?', const=50, default=None,
+                            help="Send players deltas of their views, with a keyframe every KEYFRAME_INTERVAL deltas (50 by default).")
+        parser.add_argument('--turn-timeout', type=float, help="The seconds a player has to move before their turn is skipped, 0 for no limit.", default=60)
+        parser.add_argument('--send-moves', choices=MOVE_ENCODINGS, help="Send players their valid moves with every move request, as a list or as a mask of steps.", default=None)
+        parser.add_argument('--send-queue', type=int, help="The most messages to queue for a client that is slow to read them.", default=256)
+        parser.add_argument('--overflow', choices=OVERFLOW_POLICIES, help="What to do when a client's send queue is full: drop its queued updates and send a keyframe, or disconnect it.", default="keyframe")
 
         # Creating the args list
         args = parser.parse_args()
@@ -587,37 +997,25 @@ class Remote:
         self.levels_file = args.levels
         self.num_clients = args.clients
         self.wait = args.wait
+        self.name_wait = args.name_wait
         self.observer_view = True if args.observe else False
         self.address = args.address
         self.port = args.port
+        self.unix_path = args.unix
+        self.seed = args.seed
+        self.num_games = args.games
+        self.pacing = Pacing(args.delay, args.round_delay)
+        self.flush_policy = args.flush
+        self.flush_interval = args.flush_interval
+        self.keyframe_interval = args.delta
+        self.turn_timeout = args.turn_timeout
+        self.send_moves = args.send_moves
+        self.max_queue = args.send_queue
+        self.overflow = args.overflow
 
-        # Initialize the server after all setup is complete
-        self.init_server()
-
-        # Initialize the first level
-        self.level_init()
-
-        # We are now playing the game
-        while not self.game.is_end_of_game():
-            if self.game.is_end_of_level():
-                # Send end of level statistics
-                print("**********End of level reached**********")
-                print(str(self.game.levels_completed) + " levels completed")
-                if self.game.is_end_of_game():
-                    print("**********End of game reached**********")
-                    break
-                else:
-                    self.send_end_level()
-                    self.game.level_up()
-                    time.sleep(2)
-                    self.level_init()
-            
-            # This plays a round
-            self.play_round() 
-
-        # Send end of game statistics
-        self.send_end_game()
-
-        print("The game has ended.")
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
 
-        self.close_server()
+        print("The server has shut down.")
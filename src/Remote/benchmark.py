@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+import io
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import resource
+import platform
+import subprocess
+import contextlib
+from Remote import *
+from bot import *
+
+
+def get_free_port(address):
+    """
+    Gets a port on the given address that no server is listening on.
+
+    Args:
+        address (str): The IP address.
+
+    Returns:
+        int: The port number.
+    """
+    with socket.socket() as sock:
+        sock.bind((address, 0))
+        return sock.getsockname()[1]
+
+
+def get_revision():
+    """
+    Gets the git revision being benchmarked, so that results can be compared across revisions.
+
+    Returns:
+        str: The commit hash, or None if it is not known.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_peak_rss():
+    """
+    Gets the peak resident set size of this process, which runs both the server and the bots.
+
+    Returns:
+        int: The peak resident set size in kilobytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+async def run_benchmark(levels_file="snarl.levels", num_bots=4, num_games=1, num_clients=4, seed=0,
+                        policy="seek", send_moves="list", keyframe_interval=None, address="127.0.0.1",
+                        unix_path=None, loopback=False):
+    """
+    Starts a server in this process and plays complete games against it with bots over loopback.
+    Every game is played by num_clients bots, and every bot plays the same number of games, so
+    num_games * num_clients must be a multiple of num_bots. The server's output is discarded.
+
+    Args:
+        levels_file (str): The path to the levels file every game is played on.
+        num_bots (int): The number of bots.
+        num_games (int): The number of games to play.
+        num_clients (int): The number of players in every game (1-4).
+        seed (int): The seed for the server's and the bots' randomness.
+        policy (str): The name of the bots' policy, a key of POLICIES.
+        send_moves (str): How the server sends valid moves, one of MOVE_ENCODINGS, or None.
+        keyframe_interval (int): If given, the server sends deltas with a keyframe this often.
+        address (str): The IP address the server listens on.
+        unix_path (str): If given, a Unix domain socket path the server also listens on, which the
+            bots connect to instead of the address.
+        loopback (bool): Whether the bots connect in-process, without sockets, to measure the
+            server without its transport.
+
+    Returns:
+        JSON: The bots' summary, with the server's peak memory and the benchmark's settings.
+    """
+    if (num_games * num_clients) % num_bots:
+        raise ValueError("The " + str(num_games * num_clients) + " places in " + str(num_games) +
+                         " games cannot be shared equally by " + str(num_bots) + " bots")
+
+    remote = Remote()
+    remote.levels_file = levels_file
+    remote.num_clients = num_clients
+    remote.num_games = num_games
+    remote.seed = seed
+    remote.address = address
+    remote.port = get_free_port(address)
+    remote.pacing = Pacing(0)
+    remote.send_moves = send_moves
+    remote.keyframe_interval = keyframe_interval
+    remote.unix_path = unix_path
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        server = asyncio.ensure_future(remote.serve())
+        while (remote.unix_server if unix_path else remote.server) is None and not server.done():
+            await asyncio.sleep(0.01)
+        connector = remote.connect_loopback if loopback else None
+        summary = await run_bots(num_bots, policy, address, remote.port,
+                                 num_games * num_clients // num_bots, seed, unix_path=unix_path,
+                                 connector=connector)
+        await server
+
+    summary["peak_rss_kb"] = get_peak_rss()
+    summary["settings"] = {"levels": levels_file, "games": num_games, "clients": num_clients,
+                           "seed": seed, "policy": policy, "send_moves": send_moves,
+                           "delta": keyframe_interval, "unix": unix_path,
+                           "loopback": loopback}
+    summary["revision"] = get_revision()
+    summary["python"] = platform.python_version()
+    summary["time"] = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    return summary
+
+
+def main():
+    """
+    Runs the benchmark from the command line, printing the results and writing them to a JSON
+    file.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark a Snarl server with bots over loopback.")
+
+    parser.add_argument('--levels', help="FILENAME containing JSON level specifications.", default='snarl.levels')
+    parser.add_argument('--bots', type=int, help="The number of bots to run at the same time.", default=4)
+    parser.add_argument('--games', type=int, help="The number of games to play.", default=10)
+    parser.add_argument('--clients', type=int, help="The number of players in every game (1-4).", default=4)
+    parser.add_argument('--seed', type=int, help="The seed for the server's and the bots' randomness.", default=0)
+    parser.add_argument('--policy', help="The bots' policy.", choices=sorted(POLICIES), default='seek')
+    parser.add_argument('--send-moves', choices=MOVE_ENCODINGS + ('none',), default='list',
+                        help="How the server sends valid moves, or none to have the bots check their moves themselves.")
+    parser.add_argument('--delta', type=int, metavar='KEYFRAME_INTERVAL', nargs='?', const=50, default=None,
+                        help="Send players deltas of their views, with a keyframe every KEYFRAME_INTERVAL deltas.")
+    parser.add_argument('--unix', type=str, metavar='PATH', help="Connect the bots over a Unix domain socket at PATH instead of TCP.", default=None)
+    parser.add_argument('--loopback', help="Connect the bots in-process, without sockets.", action='store_true')
+    parser.add_argument('--output', help="FILENAME to write the results to as JSON.", default='benchmark.json')
+
+    args = parser.parse_args()
+
+    send_moves = None if args.send_moves == 'none' else args.send_moves
+    results = asyncio.run(run_benchmark(args.levels, args.bots, args.games, args.clients, args.seed,
+                                        args.policy, send_moves, args.delta,
+                                        unix_path=args.unix, loopback=args.loopback))
+    with open(args.output, mode='w') as output_file:
+        json.dump(results, output_file, indent=2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+
+sys.path.append('../Game')
+
+from protocol import *
+from delta import *
+from connection import *
+
+# The results the server sends for a move
+MOVE_RESULTS = ("OK", "Key", "Exit", "Eject", "Invalid")
+
+# The messages that make up a player's state
+STATE_MESSAGE_TYPES = ("player-update", "view", "player-delta")
+
+
+class RandomMovePolicy:
+    def __init__(self, seed=None):
+        """
+        Moves a bot to a random valid move.
+
+        Args:
+            seed (int): The seed for the policy's randomness.
+        """
+        self.random = random.Random(seed)
+
+    def start_level(self):
+        """
+        Forgets what the policy learned about the previous level.
+        """
+        pass
+
+    def move_result(self, result):
+        """
+        Learns from the result of the bot's last move.
+
+        Args:
+            result (str): The move result, one of MOVE_RESULTS.
+        """
+        pass
+
+    def get_candidates(self, state, valid_moves):
+        """
+        Gets the moves to choose from: the valid moves if the server sent them, and otherwise
+        the steps the player's surroundings allow.
+
+        Args:
+            state (ViewState): The player's state.
+            valid_moves ([(int, int)]): The valid moves the server sent, or None.
+
+        Returns:
+            [(int, int)]: The candidate moves.
+        """
+        if valid_moves is not None:
+            return valid_moves
+        if state.update is None or None in state.update["position"]:
+            return []
+        x_pos, y_pos = state.update["position"]
+        return [(x_pos + step[0], y_pos + step[1]) for step in MOVE_STEPS
+                if state.is_valid_move((x_pos + step[0], y_pos + step[1]))]
+
+    def choose_move(self, state, valid_moves):
+        """
+        Chooses the bot's next move.
+
+        Args:
+            state (ViewState): The player's state.
+            valid_moves ([(int, int)]): The valid moves the server sent, or None.
+
+        Returns:
+            (int, int): The destination of the move, or None if the bot knows of no move.
+        """
+        candidates = self.get_candidates(state, valid_moves)
+        if not candidates:
+            return None
+        return self.random.choice(candidates)
+
+
+class SeekMovePolicy(RandomMovePolicy):
+    def __init__(self, seed=None):
+        """
+        Heads for the key while it is in sight, and for the exit once the key was found, moving at
+        random otherwise.
+
+        Args:
+            seed (int): The seed for the policy's randomness.
+        """
+        super().__init__(seed)
+        self.key_found = False
+        # Where the key was last seen, to notice when another player picks it up
+        self.key_position = None
+
+    def start_level(self):
+        """
+        Forgets the key of the previous level.
+        """
+        self.key_found = False
+        self.key_position = None
+
+    def move_result(self, result):
+        """
+        Learns that the bot picked up the key.
+
+        Args:
+            result (str): The move result, one of MOVE_RESULTS.
+        """
+        if result == "Key":
+            self.key_found = True
+
+    def in_sight(self, state, position):
+        """
+        Checks whether a position is covered by the player's layout, which is centered on them.
+
+        Args:
+            state (ViewState): The player's state.
+            position ([int, int]): The position.
+
+        Returns:
+            bool: Whether the player can see the position.
+        """
+        x_pos, y_pos = state.update["position"]
+        layout = state.update["layout"]
+        row = position[0] - x_pos + 2
+        column = position[1] - y_pos + 2
+        return 0 <= row < len(layout) and 0 <= column < len(layout[row])
+
+    def choose_move(self, state, valid_moves):
+        """
+        Chooses the move that gets closest to the target, or a random move if no move gets closer.
+        The key is no longer shown once a player found it, so the policy knows the key was found
+        when its own move returned "Key", or when the spot the key was seen on is in sight again
+        without it.
+
+        Args:
+            state (ViewState): The player's state.
+            valid_moves ([(int, int)]): The valid moves the server sent, or None.
+
+        Returns:
+            (int, int): The destination of the move, or None if the bot knows of no move.
+        """
+        if state.update is None or None in state.update["position"]:
+            return super().choose_move(state, valid_moves)
+
+        targets = {obj["type"]: obj["position"] for obj in state.update["objects"]}
+        if "key" in targets:
+            self.key_position = targets["key"]
+        elif self.key_position is not None and self.in_sight(state, self.key_position):
+            self.key_found = True
+
+        candidates = self.get_candidates(state, valid_moves)
+        target = targets.get("exit") if self.key_found else targets.get("key")
+        if not candidates or target is None:
+            return super().choose_move(state, valid_moves)
+
+        def distance(position):
+            return abs(position[0] - target[0]) + abs(position[1] - target[1])
+
+        closer = [move for move in candidates if distance(move) < distance(state.update["position"])]
+        if not closer:
+            return super().choose_move(state, valid_moves)
+        return min(closer, key=distance)
+
+
+POLICIES = {"random": RandomMovePolicy, "seek": SeekMovePolicy}
+
+
+class Bot:
+    def __init__(self, name, policy=None, address="127.0.0.1", port=45678, unix_path=None,
+                 connector=None):
+        """
+        A client that plays Snarl on its own, for load testing a server. A bot speaks the same
+        protocol as the Client, so many bots can run as asyncio tasks in a single process.
+
+        Args:
+            name (str): The player name. A number is appended if the name is taken.
+            policy (RandomMovePolicy): The policy choosing the bot's moves, random by default.
+            address (str): The server's address.
+            port (int): The server's port.
+            unix_path (str): If given, the server's Unix domain socket path, used instead of the
+                address and port.
+            connector (function): If given, a coroutine function returning a new connection to
+                the server, such as Remote.connect_loopback, used instead of a socket.
+        """
+        self.name = name
+        self.policy = policy if policy else RandomMovePolicy()
+        self.address = address
+        self.port = port
+        self.unix_path = unix_path
+        self.connector = connector
+        # Seconds between sending each message and receiving the server's first message after it
+        self.latencies = []
+        self.moves = 0
+        self.invalid_moves = 0
+        # Games completed, counted as a share of each game so the shares of a game's bots add up to 1
+        self.games = 0
+        self.end_game_messages = []
+
+    async def connect(self):
+        """
+        Connects to the server over the bot's transport.
+
+        Returns:
+            Connection: The connection to the server.
+        """
+        if self.connector:
+            return await self.connector()
+        if self.unix_path:
+            reader, writer = await asyncio.open_unix_connection(self.unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(self.address, self.port)
+        return Connection(reader, writer)
+
+    async def play(self):
+        """
+        Connects to the server and plays a game until it ends or the server disconnects.
+
+        Returns:
+            JSON: The end-game message, or None if the game did not end.
+        """
+        conn = await self.connect()
+        state = ViewState()
+        names_sent = 0
+        # When the bot last sent a message that the server has not answered yet
+        sent_at = None
+        try:
+            while True:
+                message = await conn.receive()
+                if message is None:
+                    return None
+                if sent_at is not None:
+                    self.latencies.append(time.monotonic() - sent_at)
+                    sent_at = None
+
+                if message == "name":
+                    names_sent += 1
+                    await conn.send(self.name if names_sent == 1 else self.name + "-" + str(names_sent))
+                    sent_at = time.monotonic()
+                elif message == "move" or get_valid_moves(message) is not None:
+                    destination = self.policy.choose_move(state, get_valid_moves(message))
+                    to = list(destination) if destination else None
+                    await conn.send({"type": "move", "to": to})
+                    sent_at = time.monotonic()
+                    self.moves += 1
+                elif isinstance(message, str) and message in MOVE_RESULTS:
+                    self.policy.move_result(message)
+                    if message == "Invalid":
+                        self.invalid_moves += 1
+                elif not isinstance(message, dict):
+                    continue
+                elif message.get("type") == "start-level":
+                    self.policy.start_level()
+                elif message.get("type") in STATE_MESSAGE_TYPES:
+                    if not state.apply(message):
+                        await conn.send({"type": "resync"})
+                        sent_at = time.monotonic()
+                elif message.get("type") == "end-game":
+                    self.games += 1 / max(1, len(message["scores"]))
+                    self.end_game_messages.append(message)
+                    return message
+        finally:
+            conn.close()
+
+
+def percentile(values, fraction):
+    """
+    Gets a percentile of some values, by the nearest rank.
+
+    Args:
+        values ([float]): The values.
+        fraction (float): The percentile, between 0 and 1.
+
+    Returns:
+        float: The percentile, or None if there are no values.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, int(round(fraction * len(values))) - 1))]
+
+
+def summarize(bots, elapsed):
+    """
+    Summarizes how a group of bots played.
+
+    Args:
+        bots ([Bot]): The bots.
+        elapsed (float): The seconds the bots played for.
+
+    Returns:
+        JSON: The number of bots, games, moves and invalid moves, games and moves per second, and
+            the 50th, 90th and 99th percentiles in seconds of the latency of every message the
+            bots sent.
+    """
+    latencies = [latency for bot in bots for latency in bot.latencies]
+    games = sum(bot.games for bot in bots)
+    moves = sum(bot.moves for bot in bots)
+    return {"bots": len(bots),
+            "games": round(games, 3),
+            "moves": moves,
+            "invalid_moves": sum(bot.invalid_moves for bot in bots),
+            "seconds": round(elapsed, 3),
+            "games_per_second": round(games / elapsed, 3) if elapsed else None,
+            "moves_per_second": round(moves / elapsed, 3) if elapsed else None,
+            "latency_p50": percentile(latencies, 0.5),
+            "latency_p90": percentile(latencies, 0.9),
+            "latency_p99": percentile(latencies, 0.99)}
+
+
+async def run_bots(num_bots, policy="random", address="127.0.0.1", port=45678, games=1, seed=None,
+                   name="bot", unix_path=None, connector=None):
+    """
+    Runs bots concurrently against a server, each playing a number of games one after another.
+
+    Args:
+        num_bots (int): The number of bots.
+        policy (str): The name of the bots' policy, a key of POLICIES.
+        address (str): The server's address.
+        port (int): The server's port.
+        games (int): The number of games each bot plays.
+        seed (int): If given, bot i's policy is seeded with seed + i.
+        name (str): The bots' names are this followed by their number.
+        unix_path (str): If given, the server's Unix domain socket path, used instead of the
+            address and port.
+        connector (function): If given, a coroutine function returning a new connection to the
+            server, used instead of a socket.
+
+    Returns:
+        JSON: The summary of how the bots played.
+    """
+    bots = [Bot(name + str(i + 1), POLICIES[policy](None if seed is None else seed + i), address, port,
+                unix_path, connector) for i in range(num_bots)]
+
+    async def play_games(bot):
+        for game in range(games):
+            if await bot.play() is None:
+                break
+
+    start = time.monotonic()
+    await asyncio.gather(*[play_games(bot) for bot in bots])
+    return summarize(bots, time.monotonic() - start)
+
+
+def main():
+    """
+    Runs bots against a server from the command line and prints their summary as JSON.
+    """
+    parser = argparse.ArgumentParser(description="Load test a Snarl server with bots.")
+
+    parser.add_argument('--address', type=str, help="The IP address of the server.", default="127.0.0.1")
+    parser.add_argument('--port', type=int, help="The port number of the server.", default=45678)
+    parser.add_argument('--unix', type=str, metavar='PATH', help="The Unix domain socket path of the server, used instead of the address and port.", default=None)
+    parser.add_argument('--bots', type=int, help="The number of bots to run at the same time.", default=4)
+    parser.add_argument('--games', type=int, help="The number of games each bot plays.", default=1)
+    parser.add_argument('--policy', help="The bots' policy.", choices=sorted(POLICIES), default='random')
+    parser.add_argument('--seed', type=int, help="The seed for the bots' randomness.", default=None)
+
+    args = parser.parse_args()
+
+    summary = asyncio.run(run_bots(args.bots, args.policy, args.address, args.port, args.games, args.seed,
+                                   unix_path=args.unix))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+
+import json
+import asyncio
+from collections import deque
+from protocol import *
+
+# What to do when a client falls too far behind: drop its queued player state and send it a
+# keyframe once it catches up, or disconnect it
+OVERFLOW_POLICIES = ("keyframe", "disconnect")
+
+# Messages carrying a player's whole state, or a change to it, which a keyframe replaces
+STATE_MESSAGES = ("player-update", "view", "player-delta")
+
+
+class Connection:
+    def __init__(self, reader, writer, max_queue=256, overflow="keyframe"):
+        """
+        A client connection to the server, wrapping an asyncio stream reader and writer.
+        Messages are framed by the protocol module, one JSON value per line.
+
+        Sending never waits for the client: messages are queued and written by the connection's
+        own writer task, so a slow client cannot hold up the game. The queue is bounded, and a
+        client that falls more than max_queue messages behind is handled by the overflow policy.
+
+        Args:
+            reader (asyncio.StreamReader): The stream to read from.
+            writer (asyncio.StreamWriter): The stream to write to.
+            max_queue (int): The most messages to queue for the client.
+            overflow (str): The overflow policy, "keyframe" or "disconnect".
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError("Unknown overflow policy: " + str(overflow))
+        self.reader = reader
+        self.writer = writer
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.decoder = MessageDecoder()
+        # Messages received but not yet handed out, as one read can carry several messages
+        self.messages = deque()
+        # Messages waiting to be written, and the task writing them
+        self.outgoing = deque()
+        self.write_task = None
+        # Set when queued player state was dropped, until the game sends the client a keyframe
+        self.needs_keyframe = False
+        self.closed = False
+        # Queue metrics
+        self.peak_queue_depth = 0
+        self.overflows = 0
+
+    def get_address(self):
+        """
+        Gets a printable address for the client.
+
+        Returns:
+            str: The client's address.
+        """
+        peer = self.writer.get_extra_info('peername')
+        if isinstance(peer, tuple):
+            return peer[0] + ":" + str(peer[1])
+        if not peer:
+            # Clients of a Unix domain socket are unnamed, name the server's socket instead
+            return "unix:" + str(self.writer.get_extra_info('sockname'))
+        return str(peer)
+
+    async def send(self, message):
+        """
+        Sends a message to the client. Messages to a closed connection are dropped.
+
+        Args:
+            message (JSON): The message, a JSON object or a string token.
+        """
+        await self.send_all([message])
+
+    async def send_all(self, messages):
+        """
+        Queues several messages for the client, to be sent with a single write if the client
+        keeps up. Messages to a closed connection are dropped.
+
+        Args:
+            messages ([JSON]): The messages, in order.
+        """
+        if self.closed or not messages:
+            return
+        self.outgoing.extend(messages)
+        self.peak_queue_depth = max(self.peak_queue_depth, len(self.outgoing))
+        if len(self.outgoing) > self.max_queue:
+            self.handle_overflow()
+        if not self.closed and self.write_task is None:
+            self.write_task = asyncio.ensure_future(self.write_queue())
+
+    def handle_overflow(self):
+        """
+        Applies the overflow policy to a client that fell too far behind.
+        """
+        self.overflows += 1
+        if self.overflow == "keyframe":
+            # Player state is replaced by the next keyframe, so only the other messages must be sent
+            kept = [message for message in self.outgoing
+                    if not (isinstance(message, dict) and message.get("type") in STATE_MESSAGES)]
+            self.outgoing = deque(kept)
+            self.needs_keyframe = True
+            if len(self.outgoing) <= self.max_queue:
+                return
+        self.abort()
+
+    def get_queue_depth(self):
+        """
+        Gets the number of messages waiting to be written to the client.
+
+        Returns:
+            int: The queue depth.
+        """
+        return len(self.outgoing)
+
+    async def write_queue(self):
+        """
+        Writes queued messages to the client until the queue is empty, batching every message
+        that was queued while the previous write was draining.
+        """
+        while self.outgoing and not self.closed:
+            data = encode_messages(self.outgoing)
+            self.outgoing.clear()
+            try:
+                self.writer.write(data)
+                await self.writer.drain()
+            except (ConnectionError, OSError):
+                self.abort()
+        self.write_task = None
+
+    async def receive(self):
+        """
+        Receives the next message sent by the client.
+
+        Returns:
+            JSON: The message, or None if the client disconnected or broke the protocol.
+        """
+        while not self.messages:
+            if self.closed:
+                return None
+            try:
+                data = await self.reader.read(4096)
+                if not data:
+                    self.close()
+                    return None
+                self.messages.extend(self.decoder.feed(data))
+            except (ConnectionError, OSError, ProtocolError):
+                self.close()
+                return None
+        return self.messages.popleft()
+
+    def close(self):
+        """
+        Closes the connection, once the messages still queued have been handed to the transport.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if self.outgoing:
+            self.writer.write(encode_messages(self.outgoing))
+            self.outgoing.clear()
+        self.writer.close()
+
+    def abort(self):
+        """
+        Closes the connection at once, dropping every message that was not yet written.
+        """
+        self.outgoing.clear()
+        if self.closed:
+            return
+        self.closed = True
+        self.writer.transport.abort()
+
+
+class LoopbackConnection:
+    def __init__(self, name="loopback"):
+        """
+        One end of an in-process connection, for running servers and clients in the same process
+        without sockets. Messages go straight into the other end's queue instead of being framed
+        and written, but are still converted to and from JSON, so both ends see exactly the values
+        they would see over a socket. Use loopback_pair to make the two connected ends.
+
+        Args:
+            name (str): The printable address of this end.
+        """
+        self.name = name
+        self.peer = None
+        # Messages sent by the other end, with None marking that it closed
+        self.inbox = asyncio.Queue()
+        self.needs_keyframe = False
+        self.closed = False
+        # Queue metrics, kept for parity with Connection
+        self.peak_queue_depth = 0
+        self.overflows = 0
+
+    def get_address(self):
+        """
+        Gets a printable address for this end.
+
+        Returns:
+            str: The address.
+        """
+        return self.name
+
+    async def send(self, message):
+        """
+        Sends a message to the other end. Messages to or from a closed end are dropped.
+
+        Args:
+            message (JSON): The message, a JSON object or a string token.
+        """
+        await self.send_all([message])
+
+    async def send_all(self, messages):
+        """
+        Sends several messages to the other end, in order, without waiting for it to read them.
+
+        Args:
+            messages ([JSON]): The messages, in order.
+        """
+        if self.closed or self.peer.closed:
+            return
+        for message in messages:
+            self.peer.inbox.put_nowait(json.loads(json.dumps(message)))
+        self.peak_queue_depth = max(self.peak_queue_depth, self.peer.inbox.qsize())
+
+    def get_queue_depth(self):
+        """
+        Gets the number of messages the other end has not read yet.
+
+        Returns:
+            int: The queue depth.
+        """
+        return self.peer.inbox.qsize()
+
+    async def receive(self):
+        """
+        Receives the next message sent by the other end.
+
+        Returns:
+            JSON: The message, or None if either end closed the connection.
+        """
+        if self.closed:
+            return None
+        message = await self.inbox.get()
+        if message is None:
+            self.close()
+        return message
+
+    def close(self):
+        """
+        Closes the connection. The other end receives the messages already sent, and then None.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.peer.inbox.put_nowait(None)
+        # Wake up a receive waiting on this end
+        self.inbox.put_nowait(None)
+
+    def abort(self):
+        """
+        Closes the connection at once, dropping the messages the other end has not read yet.
+        """
+        if self.closed:
+            return
+        while not self.peer.inbox.empty():
+            self.peer.inbox.get_nowait()
+        self.close()
+
+
+def loopback_pair(server_name="loopback-server", client_name="loopback-client"):
+    """
+    Makes the two connected ends of an in-process connection.
+
+    Args:
+        server_name (str): The printable address of the server's end, as seen by the client.
+        client_name (str): The printable address of the client's end, as seen by the server.
+
+    Returns:
+        (LoopbackConnection, LoopbackConnection): The server's end and the client's end.
+    """
+    server_end = LoopbackConnection(client_name)
+    client_end = LoopbackConnection(server_name)
+    server_end.peer = client_end
+    client_end.peer = server_end
+    return server_end, client_end
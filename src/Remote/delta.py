@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+
+# Fields of a player-update that are sent whole whenever they change
+UPDATE_FIELDS = ("position", "objects", "actors", "message")
+
+
+def make_delta(old_update, old_view, new_update, new_view):
+    """
+    Encodes the changes between two player states as a player-delta message. Changed layout
+    cells are sent as [row, column, tile] and changed view rows as [row, text]. The layout or
+    view is sent whole when its shape changed, and the other fields are sent whole when changed.
+
+    Args:
+        old_update (JSON): The player-update the client has.
+        old_view (JSON): The view message the client has.
+        new_update (JSON): The current player-update.
+        new_view (JSON): The current view message.
+
+    Returns:
+        JSON: The player-delta message, or None if nothing changed.
+    """
+    delta = {"type": "player-delta"}
+
+    old_layout = old_update["layout"]
+    new_layout = new_update["layout"]
+    if [len(row) for row in old_layout] != [len(row) for row in new_layout]:
+        delta["layout"] = new_layout
+    else:
+        cells = [[i, j, tile] for i, row in enumerate(new_layout) for j, tile in enumerate(row)
+                 if old_layout[i][j] != tile]
+        if cells:
+            delta["layout-cells"] = cells
+
+    for field in UPDATE_FIELDS:
+        if old_update[field] != new_update[field]:
+            delta[field] = new_update[field]
+
+    old_rows = old_view["view"]
+    new_rows = new_view["view"]
+    if len(old_rows) != len(new_rows):
+        delta["view"] = new_rows
+    else:
+        rows = [[i, row] for i, row in enumerate(new_rows) if old_rows[i] != row]
+        if rows:
+            delta["view-rows"] = rows
+
+    return delta if len(delta) > 1 else None
+
+
+class ViewEncoder:
+    def __init__(self, keyframe_interval=50):
+        """
+        Tracks what one client knows about its player, to send it deltas instead of whole
+        updates. A keyframe is the full player-update and view messages. It is sent first, every
+        keyframe_interval deltas after that, and whenever the client asks to resync.
+
+        Encoded messages are keyed: a message replaces the buffered message with the same key,
+        since each one brings the client from what it was last sent to the current state.
+        commit must be called once the buffered messages have been sent.
+
+        Args:
+            keyframe_interval (int): The number of deltas between keyframes.
+        """
+        self.keyframe_interval = keyframe_interval
+        # The state the client was last sent, and the state buffered to be sent next
+        self.sent = None
+        self.pending = None
+        self.pending_keyframe = False
+        self.deltas = 0
+
+    def request_keyframe(self):
+        """
+        Sends a keyframe next, e.g. at the start of a level or when the client asks to resync.
+        """
+        self.sent = None
+
+    def encode(self, update, view):
+        """
+        Encodes the player's current state for the client.
+
+        Args:
+            update (JSON): The current player-update message.
+            view (JSON): The current view message.
+
+        Returns:
+            [(str, JSON)]: The keyed messages to buffer. A message of None cancels the buffered
+                message with that key, as the state is back to what the client already has.
+        """
+        if self.sent is None or self.pending_keyframe or self.deltas >= self.keyframe_interval:
+            self.pending = (update, view)
+            self.pending_keyframe = True
+            return [("player-update", update), ("view", view)]
+
+        self.pending = (update, view)
+        return [("player-delta", make_delta(self.sent[0], self.sent[1], update, view))]
+
+    def commit(self):
+        """
+        Records that the buffered messages were sent.
+        """
+        if self.pending is None:
+            return
+        if self.pending_keyframe:
+            self.deltas = 0
+        elif self.pending != self.sent:
+            self.deltas += 1
+        self.sent = self.pending
+        self.pending = None
+        self.pending_keyframe = False
+
+
+class ViewState:
+    def __init__(self):
+        """
+        A client's copy of its player's state, rebuilt from keyframes and deltas.
+        """
+        self.update = None
+        self.view = None
+
+    def apply(self, message):
+        """
+        Applies a player-update, view or player-delta message.
+
+        Args:
+            message (JSON): The message.
+
+        Returns:
+            bool: Whether the message was applied. A delta cannot be applied before a keyframe,
+                and the client should then ask the server to resync.
+        """
+        if message["type"] == "player-update":
+            self.update = dict(message)
+            return True
+        if message["type"] == "view":
+            self.view = list(message["view"])
+            return True
+        if self.update is None or self.view is None:
+            return False
+
+        if "layout" in message:
+            self.update["layout"] = message["layout"]
+        else:
+            layout = [list(row) for row in self.update["layout"]]
+            for i, j, tile in message.get("layout-cells", []):
+                layout[i][j] = tile
+            self.update["layout"] = layout
+
+        for field in UPDATE_FIELDS:
+            if field in message:
+                self.update[field] = message[field]
+
+        if "view" in message:
+            self.view = list(message["view"])
+        else:
+            for i, row in message.get("view-rows", []):
+                self.view[i] = row
+        return True
+
+    def is_valid_move(self, destination):
+        """
+        Checks a move against the player's surroundings with the same rules as the server's
+        RuleChecker.is_valid_movement: a player moves at most 2 tiles, onto a tile they can walk
+        on that no other player is standing on. The layout covers every tile within 2 tiles of
+        the player, so the surroundings are all that is needed.
+
+        Args:
+            destination ((int, int)): The destination of the move.
+
+        Returns:
+            bool: Whether the move is valid. Moves are assumed valid while the player's position
+                is not known, leaving it to the server to decide.
+        """
+        if self.update is None or None in self.update["position"]:
+            return True
+        x_pos, y_pos = self.update["position"]
+        if abs(destination[0] - x_pos) + abs(destination[1] - y_pos) > 2:
+            return False
+
+        # The layout is centered on the player, and void and border tiles are 0
+        row = destination[0] - x_pos + 2
+        column = destination[1] - y_pos + 2
+        layout = self.update["layout"]
+        if not 0 <= row < len(layout) or not 0 <= column < len(layout[row]) or not layout[row][column]:
+            return False
+
+        # Players cannot move onto other players
+        for actor in self.update["actors"]:
+            if actor["type"] == "player" and list(actor["position"]) == list(destination):
+                return False
+        return True
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+
+import json
+from level import PLAYER_STEPS
+
+# The longest frame a peer may send, so a peer that never sends a newline cannot grow our buffer forever
+MAX_FRAME_SIZE = 1 << 20
+
+# The (x, y) steps a player's move can cover, in the order of the bits of a move mask. These are
+# the level's own player steps, so the mask always matches the server's movement rules
+MOVE_STEPS = PLAYER_STEPS
+
+# How the valid moves can be sent with a move request
+MOVE_ENCODINGS = ("list", "mask")
+
+
+class ProtocolError(Exception):
+    """
+    Raised when a peer breaks the framing of the protocol.
+    """
+    pass
+
+
+def encode_message(message):
+    """
+    Frames a message for the wire. Every message is one JSON value on its own line: JSON objects
+    for game messages, and JSON strings for tokens such as "move" and "OK" and for player names.
+
+    Args:
+        message (JSON): The message to send.
+
+    Returns:
+        bytes: The framed message.
+    """
+    return json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+
+def encode_messages(messages):
+    """
+    Frames several messages so they can be sent with a single write.
+
+    Args:
+        messages ([JSON]): The messages to send, in order.
+
+    Returns:
+        bytes: The framed messages.
+    """
+    return b''.join(encode_message(message) for message in messages)
+
+
+def get_move_destination(message):
+    """
+    Gets the destination of a move message sent by a client.
+
+    Args:
+        message (JSON): The message, which should look like {"type": "move", "to": [x, y]}.
+
+    Returns:
+        (int, int): The destination, or None if the message is not a well-formed move.
+    """
+    if not isinstance(message, dict) or message.get("type") != "move":
+        return None
+    to = message.get("to")
+    if not isinstance(to, list) or len(to) != 2 or not all(type(coord) is int for coord in to):
+        return None
+    return (to[0], to[1])
+
+
+def encode_move_mask(position, moves):
+    """
+    Encodes a player's valid moves as a mask of the steps they can take from their position.
+
+    Args:
+        position ((int, int)): The player's position.
+        moves ([(int, int)]): The player's valid moves.
+
+    Returns:
+        int: The mask, with bit i set if the player can take MOVE_STEPS[i].
+    """
+    moves = set(moves)
+    mask = 0
+    for i, step in enumerate(MOVE_STEPS):
+        if (position[0] + step[0], position[1] + step[1]) in moves:
+            mask |= 1 << i
+    return mask
+
+
+def decode_move_mask(position, mask):
+    """
+    Decodes a mask of the steps a player can take into their valid moves.
+
+    Args:
+        position ((int, int)): The player's position.
+        mask (int): The mask, with bit i set if the player can take MOVE_STEPS[i].
+
+    Returns:
+        [(int, int)]: The player's valid moves.
+    """
+    return [(position[0] + step[0], position[1] + step[1])
+            for i, step in enumerate(MOVE_STEPS) if mask & (1 << i)]
+
+
+def get_valid_moves(message):
+    """
+    Gets the valid moves sent with a move request, as a list or as a mask.
+
+    Args:
+        message (JSON): The move request, either the token "move" or a message like
+            {"type": "move-request", "moves": [[x, y], ...]} or
+            {"type": "move-request", "position": [x, y], "mask": mask}.
+
+    Returns:
+        [(int, int)]: The valid moves, or None if the request did not carry them.
+    """
+    if not isinstance(message, dict) or message.get("type") != "move-request":
+        return None
+    if "moves" in message:
+        return [(x_pos, y_pos) for x_pos, y_pos in message["moves"]]
+    if "mask" in message:
+        return decode_move_mask(message["position"], message["mask"])
+    return None
+
+
+class MessageDecoder:
+    def __init__(self, max_frame_size=MAX_FRAME_SIZE):
+        """
+        Incrementally decodes framed messages from the chunks of data received from a peer.
+        A chunk can hold any number of messages, including the start or end of a message that
+        is split across chunks.
+
+        Args:
+            max_frame_size (int): The longest frame to accept, in bytes.
+        """
+        self.buffer = bytearray()
+        # How far the buffer is known to hold no newline, so each byte is only scanned once
+        self.scanned = 0
+        self.max_frame_size = max_frame_size
+        # Number of frames that were not valid JSON and were skipped
+        self.errors = 0
+
+    def feed(self, data):
+        """
+        Decodes every complete message in the data received so far.
+
+        Args:
+            data (bytes): The newly received data.
+
+        Returns:
+            [JSON]: The complete messages, in order.
+
+        Raises:
+            ProtocolError: If a frame is longer than the maximum frame size.
+        """
+        self.buffer += data
+
+        messages = []
+        start = 0
+        end = self.buffer.find(b'\n', self.scanned)
+        while end >= 0:
+            if end - start > self.max_frame_size:
+                raise ProtocolError("Frame longer than " + str(self.max_frame_size) + " bytes")
+            frame = self.buffer[start:end]
+            if frame.strip():
+                try:
+                    messages.append(json.loads(frame))
+                except ValueError:
+                    self.errors += 1
+            start = end + 1
+            end = self.buffer.find(b'\n', start)
+
+        # Drop the consumed frames, keeping the start of the next one
+        del self.buffer[:start]
+        self.scanned = len(self.buffer)
+        if len(self.buffer) > self.max_frame_size:
+            raise ProtocolError("Frame longer than " + str(self.max_frame_size) + " bytes")
+        return messages
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+import math
+import asyncio
+
+
+class Deadline:
+    def __init__(self, wheel, expiry, callback):
+        """
+        A callback scheduled on a timer wheel.
+
+        Args:
+            wheel (TimerWheel): The wheel the deadline is scheduled on.
+            expiry (int): The tick at which the deadline elapses.
+            callback (function): Called with no arguments when the deadline elapses.
+        """
+        self.wheel = wheel
+        self.expiry = expiry
+        self.callback = callback
+
+    def cancel(self):
+        """
+        Cancels the deadline, if it has not elapsed yet.
+        """
+        self.wheel.cancel(self)
+
+
+class TimerWheel:
+    def __init__(self, tick=0.1, slots=1024):
+        """
+        A hashed timer wheel, for the deadlines of every game in the server. Deadlines are kept
+        in a ring of slots, one per tick, so scheduling and cancelling a deadline take constant
+        time however many are pending. Each tick only looks at the deadlines in its own slot.
+        The wheel only runs while deadlines are pending.
+
+        Args:
+            tick (float): The seconds per tick, which is how precise deadlines are.
+            slots (int): The number of slots. Deadlines further away than a full turn of the
+                wheel stay in their slot for more than one turn.
+        """
+        self.tick = tick
+        self.slots = [set() for _ in range(slots)]
+        self.current_tick = 0
+        self.pending = 0
+        # The loop time at which the current tick started, and the timer for the next tick
+        self.tick_time = None
+        self.timer = None
+
+    def schedule(self, delay, callback):
+        """
+        Schedules a callback to be called once a delay has passed.
+
+        Args:
+            delay (float): The seconds to wait. The deadline elapses on the first tick at least
+                this long from now, so it is never called early.
+            callback (function): Called with no arguments when the deadline elapses.
+
+        Returns:
+            Deadline: The deadline, which can be cancelled.
+        """
+        if self.timer is None:
+            self.start()
+        # The current tick started before now, so count from its start
+        since_tick = asyncio.get_event_loop().time() - self.tick_time
+        deadline = Deadline(self, self.current_tick + max(1, math.ceil((since_tick + delay) / self.tick)),
+                            callback)
+        self.slots[deadline.expiry % len(self.slots)].add(deadline)
+        self.pending += 1
+        return deadline
+
+    def cancel(self, deadline):
+        """
+        Cancels a deadline, if it has not elapsed yet.
+
+        Args:
+            deadline (Deadline): The deadline.
+        """
+        slot = self.slots[deadline.expiry % len(self.slots)]
+        if deadline in slot:
+            slot.remove(deadline)
+            self.pending -= 1
+
+    def start(self):
+        """
+        Starts ticking.
+        """
+        loop = asyncio.get_event_loop()
+        self.tick_time = loop.time()
+        self.timer = loop.call_at(self.tick_time + self.tick, self.run_ticks)
+
+    def run_ticks(self):
+        """
+        Advances the wheel by every tick that has passed, and stops ticking once no deadline is
+        pending.
+        """
+        loop = asyncio.get_event_loop()
+        while self.tick_time + self.tick <= loop.time():
+            self.tick_time += self.tick
+            self.advance()
+
+        if self.pending:
+            self.timer = loop.call_at(self.tick_time + self.tick, self.run_ticks)
+        else:
+            self.timer = None
+
+    def advance(self):
+        """
+        Advances the wheel by one tick, calling every deadline that elapsed.
+        """
+        self.current_tick += 1
+        slot = self.slots[self.current_tick % len(self.slots)]
+        elapsed = [deadline for deadline in slot if deadline.expiry <= self.current_tick]
+        for deadline in elapsed:
+            slot.remove(deadline)
+            self.pending -= 1
+            deadline.callback()
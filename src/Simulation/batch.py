@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../Game'))
+
+from simulation import *
+
+POLICIES = {"random": RandomPolicy, "seek": SeekPolicy}
+
+# The JSON levels of the pack being played, set once per worker process by init_worker
+worker_levels = None
+
+
+def init_worker(json_levels):
+    """
+    Initializes a worker process with the level pack, so levels are shipped to each worker once
+    instead of with every game.
+
+    Args:
+        json_levels ([JSON]): The level specifications of the pack.
+    """
+    global worker_levels
+    worker_levels = json_levels
+
+
+def run_game(seed, policy, num_players, max_rounds):
+    """
+    Plays one complete game on the worker's level pack.
+
+    Args:
+        seed (int): The seed for the game's randomness.
+        policy (str): The name of the policy controlling every player.
+        num_players (int): The number of players (1-4).
+        max_rounds (int): The number of rounds after which a level is ended with no winner.
+
+    Returns:
+        [(bool, bool, int, int)]: For each level played, whether a player exited, whether the key
+            was found, and the number of exits and ejects.
+    """
+    players = [("p" + str(i + 1), POLICIES[policy]()) for i in range(num_players)]
+    simulation = Simulation.from_json(worker_levels, players, max_rounds, seed)
+    simulation.run()
+
+    results = []
+    for message in simulation.end_level_messages:
+        exits = len(message["exits"])
+        results.append((exits > 0, bool(message["key"]), exits, len(message["ejects"])))
+    return results
+
+
+def run_games(seeds, policy, num_players, max_rounds):
+    """
+    Plays a chunk of games in a worker, so results go back to the parent once per chunk.
+
+    Args:
+        seeds ([int]): The seeds of the games to play.
+        policy (str): The name of the policy controlling every player.
+        num_players (int): The number of players (1-4).
+        max_rounds (int): The number of rounds after which a level is ended with no winner.
+
+    Returns:
+        [[(bool, bool, int, int)]]: The per-level results of each game.
+    """
+    return [run_game(seed, policy, num_players, max_rounds) for seed in seeds]
+
+
+def aggregate(json_levels, game_results):
+    """
+    Totals the per-level results of many games.
+
+    Args:
+        json_levels ([JSON]): The level specifications of the pack.
+        game_results ([[(bool, bool, int, int)]]): The per-level results of each game.
+
+    Returns:
+        [JSON]: The statistics of each level in the pack.
+    """
+    stats = []
+    for i in range(len(json_levels)):
+        stats.append({"level": i + 1, "games": 0, "wins": 0, "keys": 0, "exits": 0, "ejects": 0})
+
+    for results in game_results:
+        for level_stats, (won, key, exits, ejects) in zip(stats, results):
+            level_stats["games"] += 1
+            level_stats["wins"] += won
+            level_stats["keys"] += key
+            level_stats["exits"] += exits
+            level_stats["ejects"] += ejects
+
+    for level_stats in stats:
+        games = level_stats["games"]
+        level_stats["win_rate"] = level_stats["wins"] / games if games else 0.0
+
+    return stats
+
+
+def run_batch(levels_file, policy="seek", seeds=range(100), workers=None, num_players=1,
+              max_rounds=500, chunk_size=64):
+    """
+    Plays a game for every seed across a pool of worker processes and aggregates the results
+    per level.
+
+    Args:
+        levels_file (str): The path to the levels file.
+        policy (str): The name of the policy controlling every player.
+        seeds ([int]): The seed of each game to play.
+        workers (int): The number of worker processes, defaulting to the number of CPUs.
+        num_players (int): The number of players (1-4).
+        max_rounds (int): The number of rounds after which a level is ended with no winner.
+        chunk_size (int): The number of games sent to a worker at a time.
+
+    Returns:
+        [JSON]: The statistics of each level in the pack.
+    """
+    if policy not in POLICIES:
+        raise ValueError("Unknown policy: " + str(policy))
+
+    json_levels = read_levels_file(levels_file)
+    seeds = list(seeds)
+    chunks = [seeds[i:i + chunk_size] for i in range(0, len(seeds), chunk_size)]
+
+    game_results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(json_levels,)) as executor:
+        futures = [executor.submit(run_games, chunk, policy, num_players, max_rounds)
+                   for chunk in chunks]
+        for future in futures:
+            game_results.extend(future.result())
+
+    return aggregate(json_levels, game_results)
+
+
+def main():
+    """
+    Runs a batch of simulated games from the command line and prints the per-level statistics
+    as JSON.
+    """
+    parser = argparse.ArgumentParser(description="Simulate many games of Snarl on a level pack.")
+
+    parser.add_argument('--levels', help="FILENAME containing JSON level specifications.",
+                        default='../Remote/snarl.levels')
+    parser.add_argument('--policy', help="The player policy.", choices=sorted(POLICIES), default='seek')
+    parser.add_argument('--players', type=int, help="The number of players (1-4).", default=1)
+    parser.add_argument('--seed', type=int, help="The first seed.", default=0)
+    parser.add_argument('--games', type=int, help="The number of games to play.", default=1000)
+    parser.add_argument('--workers', type=int, help="The number of worker processes.", default=None)
+    parser.add_argument('--rounds', type=int, help="The maximum number of rounds per level.", default=500)
+
+    args = parser.parse_args()
+
+    stats = run_batch(args.levels, args.policy, range(args.seed, args.seed + args.games),
+                      args.workers, args.players, args.rounds)
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import math
+from collections import deque
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../Game'))
+
+from character import *
+from level import *
+from levelLoader import *
+from game import *
+from gameManager import *
+
+
+class RandomPolicy:
+    """
+    A player policy that picks one of its valid moves at random.
+    """
+    def choose_move(self, player, valid_moves, level):
+        """
+        Chooses the player's next move.
+
+        Args:
+            player (Player): The player to move.
+            valid_moves ([(int, int)]): The player's valid moves.
+            level (Level): The level being played.
+
+        Returns:
+            (int, int): The position to move to.
+        """
+        if not valid_moves:
+            return (player.x_pos, player.y_pos)
+        return valid_moves[level.random.randrange(len(valid_moves))]
+
+
+class SeekPolicy:
+    """
+    A player policy that walks the shortest path to the key, and to the level exit once the key
+    has been found, going around adversaries. Falls back to a random move when there is no path.
+    """
+    def choose_move(self, player, valid_moves, level):
+        """
+        Chooses the player's next move.
+
+        Args:
+            player (Player): The player to move.
+            valid_moves ([(int, int)]): The player's valid moves.
+            level (Level): The level being played.
+
+        Returns:
+            (int, int): The position to move to.
+        """
+        if not valid_moves:
+            return (player.x_pos, player.y_pos)
+
+        target = level.level_exit if level.exit_unlocked else level.key
+        start = level.get_index(player.x_pos, player.y_pos)
+        if target is not None and start is not None:
+            step = self.first_step(level, player, start, target.index)
+            if step is not None and divmod(step, level.width) in valid_moves:
+                return divmod(step, level.width)
+
+        return valid_moves[level.random.randrange(len(valid_moves))]
+
+    def first_step(self, level, player, start, target):
+        """
+        Breadth first search over the level's move graph for players.
+
+        Args:
+            level (Level): The level being played.
+            player (Player): The player to move.
+            start (int): The player's cell index.
+            target (int): The cell index to reach.
+
+        Returns:
+            int: The cell index of the first move on a shortest path, or None if there is no path.
+        """
+        offsets, targets = level.get_move_graph(player)
+        first = {start: None}
+        queue = deque([start])
+        while queue:
+            index = queue.popleft()
+            if index == target:
+                return first[index] if first[index] is not None else index
+            for next_index in targets[offsets[index]:offsets[index + 1]]:
+                if next_index in first or next_index in level.adversary_at:
+                    continue
+                if next_index in level.player_at and level.player_at[next_index] is not player:
+                    continue
+                first[next_index] = next_index if index == start else first[index]
+                queue.append(next_index)
+        return None
+
+
+class Simulation:
+    def __init__(self, levels, players, max_rounds=500, seed=None):
+        """
+        Plays a complete game of Snarl without any I/O, with each player controlled by a policy.
+        This follows the same flow as the server: adversaries are set up per level, actors start
+        at random positions, and players move in turn order before every adversary takes its turn.
+
+        Args:
+            levels ([Level]): Freshly built levels to play. They are changed by playing them.
+            players ([(str, policy)]): The name and policy of each player, in turn order.
+                A policy has a choose_move(player, valid_moves, level) method.
+            max_rounds (int): The number of rounds after which a level is ended with no winner.
+            seed (int): The seed for all of the game's randomness, including the policies'.
+        """
+        self.game = Game([], [], levels, seed)
+        self.game_manager = GameManager(self.game)
+        self.policies = {}
+        self.max_rounds = max_rounds
+        self.end_level_messages = []
+        self.rounds = []
+
+        for name, policy in players:
+            player = Player(name)
+            if self.game_manager.accept_player(player):
+                self.policies[player.id] = policy
+
+    @classmethod
+    def from_json(cls, json_levels, players, max_rounds=500, seed=None):
+        """
+        Creates a simulation from JSON level specifications, as read by read_levels_file.
+
+        Args:
+            json_levels ([JSON]): The level specifications.
+            players ([(str, policy)]): The name and policy of each player, in turn order.
+            max_rounds (int): The number of rounds after which a level is ended with no winner.
+            seed (int): The seed for all of the game's randomness, including the policies'.
+
+        Returns:
+            Simulation: The new simulation.
+        """
+        return cls([build_level(json_level) for json_level in json_levels], players, max_rounds, seed)
+
+    def setup_adversaries(self):
+        """
+        Set-up the Zombie and Ghost adversaries according to the level number.
+        """
+        current_level_num = self.game.levels.index(self.game.current_level)
+        num_zombies = math.floor(current_level_num / 2) + 1
+        num_ghosts = math.floor((current_level_num - 1) / 2)
+
+        for i in range(num_zombies):
+            zombie = Adversary("Z" + str(i))
+            zombie.set_type(Type.ZOMBIE)
+            self.game_manager.accept_adversary(zombie)
+
+        for i in range(num_ghosts):
+            ghost = Adversary("G" + str(i))
+            ghost.set_type(Type.GHOST)
+            self.game_manager.accept_adversary(ghost)
+
+    def level_init(self):
+        """
+        Initialize the beginning of a level, placing players and adversaries at random positions.
+        """
+        level = self.game.current_level
+        self.setup_adversaries()
+
+        for character in self.game.players + self.game.adversaries:
+            position = level.get_random_starting_position()
+            if position is None:
+                continue
+            if isinstance(character, Player):
+                level.place_player(character, position[0], position[1])
+            else:
+                level.place_adversary(character, position[0], position[1])
+
+        self.game_manager.player_turn = self.game.players[0].turn_id
+        self.game_manager.adversary_turn = 1
+        self.game_manager.start_game()
+
+    def is_level_done(self):
+        """
+        Whether the current level is over, either by a player exiting or by every player
+        having left the level.
+
+        Returns:
+            bool: Whether the level is over.
+        """
+        level = self.game.current_level
+        return level.level_over or len(level.players_exited) == len(self.game.players)
+
+    def play_round(self):
+        """
+        Plays a single round: every player left in the level moves, then every adversary.
+        """
+        level = self.game.current_level
+
+        while self.game_manager.whose_turn == Turn.PLAYER and not self.is_level_done():
+            player = self.game.players[self.game_manager.player_turn - 1]
+            if player in level.players_exited:
+                self.game_manager.change_player_turn()
+                continue
+
+            valid_moves = self.game_manager.send_player_moves(player)
+            move = self.policies[player.id].choose_move(player, valid_moves, level)
+            if not self.game_manager.accept_movement(move, player):
+                # An invalid move skips the player's turn by staying in place
+                if not self.game_manager.accept_movement((player.x_pos, player.y_pos), player):
+                    self.game_manager.change_player_turn()
+
+        if self.game_manager.whose_turn == Turn.ADVERSARY:
+            for adversary in self.game.adversaries:
+                if self.is_level_done():
+                    break
+                if adversary.x_pos is None:
+                    self.game_manager.change_adversary_turn()
+                elif not adversary.take_turn() and not adversary.take_turn():
+                    self.game_manager.change_adversary_turn()
+
+    def play_level(self):
+        """
+        Plays the current level until it is over or runs out of rounds.
+
+        Returns:
+            int: The number of rounds played.
+        """
+        rounds = 0
+        while not self.is_level_done():
+            if rounds == self.max_rounds:
+                self.game.current_level.level_over = True
+                break
+            self.play_round()
+            rounds += 1
+        return rounds
+
+    def run(self):
+        """
+        Plays the whole game.
+
+        Returns:
+            JSON: The end-game message with each player's scores and the game's seed.
+        """
+        while not self.game.is_end_of_game():
+            self.level_init()
+            self.rounds.append(self.play_level())
+            self.game.is_end_of_level()
+            self.end_level_messages.append(self.game.current_level.end_level_message)
+            self.game.level_up()
+
+        self.game_manager.end_game()
+        self.game.get_game_scores()
+        return self.game.end_game_message
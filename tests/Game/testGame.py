@@ -66,6 +66,27 @@ class TestGame(unittest.TestCase):
         example_game.level_up()
         self.assertEqual(example_game.current_level, example_level2)
 
+    def test_level_up_multiplayer(self):
+        p1 = Player("p1")
+        p2 = Player("p2")
+        p3 = Player("p3")
+        example_level = Level(6, 6)
+        example_level2 = Level(6, 6)
+        example_level.add_room(0, 0, Room(5, 5))
+        example_level2.add_room(0, 0, Room(5, 5))
+        example_game = Game([p1, p2, p3], [], [example_level, example_level2])
+
+        # Testing that the game does not level up while the players left are still playing
+        example_game.current_level.players_exited.append(p2)
+        example_game.level_up()
+        self.assertEqual(example_game.current_level, example_level)
+
+        # Testing that the game levels up once a player exits, even though other players are still in
+        example_game.current_level.level_over = True
+        example_game.level_up()
+        self.assertEqual(example_game.current_level, example_level2)
+        self.assertTrue(all(player.active and not player.exited for player in [p1, p2, p3]))
+
     def test_game_state(self):
         p1 = Player("p1")
         a1 = Adversary("a1")
@@ -252,5 +273,18 @@ class TestGame(unittest.TestCase):
                   "XXXXXXXXXX"]
         self.assertEqual(example_game.render_current_level(), layout)
 
+    def test_seed(self):
+        positions = []
+        for i in range(2):
+            example_level = Level(15, 15)
+            example_level.add_room(2, 3, Room(6, 6))
+            example_game = Game([], [], [example_level], seed=7)
+            positions.append([example_level.get_random_starting_position() for j in range(5)])
+
+        # Testing that the Game's seed drives its levels' randomness and is sent with the scores
+        self.assertEqual(positions[0], positions[1])
+        self.assertIs(example_level.random, example_game.random)
+        self.assertEqual(example_game.end_game_message["seed"], 7)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
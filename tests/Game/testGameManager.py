@@ -138,6 +138,42 @@ class TestGameManager(unittest.TestCase):
         # Accepting a valid movement from an adversary on their turn - now it's players turn
         self.assertEqual(example_manager.accept_movement((8, 8), a2), True)
 
+    def test_change_player_turn(self):
+        example_level = Level(10, 10)
+        example_level.add_room(0, 0, Room(5, 5))
+        example_game = Game([], [], [example_level])
+        example_manager = GameManager(example_game)
+        players = [Player("p" + str(i)) for i in range(1, 5)]
+        for player in players:
+            example_manager.accept_player(player)
+        example_manager.whose_turn = Turn.PLAYER
+
+        # Checking that the turn passes over a middle player who left the level, one player at a time
+        example_level.players_exited.append(players[1])
+        example_manager.change_player_turn()
+        self.assertEqual(example_manager.player_turn, 3)
+        example_manager.change_player_turn()
+        self.assertEqual(example_manager.player_turn, 4)
+        self.assertEqual(example_manager.whose_turn, Turn.PLAYER)
+
+        # Checking that the adversaries move after the last player left in the level
+        example_manager.change_player_turn()
+        self.assertEqual(example_manager.player_turn, 1)
+        self.assertEqual(example_manager.whose_turn, Turn.ADVERSARY)
+
+        # Checking that the players' turn ends when the player whose turn it was has left too
+        example_manager.whose_turn = Turn.PLAYER
+        example_manager.player_turn = 3
+        example_level.players_exited.append(players[3])
+        example_manager.change_player_turn()
+        self.assertEqual(example_manager.player_turn, 1)
+        self.assertEqual(example_manager.whose_turn, Turn.ADVERSARY)
+
+        # Checking that the turn resets once every player has left the level
+        example_level.players_exited.extend([players[0], players[2]])
+        example_manager.change_player_turn()
+        self.assertEqual(example_manager.player_turn, 1)
+
     def test_send_player_moves(self):
         p1 = Player("p1")
         p2 = Player("p2")
@@ -85,7 +85,78 @@ class TestLevelGeneration(unittest.TestCase):
         self.assertEqual(example_level.add_room(0, 0, Room(3, 4)), False)
         # Checking for adding a room that is valid
         self.assertEqual(example_level.rooms[0], example_room)
-        
+
+    def test_room_tiles(self):
+        """ Testing that a room keeps its tiles as compact flags once added, independent of the level
+        """
+        example_room = Room(4, 5)
+        example_level = Level(12, 12)
+        example_level.add_room(2, 3, example_room)
+        self.assertIsInstance(example_room.tiles, TileGrid)
+        self.assertTrue(example_room.tiles[0][0].border)
+        self.assertFalse(example_room.tiles[1][1].border)
+        self.assertTrue(example_room.tiles[1][1].in_room)
+        # Checking that the room's tiles keep their coordinates in the level, as they did before
+        self.assertEqual((example_room.origin_x, example_room.origin_y), (2, 3))
+        self.assertEqual((example_room.tiles[1][2].x_pos, example_room.tiles[1][2].y_pos), (3, 5))
+
+        # Checking that editing the level does not change the room, so it can be added elsewhere
+        example_level.tiles[3][4].key = True
+        self.assertFalse(example_room.tiles[1][1].key)
+        other_level = Level(6, 6)
+        self.assertTrue(other_level.add_room(0, 0, example_room))
+        self.assertTrue(other_level.tiles[0][0].border)
+        self.assertFalse(other_level.tiles[1][1].key)
+        self.assertEqual((example_room.tiles[1][2].x_pos, example_room.tiles[1][2].y_pos), (1, 2))
+
+    def test_tile_grid(self):
+        """ Testing that the level's tiles can be indexed like the old list-of-lists of tiles
+        """
+        example_level = Level(8, 10)
+        example_level.add_room(1, 2, Room(4, 5))
+        grid = example_level.tiles
+        self.assertEqual(len(grid), 8)
+        self.assertEqual(len(grid[0]), 10)
+        self.assertEqual(len(list(grid)), 8)
+        self.assertEqual(len(list(grid[2])), 10)
+        # Checking that void cells are 0 and tiles are views of their cell
+        self.assertEqual(grid[0][0], 0)
+        tile = grid[2][3]
+        self.assertIsInstance(tile, TileView)
+        self.assertEqual((tile.x_pos, tile.y_pos), (2, 3))
+        self.assertEqual(tile, grid[2][3])
+        self.assertEqual(hash(tile), hash(grid[2][3]))
+        # Checking negative indices and out of bounds access
+        self.assertEqual(grid[-7][-7], grid[1][3])
+        self.assertRaises(IndexError, lambda: grid[8])
+        self.assertRaises(IndexError, lambda: grid[-9])
+        self.assertRaises(IndexError, lambda: grid[0][10])
+        self.assertRaises(IndexError, lambda: grid[0][-11])
+
+    def test_tile_view_flags(self):
+        """ Testing that writing a tile's attributes writes the level's cells
+        """
+        example_level = Level(8, 8)
+        example_level.add_room(0, 0, Room(5, 5))
+        player = Player("p1")
+        walkable = example_level.get_walkable(player)
+        index = example_level.get_index(2, 2)
+        tile = example_level.tiles[2][2]
+        self.assertFalse(tile.border)
+
+        tile.border = True
+        self.assertTrue(example_level.cells[index] & CELL_BORDER)
+        self.assertTrue(example_level.tiles[2][2].border)
+        # Checking that the walkability masks are rebuilt after the write
+        self.assertEqual(walkable[index], 1)
+        self.assertEqual(example_level.get_walkable(player)[index], 0)
+
+        tile.border = False
+        tile.key = True
+        self.assertFalse(example_level.cells[index] & CELL_BORDER)
+        self.assertTrue(example_level.cells[index] & CELL_KEY)
+        self.assertFalse(example_level.tiles[2][3].key)
+
     def test_add_hallway(self):
         room1 = Room(5, 5)
         room2 = Room(4, 4)
@@ -111,6 +182,112 @@ class TestLevelGeneration(unittest.TestCase):
         self.assertEqual(example_level.add_hallway(1, 4, 6, 7, [(1,9), (3,9), (3,7)], room1, room2), True)
         self.assertEqual(len(example_level.hallways), 2)
 
+    def test_add_hallway_rolls_back(self):
+        """ Testing that a hallway that cannot be built leaves the level untouched
+        """
+        room1 = Room(5, 5)
+        room2 = Room(4, 4)
+        example_level = Level(12, 12)
+
+        example_level.add_room(0, 0, room1)
+        example_level.add_room(6, 6, room2)
+        layout = example_level.print_level()
+
+        # The second leg of this hallway runs back through room1
+        self.assertEqual(example_level.add_hallway(4, 1, 6, 7, [(8, 1), (8, 3), (2, 3)], room1, room2), False)
+        self.assertEqual(example_level.print_level(), layout)
+        self.assertEqual(len(example_level.hallways), 0)
+
+    def test_room_at(self):
+        """ Testing that we can look up the room containing a tile
+        """
+        room1 = Room(5, 5)
+        room2 = Room(4, 4)
+        example_level = Level(12, 12)
+
+        example_level.add_room(0, 0, room1)
+        example_level.add_room(6, 6, room2)
+        example_level.add_hallway(4, 1, 8, 6, [(8, 1)], room1, room2)
+
+        # Room tiles, including borders
+        self.assertEqual(example_level.room_at(2, 2), room1)
+        self.assertEqual(example_level.room_at(4, 4), room1)
+        self.assertEqual(example_level.room_at(9, 9), room2)
+        # Hallway, void and out of bounds tiles
+        self.assertEqual(example_level.room_at(6, 1), None)
+        self.assertEqual(example_level.room_at(11, 0), None)
+        self.assertEqual(example_level.room_at(12, 12), None)
+
+    def test_get_walkable(self):
+        """ Testing the walkability masks for each kind of actor
+        """
+        room1 = Room(5, 5)
+        room2 = Room(4, 4)
+        example_level = Level(12, 12)
+
+        example_level.add_room(0, 0, room1)
+        example_level.add_room(6, 6, room2)
+        example_level.add_hallway(4, 1, 8, 6, [(8, 1)], room1, room2)
+
+        player = Player("p1")
+        zombie = Adversary("z1")
+        zombie.set_type(Type.ZOMBIE)
+        ghost = Adversary("g1")
+        ghost.set_type(Type.GHOST)
+
+        floor = example_level.get_index(2, 2)
+        wall = example_level.get_index(0, 0)
+        hallway = example_level.get_index(6, 1)
+        void = example_level.get_index(11, 0)
+
+        self.assertEqual([example_level.get_walkable(player)[i] for i in (floor, wall, hallway, void)], [1, 0, 1, 0])
+        self.assertEqual([example_level.get_walkable(zombie)[i] for i in (floor, wall, hallway, void)], [1, 0, 0, 0])
+        self.assertEqual([example_level.get_walkable(ghost)[i] for i in (floor, wall, hallway, void)], [1, 1, 1, 0])
+
+        # Masks are rebuilt when the layout changes
+        example_level.tiles[2][2].border = True
+        self.assertEqual(example_level.get_walkable(player)[floor], 0)
+
+    def test_move_graph(self):
+        """ Testing the compact move graph: the moves from cell i are targets[offsets[i]:offsets[i + 1]]
+        """
+        room1 = Room(5, 5)
+        room2 = Room(5, 5)
+        example_level = Level(12, 12)
+        example_level.add_room(0, 0, room1)
+        example_level.add_room(6, 6, room2)
+        example_level.add_hallway(1, 4, 6, 7, [(1, 7)], room1, room2)
+        player = Player("p1")
+        zombie = Adversary("z1")
+        zombie.set_type(Type.ZOMBIE)
+        offsets, targets = example_level.get_move_graph(player)
+        self.assertEqual(len(offsets), 12 * 12 + 1)
+        self.assertEqual(offsets[0], 0)
+        self.assertEqual(offsets[-1], len(targets))
+
+        def moves(offsets, targets, x_pos, y_pos):
+            index = example_level.get_index(x_pos, y_pos)
+            return [divmod(target, 12) for target in targets[offsets[index]:offsets[index + 1]]]
+
+        # Checking a wall cell, which has no moves
+        self.assertEqual(moves(offsets, targets, 0, 0), [])
+        # Checking a cell next to the walls, which only has moves into the room
+        self.assertEqual(moves(offsets, targets, 1, 1), [(1, 1), (1, 2), (1, 3), (2, 1), (3, 1)])
+        # Checking the hallway corner, which players can turn but zombies cannot enter
+        self.assertEqual(moves(offsets, targets, 1, 7), [(1, 7), (1, 6), (1, 5), (2, 7), (3, 7)])
+        zombie_offsets, zombie_targets = example_level.get_move_graph(zombie)
+        self.assertEqual(moves(zombie_offsets, zombie_targets, 1, 7), [])
+        self.assertEqual(moves(zombie_offsets, zombie_targets, 1, 1), [(1, 1), (1, 2), (2, 1)])
+        player.x_pos, player.y_pos = 1, 7
+        self.assertEqual(list(example_level.get_moves(player)), [example_level.get_index(x, y)
+                         for x, y in [(1, 7), (1, 6), (1, 5), (2, 7), (3, 7)]])
+
+        # Checking that the graph is rebuilt once the layout changes
+        example_level.tiles[1][3].border = True
+        self.assertIsNot(example_level.get_move_graph(player)[1], targets)
+        offsets, targets = example_level.get_move_graph(player)
+        self.assertEqual(moves(offsets, targets, 1, 1), [(1, 1), (1, 2), (2, 1), (3, 1)])
+
     def test_travel(self):
         room1 = Room(5, 5)
         room2 = Room(4, 4)
@@ -265,6 +442,49 @@ class TestLevelGeneration(unittest.TestCase):
         example_level.place_player(player3, 8, 7)
         self.assertEqual(example_level.level_over, True)
 
+    def test_place_ghost(self):
+        """ Testing that a ghost moving into a wall is transported to a walkable room tile
+        """
+        ghost = Adversary("g1")
+        ghost.set_type(Type.GHOST)
+        zombie = Adversary("z1")
+        zombie.set_type(Type.ZOMBIE)
+
+        room1 = Room(4, 4)
+        example_level = Level(8, 8)
+        example_level.add_room(0, 0, room1)
+
+        # Room1 has four walkable tiles, the zombie takes one of them
+        example_level.place_adversary(zombie, 1, 1)
+        self.assertEqual(len(example_level.get_open_cells()), 3)
+
+        for i in range(20):
+            self.assertEqual(example_level.place_adversary(ghost, 0, 1), True)
+            self.assertIn((ghost.x_pos, ghost.y_pos), [(1, 2), (2, 1), (2, 2)])
+            self.assertEqual(example_level.tiles[ghost.x_pos][ghost.y_pos].characters, [ghost])
+            # The ghost's tile leaves the pool and the tile it came from returns to it
+            self.assertEqual(len(example_level.get_open_cells()), 2)
+
+        # Moving onto a void tile fails
+        self.assertEqual(example_level.place_adversary(ghost, 6, 6), False)
+
+    def test_get_random_starting_position(self):
+        """ Testing that starting positions avoid actors, keys and the level exit
+        """
+        player1 = Player("p1")
+        room1 = Room(4, 4)
+        example_level = Level(8, 8)
+        example_level.add_room(0, 0, room1)
+        example_level.set_key(1, 1)
+        example_level.set_level_exit(1, 2)
+        example_level.place_player(player1, 2, 1)
+
+        for i in range(20):
+            self.assertEqual(example_level.get_random_starting_position(), (2, 2))
+
+        example_level.place_player(Player("p2"), 2, 2)
+        self.assertEqual(example_level.get_random_starting_position(), None)
+
     def test_remove_character(self):
         player1 = Player(1)
         player2 = Player(2)
@@ -306,6 +526,63 @@ class TestLevelGeneration(unittest.TestCase):
                   "XXXXXXXXXXXX", 
                   "XXXXXXXXXXXX"]
 
+    def test_occupancy(self):
+        """ Testing that the level tracks who is standing where as characters move and are ejected
+        """
+        player1 = Player("p1")
+        adversary1 = Adversary("a1")
+        adversary1.set_type(Type.ZOMBIE)
+
+        room1 = Room(5, 5)
+        example_level = Level(6, 6)
+        example_level.add_room(0, 0, room1)
+
+        example_level.place_player(player1, 1, 1)
+        example_level.place_adversary(adversary1, 3, 3)
+        example_level.place_player(player1, 1, 2)
+        self.assertEqual(example_level.player_at, {example_level.get_index(1, 2): player1})
+        self.assertEqual(example_level.positions[player1], example_level.get_index(1, 2))
+
+        # The zombie catches the player, who is removed while the zombie stays
+        example_level.place_adversary(adversary1, 1, 2)
+        self.assertEqual(player1.active, False)
+        self.assertEqual(example_level.player_at, {})
+        self.assertEqual(example_level.adversary_at, {example_level.get_index(1, 2): adversary1})
+        self.assertEqual(example_level.tiles[1][2].characters, [adversary1])
+        self.assertEqual(example_level.tiles[3][3].characters, [])
+
+        # Placing the player on a second level does not touch the first
+        example_level2 = Level(6, 6)
+        example_level2.add_room(0, 0, Room(5, 5))
+        example_level2.place_player(player1, 1, 2)
+        self.assertEqual(example_level.tiles[1][2].characters, [adversary1])
+        self.assertEqual(example_level2.tiles[1][2].characters, [player1])
+
+    def test_take_changed_cells(self):
+        """ Testing that the level records the cells where actors and objects changed
+        """
+        player1 = Player("p1")
+        adversary1 = Adversary("a1")
+        adversary1.set_type(Type.ZOMBIE)
+
+        example_level = Level(8, 8)
+        example_level.add_room(0, 0, Room(7, 7))
+        example_level.set_key(2, 3)
+
+        example_level.place_player(player1, 1, 1)
+        example_level.place_adversary(adversary1, 5, 5)
+        self.assertEqual(example_level.take_changed_cells(), {example_level.get_index(1, 1), example_level.get_index(5, 5)})
+
+        # Staying in place changes nothing, while moving changes both cells
+        example_level.place_player(player1, 1, 1)
+        self.assertEqual(example_level.take_changed_cells(), set())
+        example_level.place_player(player1, 1, 3)
+        self.assertEqual(example_level.take_changed_cells(), {example_level.get_index(1, 1), example_level.get_index(1, 3)})
+
+        # Picking up the key changes the key's cell
+        example_level.place_player(player1, 2, 3)
+        self.assertEqual(example_level.take_changed_cells(), {example_level.get_index(1, 3), example_level.get_index(2, 3)})
+
     def test_print_level_one_room(self):
         """Testing generating a level with one room
         """
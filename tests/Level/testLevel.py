@@ -108,19 +108,8 @@ def add_hallways(level, hallways):
         waypoints_t = []
         for w in waypoints:
             waypoints_t.append((w[0], w[1]))
-        room1 = None
-        room2 = None
-        for room in level.rooms:
-            for t in room.tiles:
-                for a in t:
-                    if a.x_pos == from_[0] and a.y_pos == from_[1]:
-                        room1 = room
-
-        for room in level.rooms:
-            for t in room.tiles:
-                for a in t:
-                    if a.x_pos == to[0] and a.y_pos == to[1]:
-                        room2 = room
+        room1 = level.room_at(from_[0], from_[1])
+        room2 = level.room_at(to[0], to[1])
         level.add_hallway(from_[0], from_[1], to[0], to[1], waypoints_t, room1, room2)
 
 def check_traversable(level, point_to_check):
@@ -188,24 +177,22 @@ def check_location_and_reachable(level, point_to_check, reachable):
     if isinstance(tile, Tile):
         if tile.in_room:
             type_ = "room"
-            for room in testing_level.rooms:
-                for t in room.tiles:
-                    for a in t:
-                        if a.x_pos == point_to_check[0] and a.y_pos == point_to_check[1]:
-                            for hallway in (testing_level.hallways):
-                                c1 = hallway.connecting_rooms[0]
-                                c1_coords = [c1.origin_x, c1.origin_y]
-                                c2 = hallway.connecting_rooms[1]
-                                c2_coords = [c2.origin_x, c2.origin_y]
-                                # print("room coords")
-                                # print(c1_coords)
-                                # print(c2_coords)
-                                if room == c1 and c2_coords not in reachable:
-                                    # print("appending [1]")
-                                    reachable.append(c2_coords)
-                                if room == c2 and c1_coords not in reachable:
-                                    # print("appending [0]")
-                                    reachable.append(c1_coords)
+            room = testing_level.room_at(point_to_check[0], point_to_check[1])
+            if room:
+                for hallway in (testing_level.hallways):
+                    c1 = hallway.connecting_rooms[0]
+                    c1_coords = [c1.origin_x, c1.origin_y]
+                    c2 = hallway.connecting_rooms[1]
+                    c2_coords = [c2.origin_x, c2.origin_y]
+                    # print("room coords")
+                    # print(c1_coords)
+                    # print(c2_coords)
+                    if room == c1 and c2_coords not in reachable:
+                        # print("appending [1]")
+                        reachable.append(c2_coords)
+                    if room == c2 and c1_coords not in reachable:
+                        # print("appending [0]")
+                        reachable.append(c1_coords)
         elif tile.in_hallway:
             type_ = "hallway"
             for hallway in testing_level.hallways:
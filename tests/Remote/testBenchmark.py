@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import asyncio
+import tempfile
+import unittest
+sys.path.append('../../src/Game')
+sys.path.append('../../src/Player')
+sys.path.append('../../src/Common')
+sys.path.append('../../src/Remote')
+from benchmark import *
+
+LEVELS_FILE = '../../src/Remote/snarl.levels'
+
+class TestBenchmark(unittest.TestCase):
+    def test_run_benchmark(self):
+        first = asyncio.run(run_benchmark(LEVELS_FILE, num_bots=2, num_games=2, num_clients=2, seed=0))
+        second = asyncio.run(run_benchmark(LEVELS_FILE, num_bots=2, num_games=2, num_clients=2, seed=0))
+
+        # Testing that every game is played to the end
+        self.assertEqual(first["bots"], 2)
+        self.assertEqual(first["games"], 2)
+        self.assertGreater(first["games_per_second"], 0)
+        self.assertIsNotNone(first["latency_p99"])
+        self.assertGreater(first["peak_rss_kb"], 0)
+        self.assertEqual(first["settings"]["seed"], 0)
+
+        # Testing that a fixed seed replays the same games
+        self.assertEqual(first["moves"], second["moves"])
+
+    def test_without_valid_moves(self):
+        results = asyncio.run(run_benchmark(LEVELS_FILE, num_bots=2, num_games=2, num_clients=2, seed=0,
+                                            send_moves=None))
+
+        # Testing that bots check their own moves when the server does not send the valid moves
+        self.assertEqual(results["games"], 2)
+        self.assertEqual(results["invalid_moves"], 0)
+        self.assertIsNone(results["settings"]["send_moves"])
+
+    def test_unix_socket(self):
+        unix_path = os.path.join(tempfile.mkdtemp(), "snarl.sock")
+        results = asyncio.run(run_benchmark(LEVELS_FILE, num_bots=2, num_games=2, num_clients=2, seed=0,
+                                            unix_path=unix_path))
+
+        # Testing that bots play over the Unix domain socket, which is removed afterwards
+        self.assertEqual(results["games"], 2)
+        self.assertEqual(results["settings"]["unix"], unix_path)
+        self.assertFalse(os.path.exists(unix_path))
+
+    def test_unequal_games(self):
+        # Testing that every bot must play the same number of games
+        self.assertRaises(ValueError, asyncio.run, run_benchmark(LEVELS_FILE, num_bots=3, num_games=1, num_clients=2))
+
+if __name__ == '__main__':
+    unittest.main()
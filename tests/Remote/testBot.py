@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import socket
+import asyncio
+import tempfile
+import unittest
+sys.path.append('../../src/Game')
+sys.path.append('../../src/Player')
+sys.path.append('../../src/Common')
+sys.path.append('../../src/Remote')
+from Remote import *
+from bot import *
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+# A single small room, so that bots always see the key and the exit and every game ends quickly
+SMALL_LEVELS = """1
+
+{ "type": "level",
+  "rooms": [ { "type": "room", "origin": [ 0, 0 ], "bounds": { "rows": 5, "columns": 5 },
+               "layout": [ [ 1, 1, 1, 1, 1 ], [ 1, 1, 1, 1, 1 ], [ 1, 1, 1, 1, 1 ],
+                           [ 1, 1, 1, 1, 1 ], [ 1, 1, 1, 1, 1 ] ] } ],
+  "hallways": [],
+  "objects": [ { "type": "key", "position": [ 1, 1 ] }, { "type": "exit", "position": [ 3, 3 ] } ] }
+"""
+
+class TestPolicies(unittest.TestCase):
+    def make_state(self, objects):
+        state = ViewState()
+        state.update = {"position": [2, 2], "objects": objects, "layout": [[1] * 5 for _ in range(5)]}
+        return state
+
+    def test_random_policy(self):
+        policy = RandomMovePolicy(0)
+
+        # Testing that the random policy only picks from the valid moves it was sent
+        self.assertIn(policy.choose_move(self.make_state([]), [(2, 3), (3, 2)]), [(2, 3), (3, 2)])
+        self.assertIsNone(policy.choose_move(self.make_state([]), []))
+
+    def test_seek_policy(self):
+        policy = SeekMovePolicy(0)
+        state = self.make_state([{"type": "key", "position": [2, 4]}])
+
+        # Testing that the seek policy heads for the key in sight
+        self.assertEqual(policy.choose_move(state, [(2, 1), (2, 3), (1, 2)]), (2, 3))
+
+    def test_seek_key_found(self):
+        policy = SeekMovePolicy(0)
+        exit = {"type": "exit", "position": [2, 0]}
+
+        # Testing that the seek policy moves at random before it has seen anything
+        self.assertIn(policy.choose_move(ViewState(), [(2, 3)]), [(2, 3)])
+
+        # Testing that the seek policy heads for the exit once its own move found the key
+        policy.choose_move(self.make_state([{"type": "key", "position": [2, 4]}, exit]), [(2, 3)])
+        policy.move_result("Key")
+        self.assertEqual(policy.choose_move(self.make_state([exit]), [(2, 1), (2, 3)]), (2, 1))
+
+        # Testing that the seek policy notices another player found the key when its spot is in sight without it
+        policy.start_level()
+        self.assertEqual(policy.choose_move(self.make_state([{"type": "key", "position": [2, 4]}, exit]), [(2, 1), (2, 3)]), (2, 3))
+        self.assertEqual(policy.choose_move(self.make_state([exit]), [(2, 1), (2, 3)]), (2, 1))
+
+class TestSummary(unittest.TestCase):
+    def test_percentile(self):
+        values = [float(i) for i in range(1, 101)]
+        self.assertEqual(percentile(values, 0.5), 50.0)
+        self.assertEqual(percentile(values, 0.99), 99.0)
+        self.assertEqual(percentile([3.0], 0.9), 3.0)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_summarize(self):
+        bot1 = Bot("a")
+        bot2 = Bot("b")
+        bot1.latencies, bot1.moves, bot1.games = [0.1, 0.3], 2, 0.5
+        bot2.latencies, bot2.moves, bot2.games, bot2.invalid_moves = [0.2], 1, 0.5, 1
+        summary = summarize([bot1, bot2], 2)
+
+        # Testing that the shares of a game's bots add up to one game
+        self.assertEqual(summary["games"], 1)
+        self.assertEqual(summary["games_per_second"], 0.5)
+        self.assertEqual(summary["moves"], 3)
+        self.assertEqual(summary["invalid_moves"], 1)
+        self.assertEqual(summary["latency_p50"], 0.2)
+
+class TestBot(unittest.TestCase):
+    def test_message_latency(self):
+        server_end, client_end = loopback_pair()
+
+        async def connect():
+            return client_end
+
+        async def serve():
+            await server_end.send("name")
+            name = await server_end.receive()
+            await server_end.send("move")
+            await server_end.receive()
+            await server_end.send("OK")
+            await server_end.send({"type": "end-game", "scores": [{"name": name}]})
+
+        async def run():
+            bot = Bot("a", connector=connect)
+            await asyncio.gather(serve(), bot.play())
+            return bot
+
+        bot = asyncio.run(run())
+
+        # Testing that the latency of every message the bot sends is recorded, its name as well as its move
+        self.assertEqual(len(bot.latencies), 2)
+        self.assertEqual(bot.moves, 1)
+        self.assertEqual(bot.games, 1)
+
+class TestBots(unittest.TestCase):
+    def make_remote(self):
+        levels_file = tempfile.NamedTemporaryFile("w", suffix=".levels", delete=False)
+        levels_file.write(SMALL_LEVELS)
+        levels_file.close()
+        self.addCleanup(os.remove, levels_file.name)
+
+        remote = Remote()
+        remote.levels_file = levels_file.name
+        remote.num_clients = 2
+        remote.num_games = 2
+        remote.port = get_free_port()
+        remote.pacing = Pacing(0)
+        remote.send_moves = "list"
+        remote.turn_timeout = 5
+        return remote
+
+    def test_run_bots(self):
+        remote = self.make_remote()
+
+        async def run():
+            server = asyncio.ensure_future(remote.serve())
+            await asyncio.sleep(0.1)
+            summary = await asyncio.wait_for(run_bots(4, "seek", port=remote.port, seed=0), 60)
+            await asyncio.wait_for(server, 60)
+            return summary
+
+        summary = asyncio.run(run())
+
+        # Testing that four bots play two games against one server
+        self.assertEqual(summary["bots"], 4)
+        self.assertEqual(summary["games"], 2)
+        self.assertEqual(summary["invalid_moves"], 0)
+        self.assertGreater(summary["moves"], 0)
+        self.assertIsNotNone(summary["latency_p99"])
+
+    def test_loopback(self):
+        remote = self.make_remote()
+
+        async def run():
+            server = asyncio.ensure_future(remote.serve())
+            await asyncio.sleep(0.1)
+            summary = await asyncio.wait_for(run_bots(4, "seek", seed=0, connector=remote.connect_loopback), 60)
+            await asyncio.wait_for(server, 60)
+            return summary
+
+        summary = asyncio.run(run())
+
+        # Testing that bots play whole games in-process, without sockets
+        self.assertEqual(summary["games"], 2)
+        self.assertEqual(summary["invalid_moves"], 0)
+        self.assertEqual(remote.accepting, set())
+
+if __name__ == '__main__':
+    unittest.main()
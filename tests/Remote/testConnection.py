@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+import sys
+import asyncio
+import unittest
+sys.path.append('../../src/Game')
+sys.path.append('../../src/Remote')
+from connection import *
+
+class SlowTransport:
+    def __init__(self):
+        self.aborted = False
+
+    def abort(self):
+        self.aborted = True
+
+class SlowWriter:
+    def __init__(self):
+        self.data = b''
+        self.transport = SlowTransport()
+        self.closed = False
+        self.ready = asyncio.Event()
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        # The client is not reading until the test lets it
+        await self.ready.wait()
+
+    def close(self):
+        self.closed = True
+
+class TestConnection(unittest.TestCase):
+    def test_write_queue(self):
+        async def send():
+            writer = SlowWriter()
+            conn = Connection(None, writer)
+            await conn.send("move")
+            await asyncio.sleep(0)
+            await conn.send_all(["OK", "Key"])
+            await conn.send("Exit")
+            depth = conn.get_queue_depth()
+            writer.ready.set()
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            return conn, writer, depth
+
+        # Testing that sends do not wait for a slow client, and queued messages go out in one write
+        conn, writer, depth = asyncio.run(send())
+        self.assertEqual(depth, 3)
+        self.assertEqual(writer.data, b'"move"\n"OK"\n"Key"\n"Exit"\n')
+        self.assertEqual((conn.get_queue_depth(), conn.peak_queue_depth), (0, 3))
+
+    def test_overflow_keyframe(self):
+        async def send():
+            conn = Connection(None, SlowWriter(), max_queue=3)
+            await conn.send("move")
+            await asyncio.sleep(0)
+            for i in range(3):
+                await conn.send_all([{"type": "player-delta", "position": [i, 0]}, "OK"])
+            return conn
+
+        # Testing that a client that falls behind has its queued updates dropped for a keyframe
+        conn = asyncio.run(send())
+        self.assertEqual(list(conn.outgoing), ["OK", "OK", "OK"])
+        self.assertTrue(conn.needs_keyframe)
+        self.assertEqual(conn.overflows, 2)
+        self.assertFalse(conn.closed)
+
+    def test_overflow_disconnect(self):
+        async def send():
+            writer = SlowWriter()
+            conn = Connection(None, writer, max_queue=3, overflow="disconnect")
+            await conn.send("move")
+            await asyncio.sleep(0)
+            await conn.send_all(["OK", "Key", "Exit", "Eject"])
+            await conn.send("OK")
+            return conn, writer
+
+        # Testing that a client that falls behind is disconnected, and later messages are dropped
+        conn, writer = asyncio.run(send())
+        self.assertTrue(conn.closed)
+        self.assertTrue(writer.transport.aborted)
+        self.assertEqual(conn.get_queue_depth(), 0)
+
+    def test_close(self):
+        async def send():
+            writer = SlowWriter()
+            conn = Connection(None, writer)
+            await conn.send("move")
+            await asyncio.sleep(0)
+            await conn.send({"type": "end-game", "scores": []})
+            conn.close()
+            return writer
+
+        # Testing that messages still queued are written before the connection closes
+        writer = asyncio.run(send())
+        self.assertEqual(writer.data, b'"move"\n{"type":"end-game","scores":[]}\n')
+        self.assertTrue(writer.closed)
+
+class TestLoopbackConnection(unittest.TestCase):
+    def test_send_receive(self):
+        async def exchange():
+            server_end, client_end = loopback_pair()
+            await server_end.send_all(["name", {"type": "view", "position": (1, 2)}])
+            await client_end.send("p1")
+            return [await client_end.receive(), await client_end.receive(), await server_end.receive()]
+
+        # Testing that messages arrive in order, as the JSON values a socket would carry
+        self.assertEqual(asyncio.run(exchange()), ["name", {"type": "view", "position": [1, 2]}, "p1"])
+
+    def test_close(self):
+        async def exchange():
+            server_end, client_end = loopback_pair()
+            await server_end.send({"type": "end-game", "scores": []})
+            server_end.close()
+            await server_end.send("move")
+            return [await client_end.receive(), await client_end.receive(), await server_end.receive()]
+
+        # Testing that messages sent before closing are received, followed by the end of the connection
+        self.assertEqual(asyncio.run(exchange()), [{"type": "end-game", "scores": []}, None, None])
+
+    def test_abort(self):
+        async def exchange():
+            server_end, client_end = loopback_pair()
+            await server_end.send_all(["OK", "move"])
+            server_end.abort()
+            return await client_end.receive()
+
+        # Testing that aborting drops the messages that were not yet received
+        self.assertIsNone(asyncio.run(exchange()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+import sys
+import random
+import unittest
+sys.path.append('../../src/Remote')
+from delta import *
+
+def make_state(layout, view, position=[1, 1], message=""):
+    update = {"type": "player-update", "layout": layout, "position": position,
+              "objects": [], "actors": [], "message": message}
+    return update, {"type": "view", "view": view}
+
+class TestDelta(unittest.TestCase):
+    def test_make_delta(self):
+        old = make_state([[0, 1], [1, 1]], ["X.", ".."])
+        new = make_state([[0, 1], [1, 2]], ["X.", ".|"], [1, 2])
+
+        # Testing that only changed cells, rows and fields are sent
+        self.assertEqual(make_delta(old[0], old[1], new[0], new[1]),
+                         {"type": "player-delta", "layout-cells": [[1, 1, 2]],
+                          "position": [1, 2], "view-rows": [[1, ".|"]]})
+        self.assertEqual(make_delta(old[0], old[1], old[0], old[1]), None)
+
+        # Testing that a view with a new shape is sent whole
+        clamped = make_state([[0, 1], [1, 1]], ["X.", "..", "XX"])
+        self.assertEqual(make_delta(old[0], old[1], clamped[0], clamped[1])["view"], ["X.", "..", "XX"])
+
+    def test_keyframes(self):
+        encoder = ViewEncoder(keyframe_interval=2)
+        states = [make_state([[0, 1]], ["X."], message=str(i)) for i in range(5)]
+
+        # Testing that deltas are sent between keyframes
+        kinds = []
+        for update, view in states:
+            kinds.append([key for key, message in encoder.encode(update, view)])
+            encoder.commit()
+        self.assertEqual(kinds, [["player-update", "view"], ["player-delta"], ["player-delta"],
+                                 ["player-update", "view"], ["player-delta"]])
+
+        # Testing that a delta cannot be applied before a keyframe
+        self.assertFalse(ViewState().apply({"type": "player-delta", "message": "x"}))
+
+    def test_reconstruct(self):
+        rng = random.Random(0)
+        encoder = ViewEncoder(keyframe_interval=5)
+        client = ViewState()
+        pending = {}
+        for tick in range(500):
+            # A random state, with views of different shapes as at the edges of a level
+            rows = rng.choice([3, 4, 5])
+            layout = [[rng.choice([0, 1, 2]) for j in range(5)] for i in range(5)]
+            view = ["".join(rng.choice("X.|") for j in range(5)) for i in range(rows)]
+            update, view_message = make_state(layout, view, [rng.randint(0, 3), 2], rng.choice(["", "p1 found the key"]))
+            if rng.random() < 0.05:
+                encoder.request_keyframe()
+
+            for key, message in encoder.encode(update, view_message):
+                pending.pop(key, None)
+                if message is not None:
+                    pending[key] = message
+
+            # Flushing some of the time, as with the round and time flush policies
+            if rng.random() < 0.5:
+                for message in pending.values():
+                    self.assertTrue(client.apply(message))
+                pending = {}
+                encoder.commit()
+
+                # Testing that the client's copy matches what the server last sent
+                self.assertEqual(client.update, update)
+                self.assertEqual(client.view, view)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import sys
+import unittest
+sys.path.append('../../src/Game')
+sys.path.append('../../src/Remote')
+from protocol import *
+
+class TestProtocol(unittest.TestCase):
+    def test_encode_message(self):
+        # Testing that every message is one JSON value on its own line
+        self.assertEqual(encode_message("move"), b'"move"\n')
+        self.assertEqual(encode_message({"type": "move", "to": [1, 2]}), b'{"type":"move","to":[1,2]}\n')
+        self.assertEqual(encode_messages(["OK", "Key"]), b'"OK"\n"Key"\n')
+
+    def test_decode_coalesced(self):
+        decoder = MessageDecoder()
+        data = encode_messages(["OK", {"type": "view", "view": ["..."]}, "move"])
+
+        # Testing that one read can carry several messages
+        self.assertEqual(decoder.feed(data), ["OK", {"type": "view", "view": ["..."]}, "move"])
+
+    def test_decode_split(self):
+        decoder = MessageDecoder()
+        data = encode_messages([{"type": "player-update", "message": "p1 found the key"}, "move"])
+
+        # Testing that messages split across reads are decoded once complete
+        self.assertEqual(decoder.feed(data[:10]), [])
+        self.assertEqual(decoder.feed(data[10:-3]), [{"type": "player-update", "message": "p1 found the key"}])
+        self.assertEqual(decoder.feed(data[-3:]), ["move"])
+
+    def test_decode_malformed(self):
+        decoder = MessageDecoder(max_frame_size=16)
+
+        # Testing that frames which are not JSON are skipped, and that endless frames are rejected
+        self.assertEqual(decoder.feed(b'move\n"OK"\n\n'), ["OK"])
+        self.assertEqual(decoder.errors, 1)
+        self.assertRaises(ProtocolError, decoder.feed, b'"' + b'x' * 16)
+
+    def test_decode_oversized(self):
+        decoder = MessageDecoder(max_frame_size=16)
+
+        # Testing that a complete frame that is too long is rejected, even when it arrives in one read
+        self.assertEqual(decoder.feed(b'"' + b'x' * 14 + b'"\n'), ['x' * 14])
+        self.assertRaises(ProtocolError, decoder.feed, b'"' + b'x' * 16 + b'"\n"OK"\n')
+
+    def test_decode_large_frame(self):
+        decoder = MessageDecoder()
+        data = encode_message({"type": "view", "view": ["x" * 100000]})
+
+        # Testing that a large frame read in small chunks is decoded once complete, and not kept after
+        for i in range(0, len(data) - 1, 1000):
+            self.assertEqual(decoder.feed(data[i:min(i + 1000, len(data) - 1)]), [])
+        self.assertEqual(len(decoder.buffer), len(data) - 1)
+        self.assertEqual(decoder.feed(data[-1:]), [{"type": "view", "view": ["x" * 100000]}])
+        self.assertEqual(len(decoder.buffer), 0)
+
+    def test_get_move_destination(self):
+        self.assertEqual(get_move_destination({"type": "move", "to": [3, 4]}), (3, 4))
+        self.assertEqual(get_move_destination({"type": "move", "to": None}), None)
+        self.assertEqual(get_move_destination({"type": "move", "to": [3, "4"]}), None)
+        self.assertEqual(get_move_destination({"type": "name", "to": [3, 4]}), None)
+        self.assertEqual(get_move_destination("move"), None)
+
+    def test_move_mask(self):
+        moves = [(5, 5), (5, 4), (5, 3), (6, 5)]
+        mask = encode_move_mask((5, 5), moves)
+
+        # Testing that a mask holds one bit per step and decodes back to the valid moves
+        self.assertEqual(mask, 0b10000111)
+        self.assertEqual(decode_move_mask((5, 5), mask), moves)
+        self.assertEqual(get_valid_moves({"type": "move-request", "position": [5, 5], "mask": mask}), moves)
+        self.assertEqual(get_valid_moves({"type": "move-request", "moves": [[5, 5], [6, 5]]}), [(5, 5), (6, 5)])
+        self.assertEqual(get_valid_moves("move"), None)
+
+if __name__ == '__main__':
+    unittest.main()
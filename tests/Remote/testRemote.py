@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+
+import sys
+import asyncio
+import unittest
+sys.path.append('../../src/Game')
+sys.path.append('../../src/Player')
+sys.path.append('../../src/Common')
+sys.path.append('../../src/Remote')
+from Remote import *
+
+class RecordingConnection:
+    def __init__(self):
+        self.writes = []
+        self.closed = False
+        self.needs_keyframe = False
+
+    async def send_all(self, messages):
+        self.writes.append(messages)
+
+class SilentConnection(RecordingConnection):
+    async def receive(self):
+        await asyncio.sleep(60)
+
+class ScriptedConnection:
+    def __init__(self, replies, delay=0):
+        self.replies = list(replies)
+        self.delay = delay
+        self.sent = []
+        self.closed = False
+
+    def get_address(self):
+        return "test"
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    async def receive(self):
+        await asyncio.sleep(self.delay)
+        return self.replies.pop(0)
+
+    def close(self):
+        self.closed = True
+
+class TestPacing(unittest.TestCase):
+    def test_round_delay(self):
+        self.assertEqual(Pacing(2).round_delay, 2)
+        self.assertEqual(Pacing(2, 0.5).round_delay, 0.5)
+        self.assertEqual(Pacing(0).round_delay, 0)
+
+    def test_zero_delay(self):
+        # Testing that without a delay a message is sent without waiting at all
+        waiting = Pacing(0).before_message()
+        self.assertRaises(StopIteration, waiting.send, None)
+
+        async def round_yields():
+            others = []
+            other = asyncio.ensure_future(asyncio.sleep(0))
+            other.add_done_callback(others.append)
+            await Pacing(0).before_round()
+            return others
+
+        # Testing that a round still lets the other games take their turn
+        self.assertEqual(len(asyncio.run(round_yields())), 1)
+
+    def test_delay(self):
+        async def wait():
+            loop = asyncio.get_event_loop()
+            start = loop.time()
+            pacing = Pacing(0.02, 0.03)
+            await pacing.before_message()
+            after_message = loop.time()
+            await pacing.before_round()
+            return after_message - start, loop.time() - after_message
+
+        # Testing that messages and rounds wait for their delays
+        message_wait, round_wait = asyncio.run(wait())
+        self.assertGreaterEqual(message_wait, 0.02)
+        self.assertGreaterEqual(round_wait, 0.03)
+
+class TestOutbox(unittest.TestCase):
+    def test_flush(self):
+        conn1 = RecordingConnection()
+        conn2 = RecordingConnection()
+        outbox = Outbox()
+        outbox.queue(conn1, "OK")
+        outbox.queue(conn1, {"type": "view", "view": ["old"]}, "view")
+        outbox.queue(conn2, {"type": "view", "view": ["other"]}, "view")
+        outbox.queue(conn1, "move")
+        outbox.queue(conn1, {"type": "view", "view": ["new"]}, "view")
+        asyncio.run(outbox.flush())
+
+        # Testing that each connection gets one write, with newer views replacing older ones
+        self.assertEqual(conn1.writes, [["OK", "move", {"type": "view", "view": ["new"]}]])
+        self.assertEqual(conn2.writes, [[{"type": "view", "view": ["other"]}]])
+        self.assertTrue(outbox.is_empty())
+
+    def test_is_due(self):
+        self.assertTrue(Outbox("move").is_due())
+        self.assertFalse(Outbox("round").is_due())
+        self.assertFalse(Outbox("time", 60).is_due())
+        self.assertTrue(Outbox("time", 0).is_due())
+        self.assertRaises(ValueError, Outbox, "never")
+
+class TestGameSession(unittest.TestCase):
+    def make_session(self):
+        level = Level(20, 20)
+        level.add_room(0, 0, Room(19, 19))
+        session = GameSession([level], seed=0, pacing=Pacing(0))
+        conns = []
+        for name, position in [("p1", (2, 2)), ("p2", (15, 15))]:
+            conns.append(RecordingConnection())
+            session.add_player(conns[-1], name)
+            level.place_player(session.game.players[-1], position[0], position[1])
+        return session, conns
+
+    def test_send_player_updates(self):
+        session, (conn1, conn2) = self.make_session()
+        asyncio.run(session.start_level())
+        asyncio.run(session.send_player_updates())
+
+        # Testing that every player gets the level start and a first update
+        self.assertEqual([message["type"] for message in conn1.writes[0]], ["start-level", "player-update", "view"])
+        self.assertEqual([message["type"] for message in conn2.writes[0]], ["start-level", "player-update", "view"])
+
+        # Testing that only the player who can see a move is sent an update
+        session.game.current_level.place_player(session.game.players[0], 2, 4)
+        asyncio.run(session.send_player_updates())
+        self.assertEqual(len(conn1.writes), 2)
+        self.assertEqual(len(conn2.writes), 1)
+        self.assertEqual((session.updates_sent, session.updates_skipped), (3, 1))
+
+    def test_send_player_deltas(self):
+        session, (conn1, conn2) = self.make_session()
+        session.view_encoders = [ViewEncoder(), ViewEncoder()]
+        asyncio.run(session.start_level())
+        asyncio.run(session.send_player_updates())
+
+        # Testing that a move is sent as a delta after the keyframe
+        session.game.current_level.place_player(session.game.players[0], 2, 3)
+        asyncio.run(session.send_player_updates())
+        delta = conn1.writes[1][0]
+        self.assertEqual(delta["type"], "player-delta")
+        self.assertEqual(delta["position"], [2, 3])
+
+        # Testing that a client whose queued updates were dropped is sent a keyframe
+        conn1.needs_keyframe = True
+        asyncio.run(session.send_player_updates())
+        self.assertEqual([message["type"] for message in conn1.writes[2]], ["player-update", "view"])
+        self.assertFalse(conn1.needs_keyframe)
+
+    def test_disconnected_player(self):
+        session, (conn1, conn2) = self.make_session()
+        session.game.current_level.players_exited.append(session.game.players[0])
+        conn2.closed = True
+        asyncio.run(session.start_level())
+        asyncio.run(session.play_round())
+
+        # Testing that a disconnected player is taken out of the level, ending it
+        self.assertIn(session.game.players[1], session.game.current_level.players_exited)
+        self.assertTrue(session.is_level_done())
+
+    def test_turn_timeout(self):
+        session, (conn1, conn2) = self.make_session()
+        session.timer_wheel = TimerWheel(tick=0.01)
+        session.turn_timeout = 0.05
+        conn = SilentConnection()
+        asyncio.run(session.start_level())
+        asyncio.run(session.play_player_turn(session.game.players[0], conn))
+
+        # Testing that a player who does not move in time stays in place and the turn moves on
+        self.assertEqual(session.turns_timed_out, 1)
+        self.assertEqual((session.game.players[0].x_pos, session.game.players[0].y_pos), (2, 2))
+        self.assertEqual(session.game_manager.player_turn, 2)
+
+    def test_move_at_deadline(self):
+        session, (conn1, conn2) = self.make_session()
+        session.turn_timeout = 1
+        deadlines = []
+        session.timer_wheel = TimerWheel()
+
+        def schedule(delay, callback):
+            deadlines.append(callback)
+            return Deadline(session.timer_wheel, 0, callback)
+
+        session.timer_wheel.schedule = schedule
+        conn = ScriptedConnection([{"type": "move", "to": [2, 3]}])
+        conn.send_all = conn.send
+        receive = conn.receive
+
+        async def receive_at_deadline():
+            # The deadline elapses in the same loop iteration as the move arrives
+            deadlines[0]()
+            return await receive()
+
+        conn.receive = receive_at_deadline
+        asyncio.run(session.start_level())
+        asyncio.run(session.play_player_turn(session.game.players[0], conn))
+
+        # Testing that a move that arrived with the deadline is played
+        self.assertEqual(session.turns_timed_out, 0)
+        self.assertEqual((session.game.players[0].x_pos, session.game.players[0].y_pos), (2, 3))
+
+    def test_late_move(self):
+        session, (conn1, conn2) = self.make_session()
+        session.timer_wheel = TimerWheel(tick=0.01)
+        session.turn_timeout = 0.05
+        server_end, client_end = loopback_pair()
+        player = session.game.players[0]
+
+        async def play():
+            await session.start_level()
+            await session.play_player_turn(player, server_end)
+            # The reply to the first request arrives after its deadline, followed by the reply to the next one
+            await client_end.send({"type": "move", "to": [2, 3]})
+            await client_end.send({"type": "move", "to": [2, 4]})
+            session.game_manager.player_turn = 1
+            await session.play_player_turn(player, server_end)
+
+        asyncio.run(play())
+
+        # Testing that a late move is dropped instead of being played on the player's next turn
+        self.assertEqual(session.turns_timed_out, 1)
+        self.assertEqual(session.late_replies_dropped, 1)
+        self.assertEqual((player.x_pos, player.y_pos), (2, 4))
+        self.assertEqual(session.late_replies[player.turn_id], 0)
+
+    def test_get_move_request(self):
+        session, (conn1, conn2) = self.make_session()
+        player = session.game.players[0]
+        session.game.current_level.place_player(session.game.players[1], 2, 3)
+
+        # Testing that move requests carry the valid moves, without the other player's cell
+        self.assertEqual(session.get_move_request(player), "move")
+        session.send_moves = "list"
+        moves = session.get_move_request(player)["moves"]
+        self.assertEqual(sorted(moves), [[1, 2], [2, 1], [2, 2], [2, 4], [3, 2], [4, 2]])
+        session.send_moves = "mask"
+        request = session.get_move_request(player)
+        self.assertEqual(sorted(get_valid_moves(request)), [tuple(move) for move in sorted(moves)])
+
+    def test_local_move_rules(self):
+        levels = [build_level(json_level) for json_level in read_levels_file('../../src/Remote/snarl.levels')]
+        session = GameSession(levels, seed=0, pacing=Pacing(0))
+        for name in ["p1", "p2", "p3"]:
+            session.add_player(RecordingConnection(), name)
+        session.game_manager.start_game()
+        players = session.game.players
+        level = session.game.current_level
+
+        # Testing that the client's rules agree with the server's for every tile near each player,
+        # as the players wander the level
+        for step in range(200):
+            player = players[step % len(players)]
+            index = level.random_open_cell()
+            x_pos, y_pos = divmod(index, level.width)
+            if not level.place_player(player, x_pos, y_pos):
+                continue
+            layout, actors, objects = level.get_tile_and_actor_lists(player)
+            state = ViewState()
+            state.apply({"type": "player-update", "layout": layout, "position": [x_pos, y_pos],
+                         "objects": objects, "actors": actors, "message": ""})
+            for i in range(x_pos - 3, x_pos + 4):
+                for j in range(y_pos - 3, y_pos + 4):
+                    self.assertEqual(state.is_valid_move((i, j)),
+                                     session.game_manager.rulechecker.is_valid_movement(player, (i, j)))
+
+class TestLobby(unittest.TestCase):
+    def make_remote(self):
+        level = Level(20, 20)
+        level.add_room(0, 0, Room(19, 19))
+        remote = Remote()
+        remote.num_clients = 2
+        remote.next_session = GameSession([level], seed=0, pacing=Pacing(0))
+        remote.started = []
+        remote.start_game = lambda: remote.started.append(list(remote.next_session.game.players))
+        return remote
+
+    def test_register_players(self):
+        remote = self.make_remote()
+        slow = ScriptedConnection(["p1", "p2"], delay=0.05)
+        fast = ScriptedConnection(["p1"])
+        remote.lobby.update([slow, fast])
+
+        async def register():
+            return await asyncio.gather(remote.register_player(slow), remote.register_player(fast))
+
+        # Testing that clients register concurrently and a taken name is asked for again
+        self.assertEqual(asyncio.run(register()), [True, True])
+        self.assertEqual(fast.sent, ["name"])
+        self.assertEqual(slow.sent, ["name", "name"])
+        self.assertEqual(remote.next_session.player_connections, [fast, slow])
+        self.assertEqual(remote.lobby, set())
+
+        # Testing that the game starts as soon as enough players registered
+        self.assertEqual([player.id for player in remote.started[0]], ["p1", "p2"])
+
+    def test_last_player_stays_connected(self):
+        level = Level(20, 20)
+        level.add_room(0, 0, Room(19, 19))
+        remote = Remote()
+        remote.num_clients = 2
+        remote.num_games = 1
+        remote.next_session = GameSession([level], seed=0, pacing=Pacing(0))
+
+        async def play():
+            pass
+
+        remote.next_session.play = play
+        first = ScriptedConnection(["p1"])
+        last = ScriptedConnection(["p2"], delay=0.01)
+        remote.lobby.update([first, last])
+
+        async def register():
+            remote.done = asyncio.Event()
+            registered = await asyncio.gather(remote.register_player(first), remote.register_player(last))
+            await remote.done.wait()
+            return registered
+
+        # Testing that starting the last game does not disconnect the player who registered last
+        self.assertEqual(asyncio.run(register()), [True, True])
+        self.assertFalse(last.closed)
+        self.assertEqual(remote.lobby, set())
+        self.assertEqual(remote.games_started, 1)
+
+    def test_name_wait(self):
+        remote = self.make_remote()
+        remote.name_wait = 0.01
+        conn = ScriptedConnection(["p1"], delay=1)
+
+        # Testing that a client that does not send a name in time is disconnected
+        self.assertFalse(asyncio.run(remote.register_player(conn)))
+        self.assertTrue(conn.closed)
+        self.assertEqual(remote.next_session.player_connections, [])
+
+class TestServer(unittest.TestCase):
+    def make_remote(self, num_games):
+        remote = Remote()
+        remote.num_clients = 2
+        remote.num_games = num_games
+        remote.json_levels = read_levels_file('../../src/Remote/snarl.levels')
+        remote.running = []
+        remote.most_running = 0
+        remote.release = None
+        make_session = remote.new_session
+
+        def new_session():
+            session = make_session()
+
+            async def play():
+                # Stand in for a game, staying in progress until the test releases every game
+                remote.running.append(session)
+                remote.most_running = max(remote.most_running, len(remote.running))
+                await remote.release.wait()
+                remote.running.remove(session)
+
+            session.play = play
+            return session
+
+        remote.new_session = new_session
+        return remote
+
+    def test_concurrent_games(self):
+        remote = self.make_remote(2)
+        conns = [ScriptedConnection([name]) for name in ["p1", "p2", "p3", "p4"]]
+        late = ScriptedConnection(["p5"])
+
+        async def serve():
+            remote.done = asyncio.Event()
+            remote.release = asyncio.Event()
+            remote.next_session = remote.new_session()
+            await asyncio.gather(*[remote.accept(conn) for conn in conns])
+            await asyncio.sleep(0)
+            await remote.accept(late)
+            remote.release.set()
+            await asyncio.wait_for(remote.done.wait(), 1)
+
+        asyncio.run(serve())
+
+        # Testing that both games were in progress at the same time
+        self.assertEqual(remote.games_started, 2)
+        self.assertEqual(remote.most_running, 2)
+
+        # Testing that the server stops once the configured number of games was played
+        self.assertIsNone(remote.next_session)
+        self.assertTrue(late.closed)
+        self.assertEqual(late.sent, [])
+        self.assertEqual(remote.sessions, set())
+
+    def test_name_deadline(self):
+        remote = self.make_remote(1)
+        remote.name_wait = 0.01
+        silent = ScriptedConnection(["p1"], delay=1)
+
+        async def accept():
+            remote.done = asyncio.Event()
+            remote.next_session = remote.new_session()
+            await remote.accept(silent)
+            remote.close_server()
+
+        asyncio.run(accept())
+
+        # Testing that a client that does not send a name in time is dropped from the lobby
+        self.assertTrue(silent.closed)
+        self.assertEqual(remote.lobby, set())
+        self.assertEqual(remote.next_session.player_connections, [])
+        self.assertEqual(remote.games_started, 0)
+
+    def test_lobby_timeout(self):
+        remote = self.make_remote(1)
+        remote.wait = 0.05
+        conn = ScriptedConnection(["p1"])
+
+        async def serve():
+            remote.done = asyncio.Event()
+            remote.release = asyncio.Event()
+            remote.release.set()
+            remote.next_session = remote.new_session()
+            await remote.accept(conn)
+            await asyncio.wait_for(remote.done.wait(), 1)
+
+        asyncio.run(serve())
+
+        # Testing that a game starts with the players registered when no other client connects in time
+        self.assertEqual(remote.games_started, 1)
+        self.assertFalse(conn.closed)
+
+if __name__ == '__main__':
+    unittest.main()
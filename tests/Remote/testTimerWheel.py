@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+import sys
+import asyncio
+import unittest
+sys.path.append('../../src/Remote')
+from timerWheel import *
+
+class TestTimerWheel(unittest.TestCase):
+    def test_advance(self):
+        async def advance():
+            # Time stands still, so that only the test advances the wheel
+            asyncio.get_event_loop().time = lambda: 0.0
+            wheel = TimerWheel(tick=1, slots=4)
+            elapsed = []
+            for delay in [1, 2, 2, 6]:
+                wheel.schedule(delay, lambda delay=delay: elapsed.append(delay))
+            wheel.schedule(3, lambda: elapsed.append(3)).cancel()
+            ticks = []
+            for tick in range(6):
+                wheel.advance()
+                ticks.append(list(elapsed))
+            return wheel, ticks
+
+        # Testing that each tick calls the deadlines that elapsed, including those more than a
+        # full turn of the wheel away, and not cancelled ones
+        wheel, ticks = asyncio.run(advance())
+        self.assertEqual(ticks, [[1], [1, 2, 2], [1, 2, 2], [1, 2, 2], [1, 2, 2], [1, 2, 2, 6]])
+        self.assertEqual(wheel.pending, 0)
+
+    def test_run(self):
+        async def run():
+            wheel = TimerWheel(tick=0.01)
+            elapsed = []
+            deadlines = [wheel.schedule(0.05, lambda i=i: elapsed.append(i)) for i in range(2000)]
+            for deadline in deadlines[1000:]:
+                deadline.cancel()
+            await asyncio.sleep(0.1)
+            return wheel, elapsed
+
+        # Testing that thousands of deadlines elapse together and the wheel stops once none are left
+        wheel, elapsed = asyncio.run(run())
+        self.assertEqual(sorted(elapsed), list(range(1000)))
+        self.assertIsNone(wheel.timer)
+
+    def test_never_early(self):
+        async def run():
+            loop = asyncio.get_event_loop()
+            wheel = TimerWheel(tick=0.05)
+            wheel.schedule(1, lambda: None)
+            # Schedule part way through a tick
+            await asyncio.sleep(0.04)
+            scheduled = loop.time()
+            elapsed = []
+            wheel.schedule(0.05, lambda: elapsed.append(loop.time()))
+            await asyncio.sleep(0.15)
+            return scheduled, elapsed
+
+        # Testing that a deadline is not called before its delay has passed
+        scheduled, elapsed = asyncio.run(run())
+        self.assertEqual(len(elapsed), 1)
+        self.assertGreaterEqual(elapsed[0] - scheduled, 0.05)
+
+if __name__ == '__main__':
+    unittest.main()
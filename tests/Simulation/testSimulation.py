@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+import sys
+import unittest
+sys.path.append('../../src/Game')
+sys.path.append('../../src/Simulation')
+from simulation import *
+from batch import *
+
+LEVELS_FILE = '../../src/Remote/snarl.levels'
+
+class TestSimulation(unittest.TestCase):
+    def test_run(self):
+        json_levels = read_levels_file(LEVELS_FILE)
+        simulation = Simulation.from_json(json_levels, [("p1", SeekPolicy()), ("p2", RandomPolicy())],
+                                          seed=0)
+        end_game = simulation.run()
+
+        # Testing that every level was played and every player was scored
+        self.assertEqual(len(simulation.end_level_messages), len(json_levels))
+        self.assertEqual(simulation.game.levels_completed, len(json_levels))
+        self.assertEqual([score["name"] for score in end_game["scores"]], ["p1", "p2"])
+        self.assertEqual(simulation.game.get_game_state(), State.OVER)
+
+    def test_max_rounds(self):
+        json_levels = read_levels_file(LEVELS_FILE)
+        simulation = Simulation.from_json(json_levels, [("p1", RandomPolicy())], max_rounds=1,
+                                          seed=0)
+        simulation.run()
+
+        # Testing that no level runs longer than the maximum number of rounds
+        self.assertTrue(all(rounds <= 1 for rounds in simulation.rounds))
+        self.assertEqual(len(simulation.rounds), len(json_levels))
+
+    def test_replay(self):
+        json_levels = read_levels_file(LEVELS_FILE)
+        players = [("p1", SeekPolicy()), ("p2", RandomPolicy())]
+        first = Simulation.from_json(json_levels, players, seed=42)
+        second = Simulation.from_json(json_levels, players, seed=42)
+
+        # Testing that the same seed replays the same game, and that the seed is recorded
+        self.assertEqual(first.run(), second.run())
+        self.assertEqual(first.end_level_messages, second.end_level_messages)
+        self.assertEqual(first.rounds, second.rounds)
+        self.assertEqual(first.game.end_game_message["seed"], 42)
+
+    def test_seek_policy(self):
+        level = Level(10, 10)
+        level.add_room(0, 0, Room(8, 8))
+        level.set_key(1, 5)
+        p1 = Player("p1")
+        level.place_player(p1, 1, 1)
+        moves = [(1, 0), (1, 2), (1, 3), (0, 1), (2, 1), (3, 1), (1, 1)]
+
+        # Testing that the seek policy heads straight for the key
+        self.assertEqual(SeekPolicy().choose_move(p1, moves, level), (1, 3))
+
+    def test_run_batch(self):
+        stats = run_batch(LEVELS_FILE, "seek", range(8), workers=2, chunk_size=3)
+
+        # Testing that every game is counted once per level
+        self.assertEqual(len(stats), len(read_levels_file(LEVELS_FILE)))
+        for level_stats in stats:
+            self.assertEqual(level_stats["games"], 8)
+            self.assertEqual(level_stats["win_rate"], level_stats["wins"] / 8)
+
+    def test_aggregate(self):
+        results = [[(True, True, 1, 0), (False, False, 0, 1)], [(False, True, 0, 1)]]
+        stats = aggregate([{}, {}], results)
+
+        # Testing that results are totaled per level, including games that ended early
+        self.assertEqual(stats[0], {"level": 1, "games": 2, "wins": 1, "keys": 2, "exits": 1,
+                                    "ejects": 1, "win_rate": 0.5})
+        self.assertEqual(stats[1]["games"], 1)
+        self.assertEqual(stats[1]["keys"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
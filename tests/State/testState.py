@@ -62,19 +62,8 @@ def add_hallways(level, hallways):
         waypoints_t = []
         for w in waypoints:
             waypoints_t.append((w[0], w[1]))
-        room1 = None
-        room2 = None
-        for room in level.rooms:
-            for t in room.tiles:
-                for a in t:
-                    if a.x_pos == from_[0] and a.y_pos == from_[1]:
-                        room1 = room
-
-        for room in level.rooms:
-            for t in room.tiles:
-                for a in t:
-                    if a.x_pos == to[0] and a.y_pos == to[1]:
-                        room2 = room
+        room1 = level.room_at(from_[0], from_[1])
+        room2 = level.room_at(to[0], to[1])
         level.add_hallway(from_[0], from_[1], to[0], to[1], waypoints_t, room1, room2)
 
 